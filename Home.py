@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import configparser
+from commonLib import IMPORT_TIMES, oci_config_path
 
 st.set_page_config(
     page_title="OCI FSDR Plan Steps Export/Update",
@@ -8,7 +9,7 @@ st.set_page_config(
 )
 
 def load_oci_profiles():
-    config_path = os.path.expanduser("~/.oci/config")
+    config_path = oci_config_path()
     if not os.path.exists(config_path):
         return []
     
@@ -25,10 +26,18 @@ def main():
         selected_profile = st.selectbox("Select OCI Authentication Profile", profiles)
         st.session_state['oci_profile'] = selected_profile
     else:
-        st.error("No OCI profiles found in ~/.oci/config. Please ensure you have valid OCI configuration.")
+        st.error(f"No OCI profiles found in {oci_config_path()}. Please ensure you have valid OCI configuration.")
         return
 
     st.write("Please use the sidebar to navigate between Export and Update functionalities.")
 
+    # The pages import oci, pandas and openpyxl on first use; show what that cost in this process
+    with st.expander("Import timings"):
+        if IMPORT_TIMES:
+            for module_name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+                st.text(f"{module_name:<20} {seconds:8.3f} s")
+        else:
+            st.write("No heavy modules have been imported yet.")
+
 if __name__ == "__main__":
     main()
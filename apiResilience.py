@@ -0,0 +1,234 @@
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+
+from perfMetrics import count, observe, phase
+
+logger = logging.getLogger(__name__)
+
+# Requests per second, and the burst above it, each region's clients share; tenancy API limits are per region
+DEFAULT_RATE = float(os.environ.get("FSDR_API_RATE", "10"))
+DEFAULT_BURST = int(os.environ.get("FSDR_API_BURST", "20"))
+MAX_ATTEMPTS = 6
+BASE_DELAY_SECONDS = 0.5
+MAX_DELAY_SECONDS = 30.0
+# Consecutive failures that open a region's circuit, and how long it stays open before one trial call
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+SERVER_ERROR_STATUSES = (500, 502, 503, 504)
+
+_region_strategies = {}
+_region_strategies_lock = threading.Lock()
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a region whose circuit is open"""
+
+    def __init__(self, region, retry_in):
+        super().__init__(f"Calls to {region} are paused after repeated failures; retrying in {retry_in:.0f} s")
+        self.region = region
+        self.retry_in = retry_in
+
+class TokenBucket:
+    """Thread-safe token bucket; throttling halves the rate and every success wins a little of it back"""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take a token, sleeping until it is due; returns the seconds waited
+
+        The token is reserved at once, running the bucket into debt, so waiting callers are served in turn.
+        """
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+        if wait:
+            self.sleep(wait)
+        return wait
+
+    def throttled(self):
+        with self._lock:
+            self._refill(self.clock())
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(self.clock())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class CircuitBreaker:
+    """Open after threshold consecutive failures; after reset_seconds let one trial call through"""
+
+    def __init__(self, region, threshold=BREAKER_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.region = region
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.clock() - self.opened_at >= self.reset_seconds else 'open'
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            retry_in = self.opened_at + self.reset_seconds - self.clock()
+            if retry_in > 0 or self._trial_running:
+                raise CircuitOpenError(self.region, max(retry_in, 0))
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit for %s closed", self.region)
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                logger.warning("Circuit for %s opened after %d failures", self.region, self.failures)
+                count("fsdr_api_circuit_opened", region=self.region)
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+def retry_after_seconds(error):
+    """The delay a Retry-After header asks for, in seconds or as an HTTP date, or None"""
+    headers = getattr(error, 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, base=BASE_DELAY_SECONDS, cap=MAX_DELAY_SECONDS, uniform=random.uniform):
+    """Full-jitter exponential backoff for the given retry, counted from 1"""
+    return uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+def failure_kind(error):
+    """'throttled', 'server' or 'connection' for errors worth retrying, None for the rest"""
+    status = getattr(error, 'status', None)
+    if status == 429:
+        return 'throttled'
+    if status in SERVER_ERROR_STATUSES:
+        return 'server'
+    if status is None:
+        # Only reached once a call failed, so the SDK and requests are loaded already
+        import oci
+        import requests
+        if isinstance(error, (oci.exceptions.RequestException, oci.exceptions.ConnectTimeout,
+                              requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return 'connection'
+    return None
+
+class ResilientRetryStrategy:
+    """OCI SDK retry strategy sharing one rate limiter and circuit breaker per region
+
+    Every attempt waits for a token, throttling slows the whole region down, and retries back off
+    with jitter or as long as Retry-After asks. Reads are retried on throttling, server and connection
+    errors. Writes, such as update_dr_plan, only on throttling, which OCI rejects before acting on.
+    """
+
+    def __init__(self, region, bucket=None, breaker=None, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY_SECONDS,
+                 max_delay=MAX_DELAY_SECONDS, sleep=time.sleep, uniform=random.uniform):
+        self.region = region
+        self.bucket = bucket or TokenBucket()
+        self.breaker = breaker or CircuitBreaker(region)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.uniform = uniform
+
+    def add_circuit_breaker_callback(self, callback):
+        # The SDK offers its own breaker's callback; this strategy's breaker raises CircuitOpenError instead
+        pass
+
+    def make_retrying_call(self, func_ref, *func_args, **func_kwargs):
+        operation = func_kwargs.get('operation_name') or getattr(func_ref, '__name__', 'call')
+        is_read = func_kwargs.get('method', 'GET') == 'GET'
+        attempt = 1
+        while True:
+            self.breaker.before_call()
+            waited = self.bucket.acquire()
+            if waited:
+                count("fsdr_api_rate_limited", region=self.region, operation=operation)
+            start = time.perf_counter()
+            try:
+                response = func_ref(*func_args, **func_kwargs)
+            except Exception as e:
+                kind = failure_kind(e)
+                observe("fsdr_api_call", time.perf_counter() - start, region=self.region, operation=operation,
+                        outcome=kind or 'error')
+                if kind == 'throttled':
+                    self.bucket.throttled()
+                elif kind is not None:
+                    self.breaker.record_failure()
+                else:
+                    # The service answered, so the region is healthy even though the request was refused
+                    self.breaker.record_success()
+                if kind is None or (kind != 'throttled' and not is_read) or attempt >= self.max_attempts:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay, self.uniform)
+                count("fsdr_api_retries", region=self.region, operation=operation, reason=kind)
+                logger.info("Retrying %s in %s after %s (attempt %d): %s", operation, self.region, kind, attempt,
+                            getattr(e, 'status', type(e).__name__))
+                with phase("api_backoff", operation=operation, reason=kind):
+                    self.sleep(min(delay, self.max_delay))
+                attempt += 1
+                continue
+            observe("fsdr_api_call", time.perf_counter() - start, region=self.region, operation=operation,
+                    outcome='ok')
+            self.breaker.record_success()
+            self.bucket.succeeded()
+            return response
+
+def region_strategy(region):
+    """The retry strategy every client of a region shares, so they share its rate limit and circuit"""
+    with _region_strategies_lock:
+        strategy = _region_strategies.get(region)
+        if strategy is None:
+            strategy = _region_strategies[region] = ResilientRetryStrategy(region)
+        return strategy
+
+def resilience_status():
+    """One row per region called so far: its circuit and current request rate"""
+    with _region_strategies_lock:
+        strategies = list(_region_strategies.values())
+    return [{'Region': strategy.region, 'Circuit': strategy.breaker.state,
+             'Consecutive failures': strategy.breaker.failures,
+             'Rate (req/s)': round(strategy.bucket.rate, 2)} for strategy in strategies]
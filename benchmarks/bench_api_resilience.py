@@ -0,0 +1,132 @@
+"""Exercise the shared API layer through a real SDK client against a local server that throttles and fails.
+
+Three scenarios:
+- throttling: many concurrent get_dr_plan calls against a server that answers
+  429 with Retry-After above its rate limit, at client rates below and above it
+- outage: a server answering 503 must open the region's circuit, so later calls
+  fail fast without reaching it, and one trial call must close it again
+- writes: update_dr_plan is retried when throttled but never after a 503
+
+Exits with 1 when any call is lost to throttling, a retry comes sooner than
+Retry-After asked, or the circuit or write checks fail. Run from the
+repository root:
+
+    python benchmarks/bench_api_resilience.py [--calls 60] [--limit 20]
+"""
+import argparse
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bench_update_parse  # puts the repository root on sys.path
+import oci
+import perfMetrics
+from apiResilience import CircuitBreaker, CircuitOpenError, ResilientRetryStrategy, TokenBucket
+from fake_dr_server import FakeDisasterRecoveryServer
+from plan_generator import make_plan
+
+def strategy(rate, burst=5, threshold=5, reset_seconds=30.0):
+    return ResilientRetryStrategy('us-phoenix-1', TokenBucket(rate, burst),
+                                  CircuitBreaker('us-phoenix-1', threshold, reset_seconds), base_delay=0.01)
+
+def earliest_retry(server):
+    """The shortest gap between a 429 and the next request for the same plan"""
+    last_throttled = {}
+    gaps = []
+    for now, _, plan_id, status in sorted(server.requests):
+        if plan_id in last_throttled:
+            gaps.append(now - last_throttled.pop(plan_id))
+        if status == 429:
+            last_throttled[plan_id] = now
+    return min(gaps) if gaps else None
+
+def throttling(plans, limit, rate, workers):
+    with FakeDisasterRecoveryServer(plans, rate_limit=limit, retry_after=1) as server:
+        client = server.client(strategy(rate))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = list(executor.map(lambda plan: client.get_dr_plan(plan.id).data.id, plans))
+        elapsed = time.perf_counter() - start
+        statuses = server.statuses()
+        return {'rate': rate, 'fetched': sum(1 for plan_id in fetched if plan_id), 'seconds': elapsed,
+                'throttled': statuses.count(429), 'earliest retry': earliest_retry(server),
+                'final rate': client.retry_strategy.bucket.rate}
+
+def outage(plan):
+    with FakeDisasterRecoveryServer([plan]) as server:
+        client = server.client(strategy(100, threshold=5, reset_seconds=0.5))
+        server.outage = True
+        errors = []
+        for _ in range(20):
+            try:
+                client.get_dr_plan(plan.id)
+            except Exception as e:
+                errors.append(e)
+        reached_in_outage = len(server.requests)
+        # The first call opens the circuit during its own retries, so it ends with CircuitOpenError too
+        stopped = sum(1 for error in errors if isinstance(error, CircuitOpenError))
+        server.outage = False
+        time.sleep(0.5)
+        recovered = client.get_dr_plan(plan.id).data.id == plan.id
+        return reached_in_outage, stopped, recovered, client.retry_strategy.breaker.state
+
+def writes(plan):
+    details = oci.disaster_recovery.models.UpdateDrPlanDetails(plan_groups=[])
+    with FakeDisasterRecoveryServer([plan]) as server:
+        client = server.client(strategy(100))
+        server.outage = True
+        try:
+            client.update_dr_plan(details, plan.id)
+        except oci.exceptions.ServiceError:
+            pass
+        puts_in_outage = sum(1 for _, method, _, _ in server.requests if method == 'PUT')
+    with FakeDisasterRecoveryServer([plan], rate_limit=1, retry_after=1) as server:
+        client = server.client(strategy(100))
+        client.get_dr_plan(plan.id)
+        response = client.update_dr_plan(details, plan.id)
+        throttled_put_retried = response.status == 202 and 429 in server.statuses()
+    return puts_in_outage, throttled_put_retried
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=60, help='get_dr_plan calls per throttling run')
+    parser.add_argument('--limit', type=int, default=20, help='requests per second the server allows')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+    perfMetrics.enable_metrics(stream=io.StringIO())
+    plans = [make_plan(2, 3, plan_id=f"ocid1.drplan.oc1.phx.p{index}", display_name=f"Plan {index}")
+             for index in range(args.calls)]
+    failures = []
+
+    print(f"throttling: {args.calls} calls, {args.workers} threads, server limit {args.limit} req/s")
+    print(f"{'client rate':>12} {'fetched':>8} {'seconds':>8} {'429s':>5} {'earliest retry (s)':>19} {'final rate':>11}")
+    for rate in (args.limit / 2, args.limit, args.limit * 2):
+        result = throttling(plans, args.limit, rate, args.workers)
+        earliest = result['earliest retry']
+        print(f"{rate:12.0f} {result['fetched']:>8} {result['seconds']:8.2f} {result['throttled']:>5} "
+              f"{'-' if earliest is None else f'{earliest:.2f}':>19} {result['final rate']:11.1f}")
+        if result['fetched'] != args.calls:
+            failures.append(f"{args.calls - result['fetched']} calls lost to throttling at {rate:.0f} req/s")
+        if earliest is not None and earliest < 0.95:
+            failures.append(f"a throttled call was retried after {earliest:.2f} s, before Retry-After")
+
+    reached, stopped, recovered, state = outage(plans[0])
+    print(f"outage: {reached} requests reached the server, {stopped} of 20 calls stopped by the open circuit, "
+          f"recovered: {recovered}, circuit {state}")
+    if reached != 5 or stopped != 20 or not recovered or state != 'closed':
+        failures.append("the circuit did not open after 5 failures and close after a successful trial call")
+
+    puts_in_outage, throttled_put_retried = writes(plans[0])
+    print(f"writes: {puts_in_outage} PUT sent during the outage, throttled PUT retried: {throttled_put_retried}")
+    if puts_in_outage != 1 or not throttled_put_retried:
+        failures.append("update_dr_plan was retried after a 503, or not retried after a 429")
+
+    print("\n".join(line for line in perfMetrics.REGISTRY.render().splitlines()
+                    if line.startswith(('fsdr_api_retries', 'fsdr_api_circuit', 'fsdr_api_rate'))))
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
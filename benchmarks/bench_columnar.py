@@ -0,0 +1,61 @@
+"""Compare writing and reading back plan exports as Excel and as each columnar format.
+
+Every format is read back through the update engine and diffed against the
+plans it came from, which must find no change. Run from the repository root:
+
+    python benchmarks/bench_columnar.py [--plans 4] [--groups 50] [--steps 40]
+"""
+import argparse
+import time
+from io import BytesIO
+
+from plan_generator import make_plans
+import planColumnar
+import planExport
+import planUpdate
+from commonLib import available_formats
+from planCache import PlanSnapshot
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def write(snapshots, file_format):
+    output = BytesIO()
+    if file_format == 'xlsx':
+        planExport.write_plans_workbook(output, snapshots)
+    else:
+        planColumnar.write_plans_columnar(output, snapshots, file_format)
+    output.seek(0)
+    return output
+
+def read(source, file_format):
+    if file_format == 'xlsx':
+        return planUpdate.parse_workbook_plans(source)
+    return planUpdate.parse_columnar_plans(source, file_format=file_format)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=4)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--steps', type=int, default=40)
+    args = parser.parse_args()
+
+    plans = make_plans(args.plans, args.groups, args.steps)
+    snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                 for plan in plans]
+    rows = sum(len(snapshot.dataframe) for snapshot in snapshots)
+    print(f"{rows} rows in {len(plans)} plans")
+    print(f"{'format':>8} {'write (s)':>10} {'read (s)':>9} {'size (KiB)':>11}")
+    for file_format in ['xlsx'] + available_formats():
+        write_time, output = timed(lambda: write(snapshots, file_format))
+        size = len(output.getvalue())
+        read_time, parsed = timed(lambda: read(output, file_format))
+        for plan, (_, plan_id, plan_groups, error) in zip(plans, parsed):
+            assert plan_id == plan.id and error is None, error
+            assert not planUpdate.diff_plan(plan, plan_groups), f"{file_format} did not round-trip {plan.id}"
+        print(f"{file_format:>8} {write_time:10.3f} {read_time:9.3f} {size / 1024:11.1f}")
+
+if __name__ == '__main__':
+    main()
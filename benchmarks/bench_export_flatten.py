@@ -0,0 +1,89 @@
+"""Micro-benchmark the export engine's plan flattening against the previous json_normalize path.
+
+Run from the repository root:
+
+    python benchmarks/bench_export_flatten.py
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+from plan_generator import make_plan
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import planExport
+
+def legacy_plan_to_dataframe(plan, export_columns):
+    """The previous path: dicts per step, three json_normalize calls, concat and a Categorical sort"""
+    plan_groups = plan.plan_groups
+    original_order = [pg.id for pg in plan_groups]
+    plan_dicts = []
+    for pg in plan_groups:
+        steps = []
+        for step in pg.steps:
+            step_dict = {
+                'display_name': step.display_name, 'error_mode': step.error_mode, 'id': step.id,
+                'is_enabled': step.is_enabled, 'timeout': step.timeout, 'type': step.type,
+            }
+            if hasattr(step, 'user_defined_step') and step.user_defined_step:
+                uds = step.user_defined_step
+                step_dict['user_defined_step'] = {
+                    'step_type': uds.step_type,
+                    'run_as_user': getattr(uds, 'run_as_user', None),
+                    'run_on_instance_id': getattr(uds, 'run_on_instance_id', None),
+                    'function_id': getattr(uds, 'function_id', None),
+                    'function_region': getattr(uds, 'function_region', None),
+                    'request_body': getattr(uds, 'request_body', None),
+                    'object_storage_script_location': {
+                        'bucket': getattr(uds.object_storage_script_location, 'bucket', None),
+                        'namespace': getattr(uds.object_storage_script_location, 'namespace', None),
+                        'object': getattr(uds.object_storage_script_location, 'object', None)
+                    } if getattr(uds, 'object_storage_script_location', None) else None,
+                    'run_on_instance_region': getattr(uds, 'run_on_instance_region', None),
+                    'script_command': getattr(uds, 'script_command', None)
+                }
+            steps.append(step_dict)
+        plan_dicts.append({'display_name': pg.display_name, 'id': pg.id, 'type': pg.type, 'steps': steps,
+                           'is_pause_enabled': pg.is_pause_enabled})
+
+    df = pd.json_normalize(plan_dicts)
+    step_columns = ['display_name', 'id', 'steps.display_name', 'steps.error_mode', 'steps.id',
+                    'steps.is_enabled', 'steps.timeout', 'steps.type']
+    built_in = pd.json_normalize(df[df['type'] == 'BUILT_IN'].to_dict('records'), "steps",
+                                 ['display_name', 'id', 'type'], record_prefix='steps.')
+    built_in = built_in.reindex(columns=step_columns + ['type'], fill_value=None)
+    other = pd.json_normalize(df[df['type'] != 'BUILT_IN'].to_dict('records'), "steps",
+                              ['display_name', 'id', 'type'], record_prefix='steps.')
+    other = other.reindex(columns=export_columns[:-1], fill_value=None)
+    pause = pd.json_normalize(df[df['type'] == 'USER_DEFINED_PAUSE'].to_dict('records'))
+    pause = pause.reindex(columns=['display_name', 'id', 'is_pause_enabled', 'type'], fill_value=None)
+    combined = pd.concat([other, built_in, pause], ignore_index=True)
+    combined['sort_order'] = pd.Categorical(combined['id'], categories=original_order, ordered=True)
+    combined.sort_values('sort_order', inplace=True, kind='stable')
+    combined.drop(columns=['sort_order'], inplace=True)
+    return combined.reset_index(drop=True)
+
+def best_of(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    print(f"{'groups x steps':>15} {'legacy (ms)':>12} {'single-pass (ms)':>17} {'speedup':>8}")
+    for groups, steps in ((10, 10), (50, 50), (100, 50)):
+        plan = make_plan(groups, steps)
+        legacy_time, legacy = best_of(lambda: legacy_plan_to_dataframe(plan, planExport.EXPORT_COLUMNS))
+        new_time, new = best_of(lambda: planExport.plan_to_dataframe(plan))
+        pd.testing.assert_frame_equal(legacy, new, check_dtype=False)
+        print(f"{f'{groups} x {steps}':>15} {legacy_time * 1e3:12.1f} {new_time * 1e3:17.1f} "
+              f"{legacy_time / new_time:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Compare the CPU time of exporting into the template with styling every sheet from scratch.
+
+Both writers must produce the same cell values on the plan and manifest sheets;
+the template export keeps the template's header styles and widths instead of
+computing them, and its other sheets as well. Runs of the two
+writers alternate, and their median CPU times are compared. Exits with 1 when
+the template export costs over 5% more CPU time than styling from scratch.
+Run from the repository root:
+
+    python benchmarks/bench_export_template.py [--plans 5] [--repeat 7]
+"""
+import argparse
+import statistics
+import sys
+import time
+from io import BytesIO
+
+import openpyxl
+
+import bench_export_flatten  # puts the repository root on sys.path
+import planExport
+from planCache import PlanSnapshot
+from plan_generator import make_plans
+
+NOISE_TOLERANCE = 0.05
+
+def cpu_time(snapshots, template_path):
+    output = BytesIO()
+    start = time.process_time()
+    planExport.write_plans_workbook(output, snapshots, template_path=template_path)
+    return time.process_time() - start, output
+
+def sheet_values(output):
+    book = openpyxl.load_workbook(output)
+    return {name: list(book[name].iter_rows(values_only=True)) for name in book.sheetnames}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    # Read the template before timing, as a long-running process does once
+    planExport.load_template()
+    slower = False
+    print(f"{'plans':>6} {'rows':>7} {'from scratch (s)':>17} {'template (s)':>13} {'saved':>6}")
+    for groups, steps in ((10, 10), (20, 50)):
+        snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                     for plan in make_plans(args.plans, groups, steps)]
+        rows = sum(len(snapshot.dataframe) for snapshot in snapshots)
+        scratch_times, template_times = [], []
+        for _ in range(args.repeat):
+            scratch_time, scratch_output = cpu_time(snapshots, None)
+            template_time, template_output = cpu_time(snapshots, planExport.TEMPLATE_FILE)
+            scratch_times.append(scratch_time)
+            template_times.append(template_time)
+        scratch_values, template_values = sheet_values(scratch_output), sheet_values(template_output)
+        assert scratch_values == {name: template_values.get(name) for name in scratch_values}, \
+            "template export values differ"
+        scratch_time, template_time = statistics.median(scratch_times), statistics.median(template_times)
+        slower = slower or template_time > scratch_time * (1 + NOISE_TOLERANCE)
+        print(f"{args.plans:>6} {rows:>7} {scratch_time:17.3f} {template_time:13.3f} "
+              f"{1 - template_time / scratch_time:6.0%}")
+    if slower:
+        print(f"FAIL: exporting into the template cost over {NOISE_TOLERANCE:.0%} more CPU time than styling "
+              "from scratch", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
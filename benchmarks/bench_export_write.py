@@ -0,0 +1,77 @@
+"""Benchmark the export engine's Excel writer against the previous per-cell styling path.
+
+Run from the repository root:
+
+    python benchmarks/bench_export_write.py
+"""
+import time
+from io import BytesIO
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment, Font, PatternFill
+
+import bench_export_flatten  # puts the repository root on sys.path
+import planExport
+from plan_generator import make_plan
+
+def legacy_write_plan_sheet(writer, combined_data, sheet_name):
+    """The previous writer: to_excel, then cell-by-cell merge detection, styling and autofit"""
+    combined_data.to_excel(writer, sheet_name=sheet_name, index=False)
+    ws = writer.sheets[sheet_name]
+
+    def merge_and_center(col):
+        max_row = ws.max_row
+        for row in range(2, max_row + 1):
+            cell_value = ws.cell(row=row, column=col).value
+            start_row = row
+            while row <= max_row and ws.cell(row=row, column=col).value == cell_value:
+                row += 1
+            end_row = row - 1
+            if start_row != end_row:
+                ws.merge_cells(start_row=start_row, start_column=col, end_row=end_row, end_column=col)
+                ws.cell(row=start_row, column=col).alignment = Alignment(horizontal='center', vertical='center')
+
+    merge_and_center(1)
+    merge_and_center(2)
+    fill_blue = PatternFill(start_color="346EC9", end_color="346EC9", fill_type="solid")
+    fill_purple = PatternFill(start_color="858491", end_color="858491", fill_type="solid")
+    for cell in ws[1]:
+        cell.fill = fill_blue if cell.column_letter in ['A', 'B', 'T'] else fill_purple
+        cell.font = Font(color="FFFFFF", bold=True)
+    for col in ws.columns:
+        max_length = 0
+        for cell in col:
+            try:
+                if len(str(cell.value)) > max_length:
+                    max_length = len(cell.value)
+            except TypeError:
+                pass
+        ws.column_dimensions[col[0].column_letter].width = max_length + 2
+
+def export(write_sheet, combined_data):
+    output = BytesIO()
+    start = time.perf_counter()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        write_sheet(writer, combined_data, "plan")
+    return time.perf_counter() - start, output
+
+def sheet_snapshot(output):
+    """Anchor values and column widths, ignoring how merged ranges are laid out"""
+    sheet = openpyxl.load_workbook(output)["plan"]
+    values = [list(row) for row in sheet.iter_rows(values_only=True)]
+    widths = {letter: dimension.width for letter, dimension in sheet.column_dimensions.items()}
+    return values, widths
+
+def main():
+    print(f"{'rows':>7} {'legacy (s)':>11} {'bulk (s)':>9} {'speedup':>8}")
+    for groups, steps in ((20, 50), (100, 100), (100, 133)):
+        combined_data = planExport.plan_to_dataframe(make_plan(groups, steps))
+        legacy_time, legacy_output = export(legacy_write_plan_sheet, combined_data)
+        bulk_time, bulk_output = export(lambda writer, *args: planExport.write_plan_sheet(writer.book, *args),
+                                        combined_data)
+        assert sheet_snapshot(legacy_output) == sheet_snapshot(bulk_output), "bulk writer output differs"
+        print(f"{len(combined_data):>7} {legacy_time:11.2f} {bulk_time:9.2f} {legacy_time / bulk_time:7.1f}x")
+
+if __name__ == "__main__":
+    main()
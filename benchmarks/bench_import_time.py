@@ -0,0 +1,75 @@
+"""Import-time regression check for the pages, the CLI and the shared modules.
+
+Each target is loaded in fresh interpreters under ``python -X importtime``.
+The script reports the best cumulative import time over --repeat loads and
+the modules with the most self time. Times depend on the machine and on
+whatever else it is running, so they are for information only. The script
+exits non-zero when a target loads one of the heavy modules it is meant to
+defer until a button handler or command actually needs it. Run from the
+repository root:
+
+    python benchmarks/bench_import_time.py [--top 10] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('oci', 'pandas', 'numpy', 'openpyxl')
+
+# (name, code run in the fresh interpreter, heavy modules allowed)
+TARGETS = [
+    ('commonLib', 'import commonLib', False),
+    ('planCache', 'import planCache', False),
+    ('planColumns', 'import planColumns', False),
+    ('fsdrPlans (CLI)', 'import fsdrPlans', False),
+    ('Home page', 'import runpy; runpy.run_path("Home.py")', False),
+    ('Export page', 'import runpy; runpy.run_path("pages/FSDR_Plans_Export.py")', False),
+    ('Update page', 'import runpy; runpy.run_path("pages/FSDR_Plans_update.py")', False),
+    ('Search page', 'import runpy; runpy.run_path("pages/FSDR_Plans_Search.py")', False),
+    ('History page', 'import runpy; runpy.run_path("pages/FSDR_Plans_History.py")', False),
+    ('planExport engine', 'import planExport', True),
+    ('planUpdate engine', 'import planUpdate', True),
+]
+
+def import_profile(code):
+    """Run code under -X importtime and return {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        profile[module.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=5, help='modules to list per target by self time')
+    parser.add_argument('--repeat', type=int, default=3, help='loads per target; the fastest is reported')
+    args = parser.parse_args()
+
+    failures = []
+    for name, code, heavy_allowed in TARGETS:
+        # Self times over every imported module add up to the whole import cost
+        total_ms, profile = min(((sum(self_us for self_us, _ in profile.values()) / 1000, profile)
+                                 for profile in (import_profile(code) for _ in range(args.repeat))),
+                                key=lambda measured: measured[0])
+        heavy = sorted(module for module in HEAVY_MODULES if module in profile)
+        print(f"{name:<20} {total_ms:8.1f} ms{'  heavy: ' + ', '.join(heavy) if heavy else ''}")
+        for module, (self_us, _) in sorted(profile.items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"    {self_us / 1000:8.1f} ms  {module}")
+
+        if heavy and not heavy_allowed:
+            failures.append(f"{name} imports {', '.join(heavy)} at load time")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Check that phase timing costs next to nothing, whether it is off or collecting a run.
+
+A disabled phase must stay under 1 µs, and timing every phase of a 10k-row
+sheet parse must add under 5% to it. Run from the repository root:
+
+    python benchmarks/bench_metrics_overhead.py
+"""
+import sys
+import time
+
+from bench_update_parse import plan_rows
+import perfMetrics
+import planUpdate
+
+DISABLED_BUDGET_SECONDS = 1e-6
+RUN_OVERHEAD_BUDGET = 0.05
+
+def per_call(function, calls=100000, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            with function("phase"):
+                pass
+        elapsed = (time.perf_counter() - start) / calls
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def best_of(function, repeat=7):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    failed = False
+    assert not perfMetrics.METRICS_ENABLED, "unset FSDR_METRICS to measure the disabled path"
+
+    disabled = per_call(perfMetrics.phase)
+    with perfMetrics.metrics_run("bench"):
+        in_run = per_call(perfMetrics.phase)
+    print(f"phase() disabled: {disabled * 1e9:.0f} ns, collecting a run: {in_run * 1e9:.0f} ns")
+    if disabled > DISABLED_BUDGET_SECONDS:
+        print(f"FAIL: a disabled phase costs over {DISABLED_BUDGET_SECONDS * 1e9:.0f} ns", file=sys.stderr)
+        failed = True
+
+    rows = list(plan_rows(10000))
+    plain = best_of(lambda: planUpdate.parse_plan_groups(rows))
+
+    def parse_in_run():
+        with perfMetrics.metrics_run("bench"):
+            planUpdate.parse_plan_groups(rows)
+    timed = best_of(parse_in_run)
+    overhead = timed / plain - 1
+    print(f"parse 10k rows: {plain * 1e3:.1f} ms plain, {timed * 1e3:.1f} ms with phase timing ({overhead:+.1%})")
+    if overhead > RUN_OVERHEAD_BUDGET:
+        print(f"FAIL: phase timing adds over {RUN_OVERHEAD_BUDGET:.0%} to a sheet parse", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
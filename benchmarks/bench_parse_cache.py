@@ -0,0 +1,52 @@
+"""Compare parsing a large upload with serving it again from the session's parse cache.
+
+The Update page looks an upload up by the SHA-256 of its bytes on every
+rerun, so a cache hit costs one hash of the upload. Exits with 1 when a hit
+costs over 5% of a parse. Run from the repository root:
+
+    python benchmarks/bench_parse_cache.py [--groups 200] [--steps 50]
+"""
+import argparse
+import sys
+import time
+from io import BytesIO
+
+from plan_generator import make_plan, make_workbook
+import planUpdate
+from planCache import ParseCache, upload_key
+from regionLookup import load_region_map
+
+HIT_BUDGET = 0.05
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--groups', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=50)
+    args = parser.parse_args()
+
+    data = make_workbook([make_plan(args.groups, args.steps, display_name="plan")]).getvalue()
+    region_map = load_region_map()
+    cache = ParseCache()
+
+    def lookup():
+        start = time.perf_counter()
+        parsed, hit = cache.get_or_parse(
+            upload_key(data, 'sheet', 'plan'),
+            lambda: planUpdate.parse_sheet(BytesIO(data), 'plan', region_map=region_map),
+            lambda parsed: planUpdate.estimated_size(parsed.plan_groups, parsed.rows))
+        return time.perf_counter() - start, parsed, hit
+
+    parse_time, parsed, hit = lookup()
+    assert not hit and parsed.error is None, parsed.error
+    hit_time = min(lookup()[0] for _ in range(20))
+    print(f"{len(parsed.rows)} rows, {len(data) / 1024:.0f} KiB upload, "
+          f"about {cache.total_bytes / 2 ** 20:.1f} MiB cached")
+    print(f"first parse {parse_time * 1e3:.1f} ms, cache hit {hit_time * 1e3:.2f} ms "
+          f"({hit_time / parse_time:.2%} of a parse)")
+    if hit_time > parse_time * HIT_BUDGET:
+        print(f"FAIL: a cache hit costs over {HIT_BUDGET:.0%} of a parse", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
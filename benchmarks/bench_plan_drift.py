@@ -0,0 +1,63 @@
+"""Check that comparing two plans scales linearly with their size.
+
+Compares a synthetic primary plan with its standby counterpart at growing
+sizes, with a few steps changed, renamed, moved or removed on the standby side,
+and reports the cost per row. Exits with 1 when the largest plan costs over
+twice as much per row as the smallest. Run from the repository root:
+
+    python benchmarks/bench_plan_drift.py [--steps 50] [--sizes 20 80 320]
+"""
+import argparse
+import sys
+import time
+
+from plan_generator import make_plan
+import planDrift
+import planExport
+
+LINEARITY_BUDGET = 2.0
+
+def standby_plan(groups, steps_per_group):
+    """The counterpart of the primary plan in the standby region, with some drift planted"""
+    plan = make_plan(groups, steps_per_group, plan_id="ocid1.drplan.oc1.iad.synthetic", display_name="Standby plan",
+                     region_code="iad", region="us-ashburn-1")
+    user_defined = [group for group in plan.plan_groups if group.type == "USER_DEFINED" and group.steps]
+    user_defined[0].steps[0].timeout += 60
+    user_defined[1].steps[1].display_name += " (renamed)"
+    user_defined[2].steps.reverse()
+    del user_defined[3].steps[-1]
+    return plan
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 80, 320], help='groups per plan')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    per_row = []
+    print(f"{'groups':>7} {'rows':>8} {'drift':>6} {'best (ms)':>10} {'us/row':>7}")
+    for groups in args.sizes:
+        left = planExport.plan_to_dataframe(make_plan(groups, args.steps))
+        right = planExport.plan_to_dataframe(standby_plan(groups, args.steps))
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            drift = planDrift.compare_plans(left, right)
+            best = min(best, time.perf_counter() - start)
+        changes = sorted({row['Change'] for row in drift})
+        assert changes == ['differs', 'only in left', 'renamed', 'reordered'], changes
+        rows = len(left) + len(right)
+        per_row.append(best / rows)
+        print(f"{groups:>7} {rows:>8} {len(drift):>6} {best * 1e3:10.1f} {best / rows * 1e6:7.2f}")
+
+    growth = per_row[-1] / per_row[0]
+    print(f"cost per row grew {growth:.2f}x from the smallest to the largest plan")
+    if growth > LINEARITY_BUDGET:
+        print(f"FAIL: the cost per row grew over {LINEARITY_BUDGET:.0f}x, the comparison is not linear",
+              file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Back up synthetic plans repeatedly and check that only changed content is stored.
+
+Every run backs up all plans through the fake client; between runs a few plans
+get a new timeout, and one is rolled back to content it had before. Exits with
+1 when an unchanged plan adds a version, a changed plan does not, or the
+history holds more objects than distinct plan contents. Run from the
+repository root:
+
+    python benchmarks/bench_plan_history.py [--plans 50] [--runs 5] [--changed 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import bench_update_parse  # puts the repository root on sys.path
+from fake_client import FakeDisasterRecoveryClient, use_fake_client
+from planHistory import BackupTarget, PlanHistory, back_up
+from plan_generator import make_plan
+
+def stored_bytes(directory):
+    objects = [os.path.join(root, name) for root, _, names in os.walk(os.path.join(directory, 'objects'))
+               for name in names]
+    return len(objects), sum(os.path.getsize(path) for path in objects)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--changed', type=int, default=3, help='plans edited between runs')
+    args = parser.parse_args()
+    plans = [make_plan(10, 10, plan_id=f"ocid1.drplan.oc1.phx.p{index}", display_name=f"Plan {index}")
+             for index in range(args.plans)]
+    use_fake_client(FakeDisasterRecoveryClient(plans))
+    target = BackupTarget('DEFAULT', [plan.id for plan in plans], [])
+    failures = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = PlanHistory(directory)
+        print(f"{'run':>4} {'changed':>8} {'new versions':>13} {'objects':>8} {'stored (KB)':>12} {'seconds':>8}")
+        original_timeout = plans[0].plan_groups[0].steps[0].timeout
+        for run in range(args.runs):
+            edited = set()
+            if run:
+                for plan in plans[(run - 1) * args.changed:run * args.changed]:
+                    plan.plan_groups[0].steps[0].timeout += 60
+                    edited.add(plan.id)
+                if run == args.runs - 1:
+                    # Roll the first plan back: a new version, but no new object
+                    plans[0].plan_groups[0].steps[0].timeout = original_timeout
+                    edited.add(plans[0].id)
+            start = time.perf_counter()
+            results, failed = back_up([target], history, {}, max_workers=8)
+            elapsed = time.perf_counter() - start
+            new_versions = {row['DR Plan OCID'] for row in results if row['History'] != 'unchanged'}
+            objects, size = stored_bytes(directory)
+            print(f"{run + 1:>4} {len(edited):>8} {len(new_versions):>13} {objects:>8} {size / 1024:12.1f} "
+                  f"{elapsed:8.2f}")
+            expected = edited if run else {plan.id for plan in plans}
+            if failed or new_versions != expected:
+                failures.append(f"run {run + 1} added versions for {len(new_versions)} plans, "
+                                f"expected {len(expected)}")
+        versions = sum(plan['Versions'] for plan in history.plans())
+        objects, _ = stored_bytes(directory)
+        print(f"{versions} versions stored in {objects} objects")
+        if objects != versions - 1:
+            failures.append(f"{objects} objects for {versions} versions, one of them a rollback")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
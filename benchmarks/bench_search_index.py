@@ -0,0 +1,83 @@
+"""Benchmark the cross-plan search index: full and incremental indexing, and query latency.
+
+Indexes synthetic plans into a throwaway database, reindexes them with
+nothing and then one plan changed, and times a set of incident-style queries.
+Exits with 1 when the slowest query takes over the latency budget. Run from
+the repository root:
+
+    python benchmarks/bench_search_index.py [--plans 40] [--groups 20] [--steps 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from plan_generator import make_plans
+import planExport
+from planCache import PlanSnapshot
+from planIndex import PlanSearchIndex
+
+QUERY_BUDGET_SECONDS = 0.05
+QUERIES = [
+    'step_7.sh',
+    'script:/opt/dr/step_3.sh',
+    'instance:ocid1.instance.oc1.phx.i0s4',
+    'function:ocid1.fnfunc.oc1.phx.f2',
+    'failover plan:"Plan 3"',
+    'Group 12 RUN_OBJECTSTORE_SCRIPT',
+]
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=40)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20, help='runs of every query')
+    args = parser.parse_args()
+
+    plans = make_plans(args.plans, args.groups, args.steps)
+    snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                 for plan in plans]
+    rows = sum(len(snapshot.dataframe) for snapshot in snapshots)
+
+    with tempfile.TemporaryDirectory() as directory:
+        search_index = PlanSearchIndex(os.path.join(directory, 'index.sqlite3'))
+        full, _ = timed(lambda: search_index.index_snapshots(snapshots))
+        unchanged, indexed = timed(lambda: search_index.index_snapshots(snapshots))
+        assert all(row['Index'] == 'unchanged' for row in indexed), indexed
+
+        plans[0].plan_groups[0].display_name = 'Renamed group'
+        snapshots[0] = snapshots[0]._replace(dataframe=planExport.plan_to_dataframe(plans[0]))
+        one_changed, indexed = timed(lambda: search_index.index_snapshots(snapshots))
+        assert [row['Index'] for row in indexed].count('indexed') == 1, indexed
+        assert search_index.search('plan:"Plan 0" Renamed'), "the changed plan was not reindexed"
+
+        print(f"{rows} rows in {len(plans)} plans, {os.path.getsize(search_index.path) / 1024:.0f} KiB on disk")
+        print(f"index all plans {full:.3f} s, reindex unchanged {unchanged:.3f} s, "
+              f"reindex with one plan changed {one_changed:.3f} s")
+
+        slowest = 0.0
+        print(f"{'query':<40} {'matches':>8} {'median (ms)':>12} {'max (ms)':>9}")
+        for query in QUERIES:
+            times = []
+            for _ in range(args.repeat):
+                elapsed, results = timed(lambda: search_index.search(query))
+                times.append(elapsed)
+            slowest = max(slowest, statistics.median(times))
+            print(f"{query:<40} {len(results):>8} {statistics.median(times) * 1e3:12.2f} {max(times) * 1e3:9.2f}")
+
+    if slowest > QUERY_BUDGET_SECONDS:
+        print(f"FAIL: a query took {slowest * 1e3:.0f} ms, over the {QUERY_BUDGET_SECONDS * 1e3:.0f} ms budget",
+              file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Scaling benchmark for the indexes of the update engine's PlanBuilder.
+
+ScanningPlanBuilder swaps PlanBuilder's group and step indexes for the linear
+scans the row builder functions used before, so both run the same row logic.
+Run from the repository root:
+
+    python benchmarks/bench_update_builder.py
+"""
+import time
+
+import bench_update_parse  # puts the repository root on sys.path
+import planUpdate
+from plan_generator import make_sheet_rows
+
+
+class ScanningGroupsByName:
+    """Find a group by display name by scanning every group, like the old free functions"""
+
+    def __init__(self, plan_groups):
+        self.plan_groups = plan_groups
+
+    def get(self, display_name):
+        for group in self.plan_groups.values():
+            if group.display_name == display_name:
+                return group
+        return None
+
+    def setdefault(self, display_name, group):
+        return group
+
+    def __delitem__(self, display_name):
+        pass
+
+class ScanningSteps:
+    """Membership tests that compare against every step of the group"""
+
+    def __init__(self, steps, key):
+        self.steps = steps
+        self.key = key
+
+    def __contains__(self, value):
+        return any(self.key(step) == value for step in self.steps)
+
+    def add(self, value):
+        pass
+
+class ScanningPlanBuilder(planUpdate.PlanBuilder):
+    def __init__(self):
+        super().__init__()
+        self._groups_by_name = ScanningGroupsByName(self.plan_groups)
+
+    def _add_group(self, key, group):
+        self.plan_groups[key] = group
+        if group.steps is not None:
+            group.step_names = ScanningSteps(group.steps, lambda step: step.display_name)
+            group.step_set = ScanningSteps(group.steps, lambda step: step)
+
+def build(builder_class, rows):
+    builder = builder_class()
+    start = time.perf_counter()
+    for row in rows:
+        builder.add_row(row)
+    return time.perf_counter() - start, builder.groups()
+
+def main():
+    print(f"{'groups x steps':>15} {'rows':>6} {'scanning (s)':>13} {'indexed (s)':>12} {'indexed us/row':>15}")
+    for groups, steps in ((40, 25), (40, 100), (40, 250), (8, 1000), (400, 25)):
+        rows = make_sheet_rows(groups, steps, new_groups=groups // 8)
+        scanning_time, scanning = build(ScanningPlanBuilder, rows)
+        indexed_time, indexed = build(planUpdate.PlanBuilder, rows)
+        assert scanning == indexed, "indexed builder produced different plan groups"
+        print(f"{f'{groups} x {steps}':>15} {len(rows):>6} {scanning_time:13.3f} {indexed_time:12.3f} "
+              f"{indexed_time / len(rows) * 1e6:15.1f}")
+
+if __name__ == "__main__":
+    main()
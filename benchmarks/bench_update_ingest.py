@@ -0,0 +1,89 @@
+"""Compare full-load and streaming read-only ingestion of update workbooks.
+
+Each measurement runs in a fresh interpreter so peak RSS is attributable to
+one ingestion path. Run from the repository root:
+
+    python benchmarks/bench_update_ingest.py
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import oci
+import openpyxl
+
+from bench_update_parse import build_workbook
+import planUpdate
+
+def full_load_rows(sheet):
+    """The previous reader: every merged range resolved into a cell map, then every row filled from it"""
+    merged_map = {}
+    for merged_cell_range in sheet.merged_cells.ranges:
+        anchor_value = sheet.cell(row=merged_cell_range.min_row, column=merged_cell_range.min_col).value
+        for row, col in ((row, col) for row in range(merged_cell_range.min_row, merged_cell_range.max_row + 1)
+                         for col in range(merged_cell_range.min_col, merged_cell_range.max_col + 1)):
+            merged_map[(row, col)] = anchor_value
+    for row_index, row in enumerate(sheet.iter_rows(min_row=2, max_col=sheet.max_column, values_only=True), start=2):
+        yield [merged_map.get((row_index, col), value) for col, value in enumerate(row, start=1)]
+
+def ingest(mode, path, sheet_name):
+    with open(path, 'rb') as excel_file:
+        start = time.perf_counter()
+        if mode == "full":
+            # The previous path: two copies of the upload plus the full cell graph
+            workbook = openpyxl.load_workbook(BytesIO(excel_file.read()))
+            plan_groups = planUpdate.parse_plan_groups(full_load_rows(workbook[sheet_name]))
+        else:
+            plan_groups = planUpdate.parse_plan_groups(planUpdate.load_sheet_rows(excel_file, sheet_name))
+        elapsed = time.perf_counter() - start
+    return plan_groups, elapsed
+
+def peak_rss_mib():
+    # VmHWM is per address space, unlike ru_maxrss which survives exec from the parent
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def child(mode, path):
+    _, elapsed = ingest(mode, path, "plan")
+    print(f"{elapsed} {peak_rss_mib()}")
+
+def measure(mode, path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, path],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>6} {'mode':>10} {'parse (s)':>10} {'peak RSS (MiB)':>15}")
+        for rows in (1000, 10000):
+            path = os.path.join(tmp, f"plan-{rows}.xlsx")
+            build_workbook(rows).parent.save(path)
+
+            full_groups, _ = ingest("full", path, "plan")
+            streaming_groups, _ = ingest("streaming", path, "plan")
+            assert oci.util.to_dict(full_groups) == oci.util.to_dict(streaming_groups), \
+                "streaming ingestion produced different plan groups"
+
+            for mode in ("full", "streaming"):
+                elapsed, peak_rss = measure(mode, path)
+                print(f"{rows:>6} {mode:>10} {elapsed:10.3f} {peak_rss:15.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,55 @@
+"""Time the update engine's table-driven PlanBuilder: reading rows, then assembling the payload.
+
+Rows are kept as plain records and the SDK models are only created once, by
+groups(); tests/test_plan_update.py checks the payload against a golden copy.
+Run from the repository root:
+
+    python benchmarks/bench_update_models.py [--repeat 5]
+"""
+import argparse
+import sys
+import time
+
+from bench_update_parse import plan_rows
+from plan_generator import make_sheet_rows
+import planUpdate
+
+def duplicate_rows(rows):
+    """Every row twice, so the builder has steps to drop"""
+    return [row for row in rows for _ in range(2)]
+
+SHEETS = {
+    'existing, new, built-in and pause': lambda: list(plan_rows(10000)),
+    'exported plan with new groups': lambda: make_sheet_rows(40, 25, new_groups=5),
+    'duplicate rows': lambda: duplicate_rows(list(plan_rows(2000))),
+}
+
+def build(rows, repeat):
+    """Best times of repeat runs for reading the rows and for assembling the payload"""
+    best_rows = best_payload = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder = planUpdate.PlanBuilder()
+        for row in rows:
+            builder.add_row(row)
+        read = time.perf_counter()
+        builder.groups()
+        done = time.perf_counter()
+        best_rows = read - start if best_rows is None else min(best_rows, read - start)
+        best_payload = done - read if best_payload is None else min(best_payload, done - read)
+    return best_rows, best_payload
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'sheet':<36} {'rows':>6} {'rows (ms)':>10} {'payload (ms)':>13} {'us/row':>7}")
+    for name, make_rows in SHEETS.items():
+        rows = make_rows()
+        rows_time, payload_time = build(rows, args.repeat)
+        print(f"{name:<36} {len(rows):>6} {rows_time * 1e3:10.1f} {payload_time * 1e3:13.1f} "
+              f"{(rows_time + payload_time) / len(rows) * 1e6:7.1f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Benchmark the update engine's sheet reader on synthetic merged-cell workbooks.
+
+Run from the repository root:
+
+    python benchmarks/bench_update_parse.py
+"""
+import os
+import sys
+import time
+from io import BytesIO
+
+import openpyxl
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import planUpdate
+
+HEADER = [
+    'display_name', 'id', 'steps.display_name', 'steps.error_mode', 'steps.id', 'steps.is_enabled',
+    'steps.timeout', 'steps.type', 'steps.user_defined_step.step_type',
+    'steps.user_defined_step.run_as_user', 'steps.user_defined_step.run_on_instance_id',
+    'steps.user_defined_step.function_id', 'steps.user_defined_step.function_region',
+    'steps.user_defined_step.request_body', 'steps.user_defined_step.object_storage_script_location.bucket',
+    'steps.user_defined_step.object_storage_script_location.namespace',
+    'steps.user_defined_step.object_storage_script_location.object',
+    'steps.user_defined_step.run_on_instance_region', 'steps.user_defined_step.script_command', 'type'
+]
+
+def plan_rows(rows, steps_per_group=10):
+    """Generate export-shaped rows mixing existing, new, built-in and pause groups"""
+    for index in range(rows):
+        group = index // steps_per_group
+        kind = group % 4
+        if kind == 0:
+            yield [
+                f"group-{group}", f"sgid1.group..{group}", f"step-{index}", "STOP_ON_ERROR",
+                f"sgid1.step..{index}", True, 3600, "USER_DEFINED", "RUN_LOCAL_SCRIPT", "opc",
+                f"ocid1.instance.oc1.phx.{index}", None, None, None, None, None, None, "us-phoenix-1",
+                "/bin/true", "USER_DEFINED"
+            ]
+        elif kind == 1:
+            yield [
+                f"new-group-{group}", None, f"step-{index}", "CONTINUE_ON_ERROR", None, True, 600,
+                "USER_DEFINED", "RUN_OBJECTSTORE_SCRIPT", None, f"ocid1.instance.oc1.phx.{index}", None, None,
+                None, "scripts", "tenancy-ns", f"run-{index}.sh", "us-phoenix-1", None, "USER_DEFINED"
+            ]
+        elif kind == 2:
+            yield [
+                f"builtin-{group}", f"sgid1.group..{group}", f"builtin-step-{index}", "STOP_ON_ERROR",
+                f"sgid1.step..{index}", True, 1800, "COMPUTE_INSTANCE_START", None, None, None,
+                None, None, None, None, None, None, None, None, "BUILT_IN"
+            ]
+        else:
+            yield [
+                f"pause-{group}", f"sgid1.group..{group}", None, None, None, None, None, None,
+                None, None, None, None, None, None, None, None, None, None, None, "USER_DEFINED_PAUSE"
+            ]
+
+def merge_runs(sheet, col):
+    """Merge runs of equal values in a column, as the export does for columns A/B"""
+    values = [row[0] for row in sheet.iter_rows(min_row=2, min_col=col, max_col=col, values_only=True)]
+    start = 0
+    for index in range(1, len(values) + 1):
+        if index == len(values) or values[index] != values[start]:
+            if index - 1 > start:
+                sheet.merge_cells(start_row=start + 2, start_column=col, end_row=index + 1, end_column=col)
+            start = index
+
+def build_workbook(rows, steps_per_group=10):
+    """Build an export-shaped sheet with group name/id merged across columns A/B"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "plan"
+    sheet.append(HEADER)
+    for row in plan_rows(rows, steps_per_group):
+        sheet.append(row)
+    merge_runs(sheet, 1)
+    merge_runs(sheet, 2)
+    return sheet
+
+def legacy_rows(sheet):
+    """The previous reader: a linear scan of every merged range for every cell"""
+    def get_merged_cell_value(row, col):
+        cell = sheet.cell(row=row, column=col)
+        for merged_cell_range in sheet.merged_cells.ranges:
+            if cell.coordinate in merged_cell_range:
+                return sheet.cell(row=merged_cell_range.min_row, column=merged_cell_range.min_col).value
+        return cell.value
+
+    for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
+        yield [get_merged_cell_value(row[0].row, col) for col in range(1, sheet.max_column + 1)]
+
+def timed(func):
+    start = time.perf_counter()
+    result = list(func())
+    return time.perf_counter() - start, result
+
+def saved(sheet):
+    output = BytesIO()
+    sheet.parent.save(output)
+    return output.getvalue()
+
+def main():
+    print(f"{'rows':>6} {'legacy (s)':>12} {'streaming (s)':>14} {'streaming us/row':>17}")
+    for rows in (250, 500, 1000, 2500, 5000):
+        sheet = build_workbook(rows)
+        data = saved(sheet)
+        indexed_time, indexed = timed(lambda: planUpdate.load_sheet_rows(BytesIO(data), "plan"))
+        # The legacy reader is quadratic, so only run it where it finishes in reasonable time
+        if rows <= 500:
+            legacy_time, legacy = timed(lambda: legacy_rows(sheet))
+            assert legacy == indexed, "streaming reader diverged from the legacy reader"
+            legacy_text = f"{legacy_time:12.3f}"
+        else:
+            legacy_text = f"{'skipped':>12}"
+        print(f"{rows:>6} {legacy_text} {indexed_time:14.3f} {indexed_time / rows * 1e6:17.1f}")
+
+if __name__ == "__main__":
+    main()
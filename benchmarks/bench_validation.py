@@ -0,0 +1,59 @@
+"""Time pre-flight validation of update sheets and check it stays under 100 ms for 10k rows.
+
+Run from the repository root:
+
+    python benchmarks/bench_validation.py
+"""
+import sys
+import time
+
+from bench_update_parse import plan_rows
+import planValidation
+from regionLookup import load_region_map
+
+BUDGET_SECONDS = 0.1
+
+def best_of(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def broken_rows(rows):
+    """Break one rule per group of ten rows so every rule fires"""
+    rows = [list(row) for row in rows]
+    breakers = [
+        lambda row: row.__setitem__(8, 'RUN_SCRIPT'),
+        lambda row: row.__setitem__(10, None),
+        lambda row: row.__setitem__(6, 'soon'),
+        lambda row: row.__setitem__(5, 'yes'),
+        lambda row: row.__setitem__(3, 'STOP'),
+        lambda row: row.__setitem__(10, 'i-123'),
+        lambda row: row.__setitem__(19, 'BUILTIN'),
+        lambda row: row.__setitem__(17, 'eu-frankfurt-1'),
+    ]
+    for index in range(0, len(rows), 10):
+        breakers[(index // 10) % len(breakers)](rows[index])
+    return rows
+
+def main():
+    failed = False
+    region_map = load_region_map()
+    print(f"{'rows':>6} {'valid (ms)':>11} {'broken (ms)':>12} {'problems':>9}")
+    for count in (1000, 5000, 10000):
+        rows = list(plan_rows(count))
+        valid_time, valid_errors = best_of(lambda: planValidation.validate_plan_rows(rows, region_map=region_map))
+        assert not valid_errors, valid_errors[:3]
+        broken = broken_rows(rows)
+        broken_time, errors = best_of(lambda: planValidation.validate_plan_rows(broken, region_map=region_map))
+        print(f"{count:>6} {valid_time * 1e3:11.1f} {broken_time * 1e3:12.1f} {len(errors):>9}")
+        if count == 10000 and max(valid_time, broken_time) > BUDGET_SECONDS:
+            print(f"FAIL: validating 10k rows took over {BUDGET_SECONDS * 1e3:.0f} ms", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Follow many concurrent plan updates through WorkRequestTracker against the fake client.
+
+track() must return at once, and the work requests must finish in roughly
+the time of the slowest one rather than the sum of all of them. Run from
+the repository root:
+
+    python benchmarks/bench_work_requests.py [--plans 20]
+"""
+import argparse
+import time
+
+import bench_update_parse  # puts the repository root on sys.path
+import planExport
+import planUpdate
+from fake_client import FakeDisasterRecoveryClient, use_fake_client
+from plan_generator import make_plan
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--plans', type=int, default=20)
+    parser.add_argument('--polls', type=int, default=5, help='polls until each work request finishes')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per fake API call')
+    args = parser.parse_args()
+
+    plans = [make_plan(4, 5, plan_id=f"ocid1.drplan.oc1.phx.p{index}", display_name=f"Plan {index}")
+             for index in range(args.plans)]
+    failing = {plans[0].id}
+    client = FakeDisasterRecoveryClient(plans, latency_seconds=args.latency, work_request_polls=args.polls,
+                                        fail_plan_ids=failing)
+    use_fake_client(client)
+
+    # Change one timeout per plan so every plan needs an update
+    parsed_plans = []
+    for plan in plans:
+        rows = planExport.plan_to_dataframe(plan).astype(object).where(lambda frame: frame.notna(), None)
+        plan_groups = planUpdate.parse_plan_groups(rows.values.tolist())
+        plan_groups[0].steps[0].timeout += 1
+        parsed_plans.append((plan.display_name, plan.id, plan_groups, None))
+
+    tracker = planUpdate.WorkRequestTracker(max_workers=args.plans, initial_interval_seconds=args.latency,
+                                            max_interval_seconds=args.latency * 4)
+    start = time.perf_counter()
+    results = planUpdate.update_plans('DEFAULT', parsed_plans, {}, max_workers=8, tracker=tracker)
+    sent = time.perf_counter() - start
+    assert all(result['Status'] == 'ACCEPTED' for result in results), results
+    print(f"sent {len(results)} updates in {sent:.2f} s, their work requests are followed in the background")
+
+    while tracker.active():
+        time.sleep(args.latency)
+    tracked = time.perf_counter() - start - sent
+
+    progress = tracker.progress()
+    statuses = {entry['DR Plan OCID']: entry['Status'] for entry in progress}
+    assert all(statuses[plan.id] == ('FAILED' if plan.id in failing else 'SUCCEEDED') for plan in plans), statuses
+    assert all(entry['Percent Complete'] == 100.0 for entry in progress)
+    assert all(bool(entry['Errors']) == (entry['DR Plan OCID'] in failing) for entry in progress)
+
+    # Each work request alone needs polls calls plus the backoff sleeps between them
+    single = sum(min(args.latency * 2 ** poll, args.latency * 4) for poll in range(args.polls - 1)) \
+        + args.polls * args.latency
+    print(f"tracked {len(progress)} work requests in {tracked:.2f} s "
+          f"(one alone ~{single:.2f} s, one after another ~{single * len(progress):.2f} s)")
+    print(f"API calls: {dict(client.calls)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""In-memory stand-in for oci.disaster_recovery.DisasterRecoveryClient.
+
+It serves DrPlans from a dict and simulates the asynchronous work requests
+update_dr_plan starts, so the engine can be exercised without a tenancy.
+"""
+import collections
+import datetime
+import itertools
+import threading
+import time
+from types import SimpleNamespace
+
+import oci
+
+models = oci.disaster_recovery.models
+
+def response(data, headers=None):
+    return SimpleNamespace(data=data, headers=headers or {}, status=200)
+
+class FakeDisasterRecoveryClient:
+    """Serve plans from memory; a work request succeeds after work_request_polls polls unless its plan is in fail_plan_ids"""
+
+    def __init__(self, plans=(), latency_seconds=0.0, work_request_polls=3, fail_plan_ids=()):
+        self.plans = {plan.id: plan for plan in plans}
+        self.latency_seconds = latency_seconds
+        self.work_request_polls = work_request_polls
+        self.fail_plan_ids = set(fail_plan_ids)
+        self.calls = collections.Counter()
+        self.updates = []
+        self._work_requests = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _plan(self, dr_plan_id):
+        plan = self.plans.get(dr_plan_id)
+        if plan is None:
+            raise oci.exceptions.ServiceError(404, "NotAuthorizedOrNotFound", {}, f"DR plan {dr_plan_id} not found")
+        return plan
+
+    def get_dr_plan(self, dr_plan_id, **kwargs):
+        self._call('get_dr_plan')
+        plan = self._plan(dr_plan_id)
+        return response(plan, {'etag': f"{plan.id}-{plan.time_updated}"})
+
+    def list_dr_plans(self, dr_protection_group_id, dr_plan_id=None, **kwargs):
+        self._call('list_dr_plans')
+        summaries = [
+            models.DrPlanSummary(id=plan.id, display_name=plan.display_name, time_updated=plan.time_updated,
+                                 dr_protection_group_id=plan.dr_protection_group_id)
+            for plan in self.plans.values()
+            if plan.dr_protection_group_id == dr_protection_group_id and dr_plan_id in (None, plan.id)
+        ]
+        return response(models.DrPlanCollection(items=summaries))
+
+    def update_dr_plan(self, update_dr_plan_details, dr_plan_id, **kwargs):
+        self._call('update_dr_plan')
+        plan = self._plan(dr_plan_id)
+        work_request_id = f"ocid1.drworkrequest.oc1.phx.wr{next(self._ids)}"
+        with self._lock:
+            self.updates.append((dr_plan_id, update_dr_plan_details))
+            self._work_requests[work_request_id] = {'plan_id': dr_plan_id, 'polls': 0}
+        plan.time_updated = datetime.datetime.now(datetime.timezone.utc)
+        return response(None, {'opc-work-request-id': work_request_id})
+
+    def get_work_request(self, work_request_id, **kwargs):
+        self._call('get_work_request')
+        with self._lock:
+            work_request = self._work_requests[work_request_id]
+            work_request['polls'] += 1
+            polls = work_request['polls']
+        if polls >= self.work_request_polls:
+            status = 'FAILED' if work_request['plan_id'] in self.fail_plan_ids else 'SUCCEEDED'
+            percent_complete = 100.0
+        else:
+            status = 'IN_PROGRESS'
+            percent_complete = 100.0 * polls / self.work_request_polls
+        return response(models.WorkRequest(id=work_request_id, status=status, percent_complete=percent_complete,
+                                           operation_type='UPDATE_DR_PLAN'))
+
+    def list_work_request_errors(self, work_request_id, **kwargs):
+        self._call('list_work_request_errors')
+        failed = self._work_requests[work_request_id]['plan_id'] in self.fail_plan_ids
+        errors = [models.WorkRequestError(code='InvalidParameter', message="Step run_on_instance_id was not found")]
+        return response(models.WorkRequestErrorCollection(items=errors if failed else []))
+
+def use_fake_client(client):
+    """Point the export and update engines at client instead of building real OCI clients"""
+    import planExport
+    import planUpdate
+
+    fake_get_dr_client = lambda *args, **kwargs: client
+    planExport.get_dr_client = fake_get_dr_client
+    planUpdate.get_dr_client = fake_get_dr_client
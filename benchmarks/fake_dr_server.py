@@ -0,0 +1,137 @@
+"""Local HTTP server speaking enough of the Disaster Recovery API for a real SDK client to call it.
+
+It serves get_dr_plan and update_dr_plan for DrPlans held in memory and
+injects the failures a tenancy produces under load: 429s with Retry-After
+above a request rate, and 503s while an outage is switched on. Every request
+is recorded, so callers can check what reached the server and when.
+"""
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import oci
+import requests
+
+# Passes the SDK's config checks; NoSigner means the key is never read
+FAKE_CONFIG = {'user': 'ocid1.user.oc1..fake', 'tenancy': 'ocid1.tenancy.oc1..fake', 'key_file': 'fake.pem',
+               'fingerprint': ':'.join(['00'] * 16), 'region': 'us-phoenix-1'}
+
+def to_json(value):
+    """An SDK model as the JSON the service sends, with camelCase keys"""
+    if hasattr(value, 'attribute_map'):
+        return {value.attribute_map[name]: to_json(getattr(value, name)) for name in value.swagger_types
+                if getattr(value, name) is not None}
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+class NoSigner(requests.auth.AuthBase):
+    """The fake server checks no signatures"""
+
+    def __call__(self, request):
+        return request
+
+class FakeDisasterRecoveryServer:
+    """Serve plans over HTTP on localhost; above rate_limit requests per second, answer 429 with Retry-After"""
+
+    def __init__(self, plans=(), rate_limit=None, retry_after=1, latency_seconds=0.0):
+        self.plans = {plan.id: plan for plan in plans}
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.latency_seconds = latency_seconds
+        self.outage = False
+        # (time, method, plan OCID, status) per request
+        self.requests = []
+        self._window = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def client(self, retry_strategy):
+        """A real DisasterRecoveryClient pointed at this server"""
+        return oci.disaster_recovery.DisasterRecoveryClient(
+            FAKE_CONFIG, signer=NoSigner(), service_endpoint=self.endpoint, retry_strategy=retry_strategy,
+            circuit_breaker_strategy=oci.circuit_breaker.NoCircuitBreakerStrategy())
+
+    def statuses(self):
+        with self._lock:
+            return [status for _, _, _, status in self.requests]
+
+    def _admit(self):
+        """The status to answer with: 503 in an outage, 429 over the rate limit, else 200"""
+        now = time.monotonic()
+        with self._lock:
+            if self.outage:
+                return now, 503
+            if self.rate_limit:
+                self._window = [seen for seen in self._window if now - seen < 1.0]
+                if len(self._window) >= self.rate_limit:
+                    return now, 429
+                self._window.append(now)
+            return now, 200
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('opc-request-id', 'fake')
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _serve(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                plan_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+                now, status = server._admit()
+                if status == 200 and plan_id not in server.plans:
+                    status = 404
+                with server._lock:
+                    server.requests.append((now, method, plan_id, status))
+                if server.latency_seconds:
+                    time.sleep(server.latency_seconds)
+                if status == 429:
+                    return self._reply(429, {'code': 'TooManyRequests', 'message': 'Too many requests'},
+                                       {'Retry-After': str(server.retry_after)})
+                if status == 503:
+                    return self._reply(503, {'code': 'ServiceUnavailable', 'message': 'Service unavailable'})
+                if status == 404:
+                    return self._reply(404, {'code': 'NotAuthorizedOrNotFound', 'message': 'Not found'})
+                if method == 'PUT':
+                    return self._reply(202, {}, {'opc-work-request-id': f"ocid1.drworkrequest.oc1.phx.{plan_id}"})
+                return self._reply(200, to_json(server.plans[plan_id]), {'etag': 'fake'})
+
+            def do_GET(self):
+                self._serve('GET')
+
+            def do_PUT(self):
+                self._serve('PUT')
+
+        return Handler
@@ -0,0 +1,97 @@
+"""Synthetic DR plans shaped like the ones the export receives from get_dr_plan, and their workbooks."""
+import datetime
+import os
+import sys
+from io import BytesIO
+
+import oci
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+models = oci.disaster_recovery.models
+
+def make_step(group_index, step_index, kind, region_code="phx", region="us-phoenix-1"):
+    step_id = f"sgid1.step..g{group_index}s{step_index}"
+    if kind == "BUILT_IN":
+        return models.DrPlanStep(
+            id=step_id, display_name=f"Start instance {group_index}-{step_index}", error_mode="STOP_ON_ERROR",
+            is_enabled=True, timeout=3600, type="COMPUTE_INSTANCE_START"
+        )
+
+    instance_id = f"ocid1.instance.oc1.{region_code}.i{group_index}s{step_index}"
+    variant = step_index % 3
+    if variant == 0:
+        user_defined_step = models.RunLocalScriptUserDefinedStep(
+            step_type="RUN_LOCAL_SCRIPT", run_on_instance_id=instance_id, run_on_instance_region=region,
+            run_as_user="opc", script_command=f"/opt/dr/step_{step_index}.sh"
+        )
+    elif variant == 1:
+        user_defined_step = models.RunObjectStoreScriptUserDefinedStep(
+            step_type="RUN_OBJECTSTORE_SCRIPT", run_on_instance_id=instance_id, run_on_instance_region=region,
+            object_storage_script_location=models.ObjectStorageScriptLocation(
+                bucket="dr-scripts", namespace="tenancy-ns", object=f"step_{step_index}.sh")
+        )
+    else:
+        user_defined_step = models.InvokeFunctionStep(
+            step_type="INVOKE_FUNCTION", function_id=f"ocid1.fnfunc.oc1.{region_code}.f{group_index}",
+            function_region=region, request_body='{"action": "failover"}'
+        )
+    return models.DrPlanStep(
+        id=step_id, display_name=f"Step {group_index}-{step_index}",
+        error_mode="CONTINUE_ON_ERROR" if step_index % 2 else "STOP_ON_ERROR",
+        is_enabled=step_index % 5 != 0, timeout=600 + step_index, type="USER_DEFINED",
+        user_defined_step=user_defined_step
+    )
+
+def make_plan(groups=100, steps_per_group=50, plan_id="ocid1.drplan.oc1.phx.synthetic", display_name="Synthetic plan",
+              region_code="phx", region="us-phoenix-1"):
+    """Build a DrPlan cycling through user-defined, built-in and pause groups"""
+    plan_groups = []
+    for group_index in range(groups):
+        group_id = f"sgid1.group..g{group_index}"
+        kind = ("USER_DEFINED", "BUILT_IN", "USER_DEFINED", "USER_DEFINED_PAUSE")[group_index % 4]
+        if kind == "USER_DEFINED_PAUSE":
+            plan_groups.append(models.DrPlanGroup(
+                id=group_id, display_name=f"Pause {group_index}", type=kind, is_pause_enabled=True, steps=[]))
+            continue
+        plan_groups.append(models.DrPlanGroup(
+            id=group_id, display_name=f"Group {group_index}", type=kind, is_pause_enabled=False,
+            steps=[make_step(group_index, step_index, kind, region_code, region) for step_index in range(steps_per_group)]
+        ))
+    # A time_updated lets the snapshot cache tell the plan has not changed, as it does with real plans
+    return models.DrPlan(id=plan_id, display_name=display_name, plan_groups=plan_groups,
+                         time_updated=datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc))
+
+def make_plans(count, groups=20, steps_per_group=20, protection_group_id="ocid1.drprotectiongroup.oc1.phx.synthetic"):
+    """Build count plans of one protection group, with distinct OCIDs and names"""
+    plans = []
+    for index in range(count):
+        plan = make_plan(groups, steps_per_group, plan_id=f"ocid1.drplan.oc1.phx.p{index}", display_name=f"Plan {index}")
+        plan.dr_protection_group_id = protection_group_id
+        plans.append(plan)
+    return plans
+
+def make_workbook(plans):
+    """Export plans the way the tool does: one sheet per plan plus the manifest, returned as an in-memory xlsx"""
+    import planExport
+    from planCache import PlanSnapshot
+
+    snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                 for plan in plans]
+    output = BytesIO()
+    planExport.write_plans_workbook(output, snapshots)
+    output.seek(0)
+    return output
+
+def make_sheet_rows(groups, steps_per_group, new_groups):
+    """Rows as the sheet reader yields them, with some groups not created yet (no ids)"""
+    import planExport
+
+    combined_data = planExport.plan_to_dataframe(make_plan(groups, steps_per_group))
+    new_rows = combined_data[combined_data['type'] == 'USER_DEFINED'].head(new_groups * steps_per_group).copy()
+    new_rows['display_name'] = 'New ' + new_rows['display_name']
+    new_rows['id'] = None
+    new_rows['steps.id'] = None
+    rows = combined_data.astype(object).where(combined_data.notna(), None).values.tolist()
+    return rows + new_rows.astype(object).where(new_rows.notna(), None).values.tolist()
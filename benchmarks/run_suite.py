@@ -0,0 +1,222 @@
+"""Offline benchmark suite for the export and update engines, with a regression gate for CI.
+
+Every case runs against synthetic plans and the in-memory fake client, so no
+tenancy or network is needed. Timings are divided by a fixed pure-Python
+calibration workload, so a baseline saved on one machine can be compared on
+another. The exit status is 1 when a case is more than --threshold slower
+than the baseline. Run from the repository root:
+
+    python benchmarks/run_suite.py                    # compare with benchmarks/baseline.json
+    python benchmarks/run_suite.py --save-baseline    # record a new baseline
+    python benchmarks/run_suite.py --case round_trip --repeat 10
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+import oci
+
+from fake_client import FakeDisasterRecoveryClient, use_fake_client
+from plan_generator import make_plan, make_plans, make_workbook
+import planExport
+import planUpdate
+import planValidation
+from regionLookup import load_region_map
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+MAX_RUNS = 200
+
+# name -> setup function returning the callable that is timed
+CASES = {}
+
+def case(function):
+    CASES[function.__name__] = function
+    return function
+
+@case
+def export_end_to_end(args):
+    """Fetch plans through the fake client, flatten them and write the multi-plan workbook"""
+    plans = make_plans(args.plans, args.groups, args.steps)
+    use_fake_client(FakeDisasterRecoveryClient(plans, latency_seconds=args.latency))
+    region_map = load_region_map()
+    plan_ids = [plan.id for plan in plans]
+
+    def run():
+        results = planExport.fetch_plans('DEFAULT', plan_ids, region_map, max_workers=8)
+        snapshots = [snapshot for _, snapshot, error in results if error is None]
+        assert len(snapshots) == len(plans), [error for _, _, error in results if error is not None]
+        planExport.write_plans_workbook(BytesIO(), snapshots)
+    return run
+
+@case
+def export_flatten(args):
+    """Flatten one large plan into the export layout"""
+    plan = make_plan(args.groups * 5, args.steps)
+    return lambda: planExport.plan_to_dataframe(plan)
+
+@case
+def export_write(args):
+    """Write, merge, style and autofit one large sheet"""
+    combined_data = planExport.plan_to_dataframe(make_plan(args.groups * 5, args.steps))
+    return lambda: planExport.write_single_plan_workbook(BytesIO(), combined_data, "plan")
+
+@case
+def update_parse(args):
+    """Stream one exported sheet's rows, filling merged group cells"""
+    workbook = make_workbook([make_plan(args.groups * 5, args.steps, display_name="plan")]).getvalue()
+    return lambda: list(planUpdate.load_sheet_rows(BytesIO(workbook), "plan"))
+
+@case
+def update_validate(args):
+    """Validate the rows of one large sheet, with the region checks"""
+    workbook = make_workbook([make_plan(args.groups * 5, args.steps, display_name="plan")])
+    rows = list(planUpdate.load_sheet_rows(workbook, "plan"))
+    region_map = load_region_map()
+    return lambda: planValidation.validate_plan_rows(rows, region_map=region_map)
+
+@case
+def update_build_models(args):
+    """Build the UpdateDrPlanGroupDetails models for one large sheet"""
+    workbook = make_workbook([make_plan(args.groups * 5, args.steps, display_name="plan")])
+    rows = list(planUpdate.load_sheet_rows(workbook, "plan"))
+    return lambda: planUpdate.parse_plan_groups(rows, validate=False)
+
+@case
+def round_trip(args):
+    """Export plans, read the workbook back through the manifest and diff it against the plans: nothing may change"""
+    plans = make_plans(args.plans, args.groups, args.steps)
+    client = FakeDisasterRecoveryClient(plans, latency_seconds=args.latency)
+    use_fake_client(client)
+    region_map = load_region_map()
+    plan_ids = [plan.id for plan in plans]
+
+    def run():
+        results = planExport.fetch_plans('DEFAULT', plan_ids, region_map, max_workers=8)
+        output = BytesIO()
+        planExport.write_plans_workbook(output, [snapshot for _, snapshot, _ in results])
+        output.seek(0)
+        parsed_plans = planUpdate.parse_workbook_plans(output, region_map=region_map)
+        results = planUpdate.update_plans('DEFAULT', parsed_plans, region_map, max_workers=8, dry_run=True)
+        assert all(result['Status'] == 'UNCHANGED' for result in results), results
+        assert not client.updates
+    return run
+
+def calibrate(repeat=15):
+    """Time a fixed pure-Python workload, the unit the case timings are expressed in"""
+    def workload():
+        values = {}
+        for index in range(50000):
+            values[f"key-{index % 5000}"] = values.get(f"key-{index % 5000}", 0) + index
+        return sorted(values.items())
+    return best_of(workload, repeat)
+
+def best_of(function, repeat, min_seconds=0.0):
+    """Best time of at least repeat runs, running on until min_seconds have passed so short cases get more samples"""
+    best = None
+    runs = 0
+    deadline = time.perf_counter() + min_seconds
+    while runs < repeat or (time.perf_counter() < deadline and runs < MAX_RUNS):
+        # As timeit does, keep collections of earlier runs' garbage out of the timing
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+        runs += 1
+    return best
+
+def run_case(name, args):
+    """Time one case in this interpreter and print its timing and a calibration as JSON, for the parent run"""
+    run = CASES[name](args)
+    run()  # warm up imports and caches outside the timed runs
+    calibration = calibrate()
+    seconds = best_of(run, args.repeat, args.min_seconds)
+    print(json.dumps({'seconds': seconds, 'calibration': min(calibration, calibrate())}))
+
+def time_case(name, args):
+    """Run one case in a fresh interpreter, so the heap left by earlier cases cannot sway it"""
+    command = [sys.executable, os.path.abspath(__file__), '--run-case', name, '--repeat', str(args.repeat),
+               '--min-seconds', str(args.min_seconds), '--plans', str(args.plans), '--groups', str(args.groups),
+               '--steps', str(args.steps), '--latency', str(args.latency)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='run only this case, may be repeated')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case at least; the best one counts')
+    parser.add_argument('--min-seconds', type=float, default=1.0, help='keep repeating a case for this long')
+    parser.add_argument('--processes', type=int, default=3,
+                        help='fresh interpreters per case; the best one counts (default: 3)')
+    parser.add_argument('--plans', type=int, default=4, help='plans in the multi-plan cases')
+    parser.add_argument('--groups', type=int, default=20, help='plan groups per plan')
+    parser.add_argument('--steps', type=int, default=20, help='steps per plan group')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per fake API call')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file to compare with or save to')
+    parser.add_argument('--save-baseline', action='store_true', help='record these timings as the new baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fail when a case is this much slower than the baseline (default: 0.2)')
+    parser.add_argument('--run-case', choices=sorted(CASES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_case:
+        run_case(args.run_case, args)
+        return 0
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    sizes = {'plans': args.plans, 'groups': args.groups, 'steps': args.steps, 'latency': args.latency}
+    if baseline and baseline.get('sizes') != sizes:
+        print(f"Baseline was recorded with {baseline.get('sizes')}, not {sizes}; not comparing", file=sys.stderr)
+        baseline = None
+
+    timings = {}
+    calibrations = []
+    for name in args.case or CASES:
+        results = [time_case(name, args) for _ in range(args.processes)]
+        timings[name] = min(result['seconds'] for result in results)
+        calibrations += [result['calibration'] for result in results]
+    # The fastest calibration of any case is the least disturbed measure of this machine's speed
+    calibration = min(calibrations)
+
+    print(f"calibration {calibration * 1e3:.1f} ms"
+          + (f" (baseline {baseline['calibration'] * 1e3:.1f} ms)" if baseline else ""))
+    print(f"{'case':<22} {'time (ms)':>10} {'baseline (ms)':>14} {'change':>8}")
+    regressions = []
+    for name, seconds in timings.items():
+        base = baseline['cases'].get(name) if baseline else None
+        if base is None:
+            print(f"{name:<22} {seconds * 1e3:10.1f} {'-':>14} {'-':>8}")
+            continue
+        # Both timings in calibration units, so a faster or slower machine does not count as a change
+        scaled_base = base / baseline['calibration'] * calibration
+        change = seconds / scaled_base - 1
+        print(f"{name:<22} {seconds * 1e3:10.1f} {scaled_base * 1e3:14.1f} {change:+8.1%}")
+        if change > args.threshold:
+            regressions.append(f"{name} is {change:.0%} slower than the baseline")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'calibration': calibration, 'sizes': sizes, 'python': platform.python_version(),
+                       'oci': oci.__version__, 'cases': timings}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved the baseline to {args.baseline}")
+
+    for regression in regressions:
+        print(f"FAIL: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
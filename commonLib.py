@@ -1,14 +1,104 @@
-import re
-import json
-
-def get_region_from_ocid(ocid, region_map):
-    match = re.search(r'oc1\.(.*?)\.', ocid)
-    if match:
-        region_code = match.group(1)
-        return region_map.get(region_code, 'unknown-region')
-    return 'unknown-region'
-
-def load_region_map(region_file):
-    with open(region_file, 'r') as f:
-        region_map = json.load(f)
-    return region_map
\ No newline at end of file
+import os
+import sys
+import time
+import importlib
+import importlib.util
+import logging
+import threading
+# Region resolution lives in regionLookup; re-exported here for the pages' star imports
+from regionLookup import OCID_REGION_PATTERN, REGION_FILE, UNKNOWN_REGION, get_region_from_ocid, load_region_map
+from perfMetrics import metrics_run, phase
+from apiResilience import ResilientRetryStrategy, region_strategy, resilience_status
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SHEET = "Manifest"
+# Workbook whose styled header row, widths and data validations every exported plan sheet starts from
+TEMPLATE_FILE = os.environ.get(
+    "FSDR_EXPORT_TEMPLATE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "oci-fsdr-plan-template.xlsx"))
+# Extension of each columnar export format; Parquet and Arrow IPC need pyarrow, JSON Lines never does
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'jsonl': '.jsonl'}
+
+_dr_clients = {}
+_dr_clients_lock = threading.Lock()
+
+# Seconds each lazily imported module took on its first import in this process
+IMPORT_TIMES = {}
+
+def lazy_import(module_name):
+    """Import a module on first use, recording how long that first import took"""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    with phase("import", module=module_name):
+        module = importlib.import_module(module_name)
+    IMPORT_TIMES[module_name] = time.perf_counter() - start
+    logger.info("Imported %s in %.3f s", module_name, IMPORT_TIMES[module_name])
+    return module
+
+def format_for_file(file_name):
+    """The columnar format a file name's extension stands for, or None for anything else, such as .xlsx"""
+    lower = (file_name or '').lower()
+    for file_format, extension in COLUMNAR_FORMATS.items():
+        if lower.endswith(extension):
+            return file_format
+    return None
+
+def available_formats():
+    """The columnar formats this environment can write, best first; pyarrow is found without importing it"""
+    if importlib.util.find_spec('pyarrow') is None:
+        return ['jsonl']
+    return list(COLUMNAR_FORMATS)
+
+def oci_config_path(config_file=None):
+    """The OCI config file in use: config_file, else the first the SDK finds of ~/.oci/config,
+    $OCI_CONFIG_FILE and ~/.oraclebmc/config"""
+    if config_file:
+        return os.path.expanduser(config_file)
+    default_path = os.path.expanduser("~/.oci/config")
+    if os.path.isfile(default_path):
+        return default_path
+    if os.environ.get("OCI_CONFIG_FILE"):
+        return os.path.expanduser(os.environ["OCI_CONFIG_FILE"])
+    fallback_path = os.path.expanduser("~/.oraclebmc/config")
+    return fallback_path if os.path.isfile(fallback_path) else default_path
+
+def get_dr_client(profile, region, retry_strategy=None, config_file=None):
+    """Return a shared DisasterRecoveryClient per (profile, region), rebuilt when its OCI config file changes
+
+    Unless given another retry strategy, every call goes through the region's shared rate limiter,
+    backoff and circuit breaker.
+    """
+    oci = lazy_import("oci")
+    retry_strategy = retry_strategy or region_strategy(region)
+    config_path = oci_config_path(config_file)
+    config_mtime = os.path.getmtime(config_path) if os.path.exists(config_path) else None
+    key = (profile, region, retry_strategy, config_path)
+
+    with _dr_clients_lock:
+        cached = _dr_clients.get(key)
+        if cached and cached[0] == config_mtime:
+            return cached[1]
+
+        with phase("client_setup", region=region):
+            config = oci.config.from_file(file_location=config_path, profile_name=profile)
+            config['region'] = region
+            signer = oci.signer.Signer.from_config(config)
+            # The region's own breaker replaces the SDK's, which would otherwise trip on the same failures
+            breaker = (oci.circuit_breaker.NoCircuitBreakerStrategy()
+                       if isinstance(retry_strategy, ResilientRetryStrategy) else None)
+            client = oci.disaster_recovery.DisasterRecoveryClient(
+                config=config, retry_strategy=retry_strategy, signer=signer, circuit_breaker_strategy=breaker)
+        _dr_clients[key] = (config_mtime, client)
+        return client
+
+def get_work_request_tracker():
+    """One work request tracker per browser session, shared by the pages that start plan updates
+
+    Only the pages call this, so Streamlit is imported here and the CLI never loads it.
+    """
+    st = lazy_import("streamlit")
+    if 'work_request_tracker' not in st.session_state:
+        st.session_state['work_request_tracker'] = lazy_import("planUpdate").WorkRequestTracker()
+    return st.session_state['work_request_tracker']
@@ -0,0 +1,295 @@
+"""Export and update FSDR plans from the command line, without starting Streamlit.
+
+    python fsdrPlans.py export --plan-id ocid1.drplan.oc1... --output dr_plans_export.xlsx
+    python fsdrPlans.py export --protection-group-id ocid1.drprotectiongroup.oc1... --output nightly.xlsx
+    python fsdrPlans.py update --file dr_plans_export.xlsx --dry-run
+    python fsdrPlans.py export --protection-group-id ocid1.drprotectiongroup.oc1... --output nightly.parquet
+    python fsdrPlans.py update --file nightly.parquet
+    python fsdrPlans.py update --file dr_plan_export.xlsx --plan-id ocid1.drplan.oc1... --sheet "My Plan"
+    python fsdrPlans.py export --protection-group-id ocid1.drprotectiongroup.oc1... --output nightly.xlsx --index
+    python fsdrPlans.py search "failover.sh instance:ocid1.instance.oc1..."
+    python fsdrPlans.py drift --pair ocid1.drplan.oc1.phx... ocid1.drplan.oc1.iad... --output drift.xlsx
+    python fsdrPlans.py backup --config backup.json --every 3600
+    python fsdrPlans.py history --plan-id ocid1.drplan.oc1...
+    python fsdrPlans.py restore --plan-id ocid1.drplan.oc1... --version 3f2a9c1e04b7 --dry-run
+
+The exit status is 0 when every plan was exported, backed up or updated, a search found steps, or every
+compared pair of plans is in sync, 1 otherwise.
+Add --timings to see where the time went, or --metrics for one JSON log line per phase.
+"""
+import argparse
+import logging
+import sys
+
+# The engine modules import oci, pandas and openpyxl, so they load only once a command runs
+from commonLib import (COLUMNAR_FORMATS, MANIFEST_SHEET, REGION_FILE, TEMPLATE_FILE, format_for_file, lazy_import,
+                       load_region_map)
+from perfMetrics import enable_metrics, metrics_run
+from planCache import DEFAULT_CACHE_DIR, PlanSnapshotCache
+from planHistory import DEFAULT_HISTORY_DIR, BackupTarget, PlanHistory, back_up, load_backup_targets, run_backups
+from planIndex import DEFAULT_INDEX_PATH, PlanSearchIndex
+
+SUCCESS_STATUSES = ('SUCCEEDED', 'ACCEPTED', 'UNCHANGED', 'WOULD_UPDATE')
+
+def print_table(rows, file=None):
+    if rows:
+        print(lazy_import("pandas").DataFrame(rows).to_string(index=False), file=file)
+
+def export_command(args):
+    """Export the given plans, and every plan of the given protection groups, to one workbook"""
+    plan_export = lazy_import("planExport")
+    region_map = load_region_map(args.region_file)
+    plan_ids = list(args.plan_id)
+    for protection_group_id in args.protection_group_id:
+        plan_ids += plan_export.list_plan_ids(args.profile, protection_group_id, region_map)
+    plan_ids = list(dict.fromkeys(plan_ids))
+    if not plan_ids:
+        print("Nothing to export: pass --plan-id and/or --protection-group-id", file=sys.stderr)
+        return 1
+
+    cache = None if args.no_cache else PlanSnapshotCache(args.cache_dir)
+    results = plan_export.fetch_plans(args.profile, plan_ids, region_map, max_workers=args.workers, cache=cache)
+    snapshots = [snapshot for _, snapshot, error in results if error is None]
+    failed = [{'DR Plan OCID': plan_id, 'Error': str(error)} for plan_id, _, error in results if error is not None]
+
+    if snapshots:
+        file_format = args.format or format_for_file(args.output) or 'xlsx'
+        with open(args.output, 'wb') as output:
+            if file_format == 'xlsx':
+                exported = plan_export.write_plans_workbook(output, snapshots, template_path=args.template)
+            else:
+                exported = lazy_import("planColumnar").write_plans_columnar(output, snapshots, file_format)
+        print(f"Exported {len(exported)} of {len(plan_ids)} DR plans to {args.output}")
+        print_table(exported)
+        if args.index:
+            indexed = PlanSearchIndex(args.index_file).index_snapshots(snapshots)
+            refreshed = sum(1 for row in indexed if row['Index'] == 'indexed')
+            print(f"Search index: {refreshed} plans refreshed, {len(indexed) - refreshed} unchanged")
+    if failed:
+        print(f"{len(failed)} DR plans could not be exported", file=sys.stderr)
+        print_table(failed)
+    return 1 if failed else 0
+
+def update_command(args):
+    """Update one plan from a named sheet, every plan listed in the workbook's manifest, or every plan in a columnar export"""
+    plan_update = lazy_import("planUpdate")
+    region_map = load_region_map(args.region_file)
+    if format_for_file(args.file):
+        # Columnar exports carry each row's plan OCID, so neither a manifest nor --sheet is needed
+        with open(args.file, 'rb') as source:
+            parsed_plans = plan_update.parse_columnar_plans(source, region_map)
+        if args.plan_id:
+            parsed_plans = [parsed for parsed in parsed_plans if parsed[1] == args.plan_id]
+        if not parsed_plans:
+            print(f"{args.file} holds no plans{' with that --plan-id' if args.plan_id else ''}", file=sys.stderr)
+            return 1
+    elif args.plan_id:
+        if not args.sheet:
+            print("--sheet is required with --plan-id", file=sys.stderr)
+            return 1
+        try:
+            parsed_plans = [(args.sheet, args.plan_id, plan_update.parse_plan_groups(
+                plan_update.load_sheet_rows(args.file, args.sheet), region_map=region_map), None)]
+        except Exception as e:
+            parsed_plans = [(args.sheet, args.plan_id, None, e)]
+    else:
+        parsed_plans = plan_update.parse_workbook_plans(args.file, args.manifest_sheet, region_map)
+        if not parsed_plans:
+            print(f"The '{args.manifest_sheet}' sheet does not list any plans", file=sys.stderr)
+            return 1
+
+    results = plan_update.update_plans(args.profile, parsed_plans, region_map, max_workers=args.workers,
+                                       wait_for_completion=not args.no_wait, dry_run=args.dry_run)
+    print_table(results)
+    for sheet_name, _, _, error in parsed_plans:
+        if isinstance(error, plan_update.PlanValidationError):
+            print(f"\nProblems in sheet '{sheet_name}':", file=sys.stderr)
+            print_table(error.errors)
+    return 0 if all(result['Status'] in SUCCESS_STATUSES for result in results) else 1
+
+def search_command(args):
+    """Print the indexed steps matching a query"""
+    results = PlanSearchIndex(args.index_file).search(args.query, plan_ids=args.plan_id, limit=args.limit)
+    if not results:
+        print("No matching steps", file=sys.stderr)
+        return 1
+    print_table(results)
+    return 0
+
+def drift_command(args):
+    """Compare each pair of plans and report how the right one has drifted from the left"""
+    plan_drift = lazy_import("planDrift")
+    region_map = load_region_map(args.region_file)
+    cache = None if args.no_cache else PlanSnapshotCache(args.cache_dir)
+    compared, failed = plan_drift.compare_plan_pairs(
+        args.profile, [tuple(pair) for pair in args.pair], region_map, max_workers=args.workers, cache=cache,
+        include_regional=args.include_regional, user_defined_only=not args.all_groups)
+
+    if compared:
+        print_table(plan_drift.drift_summary(compared))
+        stale = plan_drift.stale_plan_ids(compared)
+        if stale:
+            print(f"{len(stale)} DR plans could not be checked for changes; their cached snapshots were compared "
+                  "and may be out of date", file=sys.stderr)
+        if args.output:
+            with open(args.output, 'wb') as output:
+                plan_drift.write_drift_workbook(output, compared)
+            print(f"Wrote the drift report to {args.output}")
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as output:
+                output.write(plan_drift.drift_json(compared))
+            print(f"Wrote the drift report to {args.json}")
+    if failed:
+        print(f"{len(failed)} DR plans could not be fetched", file=sys.stderr)
+        print_table([{'DR Plan OCID': plan_id, 'Error': str(error)} for plan_id, error in failed])
+    return 1 if failed or any(drift for _, _, drift in compared) else 0
+
+def backup_command(args):
+    """Snapshot plans into the version history once, or every --every seconds until interrupted"""
+    targets = load_backup_targets(args.config) if args.config else []
+    if args.plan_id or args.protection_group_id:
+        targets.append(BackupTarget(args.profile, args.plan_id, args.protection_group_id))
+    if not targets:
+        print("Nothing to back up: pass --config, --plan-id and/or --protection-group-id", file=sys.stderr)
+        return 1
+    history = PlanHistory(args.history_dir)
+    cache = None if args.no_cache else PlanSnapshotCache(args.cache_dir)
+    if args.every:
+        print(f"Backing up {len(targets)} targets every {args.every} s into {history.directory}; Ctrl-C to stop",
+              file=sys.stderr)
+        try:
+            run_backups(targets, history, args.every, args.region_file, max_workers=args.workers, cache=cache)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    results, failed = back_up(targets, history, load_region_map(args.region_file), max_workers=args.workers,
+                              cache=cache)
+    changed = sum(1 for row in results if row['History'] != 'unchanged')
+    print(f"Backed up {len(results)} DR plans into {history.directory}: {changed} new versions")
+    print_table(results)
+    if failed:
+        print(f"{len(failed)} DR plans could not be backed up", file=sys.stderr)
+        print_table(failed)
+    return 1 if failed else 0
+
+def history_command(args):
+    """List the plans with history, or the versions of one plan"""
+    history = PlanHistory(args.history_dir)
+    rows = history.versions(args.plan_id) if args.plan_id else history.plans()
+    if not rows:
+        print("No history yet: run the backup command first", file=sys.stderr)
+        return 1
+    print_table([{key: value for key, value in row.items() if key != 'Digest'} for row in rows])
+    return 0
+
+def restore_command(args):
+    """Re-apply a stored version of a plan through the update path"""
+    history = PlanHistory(args.history_dir)
+    region_map = load_region_map(args.region_file)
+    parsed_plans = history.parse_version(history.find_version(args.plan_id, args.version), region_map)
+    results = lazy_import("planUpdate").update_plans(args.profile, parsed_plans, region_map,
+                                                     wait_for_completion=not args.no_wait, dry_run=args.dry_run)
+    print_table(results)
+    return 0 if all(result['Status'] in SUCCESS_STATUSES for result in results) else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fsdrPlans.py", description="Export and update OCI FSDR plans.")
+    parser.add_argument("--profile", default="DEFAULT", help="OCI config profile (default: DEFAULT)")
+    parser.add_argument("--region-file", default=REGION_FILE, help="JSON map of region keys to region names")
+    parser.add_argument("--verbose", action="store_true", help="log progress, including how long imports took")
+    parser.add_argument("--timings", action="store_true", help="print how long each phase took")
+    parser.add_argument("--metrics", action="store_true", help="log every phase as a JSON line on stderr")
+    parser.add_argument("--metrics-file", help="write Prometheus-style counters and histograms to this file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="export DR plans to an Excel workbook")
+    export_parser.add_argument("--plan-id", action="append", default=[], help="DR plan OCID, may be repeated")
+    export_parser.add_argument("--protection-group-id", action="append", default=[],
+                               help="export every plan of this DR protection group, may be repeated")
+    export_parser.add_argument("--output", default="dr_plans_export.xlsx", help="workbook or columnar file to write")
+    export_parser.add_argument("--format", choices=['xlsx'] + list(COLUMNAR_FORMATS),
+                               help="file format (default: from the --output extension, else xlsx)")
+    export_parser.add_argument("--template", default=TEMPLATE_FILE,
+                               help="workbook every plan sheet starts from; pass '' to style sheets from scratch")
+    export_parser.add_argument("--workers", type=int, default=8, help="parallel requests (default: 8)")
+    export_parser.add_argument("--no-cache", action="store_true", help="always fetch fresh copies of the plans")
+    export_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="plan snapshot cache directory")
+    export_parser.add_argument("--index", action="store_true", help="add the exported plans to the search index")
+    export_parser.add_argument("--index-file", default=DEFAULT_INDEX_PATH, help="search index database")
+    export_parser.set_defaults(handler=export_command)
+
+    update_parser = commands.add_parser("update", help="update DR plans from an Excel workbook")
+    update_parser.add_argument("--file", required=True,
+                               help="workbook, or a .parquet, .arrow or .jsonl export, to read")
+    update_parser.add_argument("--plan-id", help="update only this plan, from --sheet of a workbook")
+    update_parser.add_argument("--sheet", help="sheet holding the plan given by --plan-id")
+    update_parser.add_argument("--manifest-sheet", default=MANIFEST_SHEET,
+                               help=f"sheet mapping sheet names to plan OCIDs (default: {MANIFEST_SHEET})")
+    update_parser.add_argument("--workers", type=int, default=4, help="parallel updates (default: 4)")
+    update_parser.add_argument("--no-wait", action="store_true", help="do not wait for the work requests to finish")
+    update_parser.add_argument("--dry-run", action="store_true", help="only report which plans would change")
+    update_parser.set_defaults(handler=update_command)
+
+    search_parser = commands.add_parser("search", help="search the steps of every indexed plan")
+    search_parser.add_argument("query", help='words to find, e.g. "failover.sh" or "function:ocid1.fnfunc.oc1..."')
+    search_parser.add_argument("--plan-id", action="append", default=[], help="search only this plan, may be repeated")
+    search_parser.add_argument("--limit", type=int, default=200, help="most matches to print (default: 200)")
+    search_parser.add_argument("--index-file", default=DEFAULT_INDEX_PATH, help="search index database")
+    search_parser.set_defaults(handler=search_command)
+
+    drift_parser = commands.add_parser("drift", help="compare pairs of DR plans, such as primary and standby")
+    drift_parser.add_argument("--pair", action="append", nargs=2, required=True, metavar=("LEFT", "RIGHT"),
+                              help="DR plan OCIDs to compare, may be repeated")
+    drift_parser.add_argument("--output", help="write the drift report to this workbook")
+    drift_parser.add_argument("--json", help="write the drift report to this JSON file")
+    drift_parser.add_argument("--include-regional", action="store_true",
+                              help="also compare instance and function OCIDs and regions")
+    drift_parser.add_argument("--all-groups", action="store_true",
+                              help="also compare built-in groups, not only user-defined and pause groups")
+    drift_parser.add_argument("--workers", type=int, default=8, help="parallel requests (default: 8)")
+    drift_parser.add_argument("--no-cache", action="store_true", help="always fetch fresh copies of the plans")
+    drift_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="plan snapshot cache directory")
+    drift_parser.set_defaults(handler=drift_command)
+
+    backup_parser = commands.add_parser("backup", help="snapshot DR plans into the version history")
+    backup_parser.add_argument("--config", help='JSON list of {"profile", "plan_ids", "protection_group_ids"} targets')
+    backup_parser.add_argument("--plan-id", action="append", default=[], help="DR plan OCID, may be repeated")
+    backup_parser.add_argument("--protection-group-id", action="append", default=[],
+                               help="back up every plan of this DR protection group, may be repeated")
+    backup_parser.add_argument("--every", type=float, help="keep running, backing up every this many seconds")
+    backup_parser.add_argument("--workers", type=int, default=8, help="parallel requests per profile (default: 8)")
+    backup_parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="version history directory")
+    backup_parser.add_argument("--no-cache", action="store_true", help="always fetch fresh copies of the plans")
+    backup_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="plan snapshot cache directory")
+    backup_parser.set_defaults(handler=backup_command)
+
+    history_parser = commands.add_parser("history", help="list backed up plans, or the versions of one")
+    history_parser.add_argument("--plan-id", help="list the versions of this plan")
+    history_parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="version history directory")
+    history_parser.set_defaults(handler=history_command)
+
+    restore_parser = commands.add_parser("restore", help="re-apply a stored version of a DR plan")
+    restore_parser.add_argument("--plan-id", required=True, help="DR plan OCID")
+    restore_parser.add_argument("--version", required=True, help="version to re-apply, as listed by history")
+    restore_parser.add_argument("--dry-run", action="store_true", help="only report whether the plan would change")
+    restore_parser.add_argument("--no-wait", action="store_true", help="do not wait for the work request to finish")
+    restore_parser.add_argument("--history-dir", default=DEFAULT_HISTORY_DIR, help="version history directory")
+    restore_parser.set_defaults(handler=restore_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    if args.metrics or args.metrics_file:
+        enable_metrics(metrics_file=args.metrics_file)
+    with metrics_run(args.command) as run:
+        status = args.handler(args)
+    if args.timings:
+        print(f"\n{args.command} took {run.seconds:.2f} s:", file=sys.stderr)
+        print_table(run.breakdown(), file=sys.stderr)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,51 @@
 import streamlit as st
-import oci
-import pandas as pd
-import os
-from openpyxl import load_workbook
-from openpyxl.utils import column_index_from_string
-from openpyxl.styles import Alignment, PatternFill, Font
 from io import BytesIO
 from commonLib import *
+from planCache import PlanSnapshotCache, get_plan_snapshot
+from planIndex import PlanSearchIndex
 
 st.set_page_config(
     page_title="FSDR Plans Export",
     page_icon="☁️"  # Cloud emoji to represent OCI
 )
 
-def main():
-    st.title("FSDR Plans Export")
-    
+def show_snapshot_source(snapshot):
+    """Tell the user whether the export came from the snapshot cache or a fresh fetch"""
+    if snapshot.source == 'cache':
+        st.info(f"Served from the local snapshot cache: the plan is unchanged since {snapshot.metadata['time_updated']}")
+    elif snapshot.source == 'stale':
+        st.warning("Could not check the plan for changes, so the cached snapshot is shown and may be out of date")
+    else:
+        st.caption("Fetched a fresh copy of the plan")
 
-    if 'oci_profile' not in st.session_state:
-        st.error("Please select an OCI profile on the main page.")
+def add_to_search_index(search_index, snapshots):
+    """Refresh the search index with the exported plans; plans whose steps did not change are left as they are"""
+    if search_index is None:
         return
-
+    indexed = search_index.index_snapshots(snapshots)
+    refreshed = sum(1 for row in indexed if row['Index'] == 'indexed')
+    st.caption(f"Search index: {refreshed} plans refreshed, {len(indexed) - refreshed} unchanged")
+
+def show_timing_breakdown(run):
+    """Show where the time of the last export went, phase by phase"""
+    with st.expander(f"Timing breakdown ({run.seconds:.2f} s)"):
+        st.dataframe(run.breakdown(), hide_index=True)
+        # Rate limiting, retries and open circuits of every region called so far in this process
+        st.dataframe(resilience_status(), hide_index=True)
+
+# Download MIME type of each file format the multi-plan export can write
+EXPORT_MIME_TYPES = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'parquet': "application/vnd.apache.parquet",
+    'arrow': "application/vnd.apache.arrow.file",
+    'jsonl': "application/jsonl",
+}
+
+def export_single_plan(profile, cache, search_index):
     # Input fields
     ocid = st.text_input("DR Plan OCID")
     sheet_name = st.text_input("Sheet Name")
-    
+
     # Excel file name input
     use_default_filename = st.checkbox("Use default file name", value=True)
     if use_default_filename:
@@ -34,184 +55,197 @@ def main():
         if not file_name.endswith('.xlsx'):
             file_name += '.xlsx'
 
-    if st.button("Export Plan"):
+    if not st.button("Export Plan"):
+        return
+    with metrics_run("export_plan", plan_id=ocid) as run:
         try:
+            # The engine pulls in oci, pandas and openpyxl, so load it only once it is needed
+            plan_export = lazy_import("planExport")
+
             # Load region map
-            region_file = os.path.join(os.path.dirname(__file__), "region_file.json")
-            region_map = load_region_map(region_file)
-            region = get_region_from_ocid(ocid, region_map)
-
-            # Set up OCI config and signer
-            config = oci.config.from_file(profile_name=st.session_state['oci_profile'])
-            config['region'] = region
-            signer = oci.signer.Signer.from_config(config)
-
-            # Get DR Plan
-            disaster_recovery_client = oci.disaster_recovery.DisasterRecoveryClient(
-                config=config, retry_strategy=oci.retry.DEFAULT_RETRY_STRATEGY, signer=signer)
-            get_dr_plan_response = disaster_recovery_client.get_dr_plan(dr_plan_id=ocid)
-            plan_groups = get_dr_plan_response.data.plan_groups
-
-            # Extract the order of plan groups
-            original_order = [pg.id for pg in plan_groups]
-
-            # Manually convert DrPlanGroup objects to dictionaries
-            plan_dicts = []
-            for pg in plan_groups:
-                steps = []
-                for step in pg.steps:
-                    step_dict = {
-                        'display_name': step.display_name,
-                        'error_mode': step.error_mode,
-                        'id': step.id,
-                        'is_enabled': step.is_enabled,
-                        'timeout': step.timeout,
-                        'type': step.type,
-                    }
-                    if hasattr(step, 'user_defined_step') and step.user_defined_step:
-                        user_defined_step = {
-                            'step_type': step.user_defined_step.step_type,
-                            'run_as_user': getattr(step.user_defined_step, 'run_as_user', None),
-                            'run_on_instance_id': getattr(step.user_defined_step, 'run_on_instance_id', None),
-                            'function_id': getattr(step.user_defined_step, 'function_id', None),
-                            'function_region': getattr(step.user_defined_step, 'function_region', None),
-                            'request_body': getattr(step.user_defined_step, 'request_body', None),
-                            'object_storage_script_location': {
-                                'bucket': getattr(step.user_defined_step.object_storage_script_location, 'bucket', None),
-                                'namespace': getattr(step.user_defined_step.object_storage_script_location, 'namespace', None),
-                                'object': getattr(step.user_defined_step.object_storage_script_location, 'object', None)
-                            } if getattr(step.user_defined_step, 'object_storage_script_location', None) else None,
-                            'run_on_instance_region': getattr(step.user_defined_step, 'run_on_instance_region', None),
-                            'script_command': getattr(step.user_defined_step, 'script_command', None)
-                        }
-                        step_dict['user_defined_step'] = user_defined_step
-                    steps.append(step_dict)
-                plan_dicts.append({
-                    'display_name': pg.display_name,
-                    'id': pg.id,
-                    'type': pg.type,
-                    'steps': steps,
-                    'is_pause_enabled': pg.is_pause_enabled
-                })
-
-            # Convert the parsed plan data to a DataFrame
-            df = pd.json_normalize(plan_dicts)
-
-            # Split the data into two parts based on the "type" value
-            built_in_df = df[(df['type'] == 'BUILT_IN')]
-            other_df = df[df['type'] != 'BUILT_IN']
-            pause_in_df = df[df['type'] == 'USER_DEFINED_PAUSE']
-
-            # Function to normalize and reformat data
-            def normalize_and_reformat(df):
-                dict_list_orient = df.to_dict('records')
-                normalized_data = pd.json_normalize(dict_list_orient, "steps", ['display_name', 'id', 'type'], record_prefix='steps.')
-                columns_order = [
-                    'display_name', 'id', 'steps.display_name', 'steps.error_mode', 'steps.id', 'steps.is_enabled',
-                    'steps.timeout', 'steps.type', 'type'
-                ]
-                normalized_data = normalized_data.reindex(columns=columns_order, fill_value=None)
-                return normalized_data
-
-            def pause(df):
-                dict_list_orient = df.to_dict('records')
-                normalized_data = pd.json_normalize(dict_list_orient)
-                columns_order = [
-                    'display_name', 'id', 'is_pause_enabled', 'type'
-                ]
-                normalized_data = normalized_data.reindex(columns=columns_order, fill_value=None)
-                return normalized_data
-
-            def normalize_other_data(df):
-                dict_list_orient = df.to_dict('records')
-                normalized_data = pd.json_normalize(dict_list_orient, "steps", ['display_name', 'id', 'type'], record_prefix='steps.')
-                columns_order = [
-                    'display_name', 'id', 'steps.display_name', 'steps.error_mode', 'steps.id', 'steps.is_enabled',
-                    'steps.timeout', 'steps.type', 'steps.user_defined_step.step_type',
-                    'steps.user_defined_step.run_as_user', 'steps.user_defined_step.run_on_instance_id',
-                    'steps.user_defined_step.function_id', 'steps.user_defined_step.function_region', 'steps.user_defined_step.request_body',
-                    'steps.user_defined_step.object_storage_script_location.bucket', 'steps.user_defined_step.object_storage_script_location.namespace', 'steps.user_defined_step.object_storage_script_location.object',
-                    'steps.user_defined_step.run_on_instance_region', 'steps.user_defined_step.script_command', 'type'
-                ]
-                normalized_data = normalized_data.reindex(columns=columns_order, fill_value=None)
-                return normalized_data
-
-            # Normalize and reformat both subsets of data
-            built_in_data = normalize_and_reformat(built_in_df)
-            other_data = normalize_other_data(other_df)
-            pause_data = pause(pause_in_df)
-
-            # Append both subsets of data into one DataFrame
-            combined_data = pd.concat([other_data, built_in_data, pause_data], ignore_index=True)
-
-            # Sort the combined data based on the original order
-            combined_data['sort_order'] = pd.Categorical(combined_data['id'], categories=original_order, ordered=True)
-            combined_data.sort_values('sort_order', inplace=True)
-            combined_data.drop(columns=['sort_order'], inplace=True)
+            with phase("load_region_map"):
+                region_map = load_region_map(REGION_FILE)
+
+            # Get DR Plan, or its cached snapshot when it has not changed
+            disaster_recovery_client = plan_export.get_export_client(profile, ocid, region_map)
+            snapshot = get_plan_snapshot(
+                disaster_recovery_client, ocid, lambda plan: plan_export.plan_to_dataframe(plan, region_map), cache)
+            combined_data = snapshot.dataframe
+            show_snapshot_source(snapshot)
+            add_to_search_index(search_index, [snapshot])
 
             # Create Excel file in memory
             output = BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                combined_data.to_excel(writer, sheet_name=sheet_name, index=False)
-                worksheet = writer.sheets[sheet_name]
-
-                # Apply styling
-                def merge_and_center(ws, col):
-                    max_row = ws.max_row
-                    for row in range(2, max_row + 1):
-                        cell_value = ws.cell(row=row, column=col).value
-                        start_row = row
-                        while row <= max_row and ws.cell(row=row, column=col).value == cell_value:
-                            row += 1
-                        end_row = row - 1
-                        if start_row != end_row:
-                            ws.merge_cells(start_row=start_row, start_column=col, end_row=end_row, end_column=col)
-                            merged_cell = ws.cell(row=start_row, column=col)
-                            merged_cell.alignment = Alignment(horizontal='center', vertical='center')
-
-                columns_to_merge = ['A', 'B']
-
-                for col in columns_to_merge:
-                    col_index = column_index_from_string(col)
-                    merge_and_center(worksheet, col_index)
-
-                # Define fill colors
-                fill_blue = PatternFill(start_color="346EC9", end_color="346EC9", fill_type="solid")
-                fill_purple = PatternFill(start_color="858491", end_color="858491", fill_type="solid")
-                font_white = Font(color="FFFFFF", bold=True)
-
-                header_cells = worksheet[1]
-                for cell in header_cells:
-                    if cell.column_letter in ['A', 'B', 'T']:
-                        cell.fill = fill_blue
-                        cell.font = font_white
-                    else:
-                        cell.fill = fill_purple
-                        cell.font = font_white
-
-                # Auto-adjust column widths
-                for col in worksheet.columns:
-                    max_length = 0
-                    column = col[0].column_letter
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(cell.value)
-                        except:
-                            pass
-                    adjusted_width = (max_length + 2)
-                    worksheet.column_dimensions[column].width = adjusted_width
+            plan_export.write_single_plan_workbook(output, combined_data, sheet_name)
 
             # Offer the Excel file for download
-            st.download_button(
-                label="Download Excel file",
-                data=output.getvalue(),
-                file_name=file_name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            with phase("prepare_download"):
+                st.download_button(
+                    label="Download Excel file",
+                    data=output.getvalue(),
+                    file_name=file_name,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
+    show_timing_breakdown(run)
+
+def export_multiple_plans(profile, cache, search_index):
+    # Input fields
+    plan_ids_text = st.text_area("DR Plan OCIDs (one per line)")
+    protection_group_id = st.text_input("DR Protection Group OCID (exports all of its plans)")
+    max_workers = st.number_input("Parallel requests", min_value=1, max_value=32, value=8)
+    file_format = st.selectbox(
+        "File format", ['xlsx'] + available_formats(),
+        help="Parquet, Arrow and JSON Lines keep exact types and are much faster to write and read back")
+    extension = COLUMNAR_FORMATS.get(file_format, '.xlsx')
+    file_name = st.text_input("File name", value=f"dr_plans_export{extension}")
+    if not file_name.endswith(extension):
+        file_name += extension
+
+    if not st.button("Export Plans"):
+        return
+    with metrics_run("export_plans") as run:
+        export_plans(profile, cache, search_index, plan_ids_text, protection_group_id, max_workers, file_name, file_format)
+    show_timing_breakdown(run)
+
+def export_plans(profile, cache, search_index, plan_ids_text, protection_group_id, max_workers, file_name, file_format):
+    """Fetch the listed plans and offer them as one file: a workbook with a sheet per plan, or a columnar file"""
+    try:
+        plan_export = lazy_import("planExport")
+        with phase("load_region_map"):
+            region_map = load_region_map(REGION_FILE)
+
+        plan_ids = [line.strip() for line in plan_ids_text.splitlines() if line.strip()]
+        if protection_group_id.strip():
+            plan_ids += plan_export.list_plan_ids(profile, protection_group_id.strip(), region_map)
+        plan_ids = list(dict.fromkeys(plan_ids))
+        if not plan_ids:
+            st.error("Enter at least one DR Plan OCID or a DR Protection Group OCID.")
+            return
+
+        with st.spinner(f"Fetching {len(plan_ids)} DR plans..."):
+            results = plan_export.fetch_plans(profile, plan_ids, region_map, max_workers=int(max_workers), cache=cache)
+
+        failed = [{'DR Plan OCID': plan_id, 'Error': str(error)} for plan_id, _, error in results if error is not None]
+        snapshots = [snapshot for _, snapshot, error in results if error is None]
+
+        if snapshots:
+            add_to_search_index(search_index, snapshots)
+            # Create the file in memory: one sheet per plan plus the manifest, or one columnar table
+            output = BytesIO()
+            if file_format == 'xlsx':
+                exported = plan_export.write_plans_workbook(output, snapshots)
+            else:
+                exported = lazy_import("planColumnar").write_plans_columnar(output, snapshots, file_format)
+
+            st.success(f"Exported {len(exported)} of {len(plan_ids)} DR plans")
+            st.dataframe(exported, hide_index=True)
+            with phase("prepare_download"):
+                st.download_button(
+                    label="Download file",
+                    data=output.getvalue(),
+                    file_name=file_name,
+                    mime=EXPORT_MIME_TYPES[file_format]
+                )
+        if failed:
+            st.error(f"{len(failed)} DR plans could not be exported")
+            st.dataframe(failed, hide_index=True)
+
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+
+def parse_plan_pairs(text):
+    """Read one "left OCID, right OCID" pair per line; commas and spaces both separate the two"""
+    pairs = []
+    for line in text.splitlines():
+        plan_ids = line.replace(',', ' ').split()
+        if not plan_ids:
+            continue
+        if len(plan_ids) != 2:
+            raise ValueError(f"Expected two DR Plan OCIDs on the line '{line.strip()}'")
+        pairs.append(tuple(plan_ids))
+    return pairs
+
+def compare_plan_pairs(profile, cache):
+    st.write("Compare each plan with its counterpart, such as the failover plans of the primary and standby "
+             "protection groups. Groups pair up by name, and steps by name or, when renamed, by what they run.")
+    pairs_text = st.text_area("Plan pairs (left and right DR Plan OCID per line)")
+    include_regional = st.checkbox(
+        "Compare instance and function OCIDs and regions",
+        help="These name resources of each plan's own region, so they usually differ between regions by design")
+    user_defined_only = not st.checkbox("Also compare built-in groups")
+    max_workers = st.number_input("Parallel requests", min_value=1, max_value=32, value=8)
+
+    if not st.button("Compare Plans"):
+        return
+    with metrics_run("compare_plans") as run:
+        try:
+            plan_drift = lazy_import("planDrift")
+            pairs = parse_plan_pairs(pairs_text)
+            if not pairs:
+                st.error("Enter at least one pair of DR Plan OCIDs.")
+                return
+            with phase("load_region_map"):
+                region_map = load_region_map(REGION_FILE)
+            with st.spinner(f"Fetching the plans of {len(pairs)} pairs..."):
+                compared, failed = plan_drift.compare_plan_pairs(
+                    profile, pairs, region_map, max_workers=int(max_workers), cache=cache,
+                    include_regional=include_regional, user_defined_only=user_defined_only)
+
+            drifted = sum(1 for _, _, drift in compared if drift)
+            if compared and not drifted:
+                st.success(f"All {len(compared)} plan pairs are in sync")
+            elif compared:
+                st.warning(f"{drifted} of {len(compared)} plan pairs have drifted")
+            stale = plan_drift.stale_plan_ids(compared)
+            if stale:
+                st.warning(f"{len(stale)} DR plans could not be checked for changes, so their cached snapshots "
+                           "were compared and may be out of date")
+            if compared:
+                st.dataframe(plan_drift.drift_summary(compared), hide_index=True)
+                # Left and Right hold values of every field, so show them as text for the table to render
+                st.dataframe([{**row, 'Left': '' if row['Left'] is None else str(row['Left']),
+                               'Right': '' if row['Right'] is None else str(row['Right'])}
+                              for row in plan_drift.drift_rows(compared)], hide_index=True)
+                output = BytesIO()
+                plan_drift.write_drift_workbook(output, compared)
+                st.download_button("Download drift report", data=output.getvalue(), file_name="dr_plan_drift.xlsx",
+                                   mime=EXPORT_MIME_TYPES['xlsx'])
+                st.download_button("Download drift report as JSON", data=plan_drift.drift_json(compared),
+                                   file_name="dr_plan_drift.json", mime="application/json")
+            if failed:
+                st.error(f"{len(failed)} DR plans could not be fetched")
+                st.dataframe([{'DR Plan OCID': plan_id, 'Error': str(error)} for plan_id, error in failed],
+                             hide_index=True)
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+    show_timing_breakdown(run)
+
+def main():
+    st.title("FSDR Plans Export")
+
+    if 'oci_profile' not in st.session_state:
+        st.error("Please select an OCI profile on the main page.")
+        return
+
+    export_mode = st.radio("Export mode", ["Single plan", "Multiple plans", "Compare plans"], horizontal=True)
+    use_cache = st.checkbox(
+        "Serve unchanged plans from the local snapshot cache", value=True,
+        help=f"Snapshots are kept in {PlanSnapshotCache().directory} (set FSDR_PLAN_CACHE_DIR to change it)")
+    cache = PlanSnapshotCache() if use_cache else None
+    use_index = st.checkbox(
+        "Add exported plans to the search index", value=True,
+        help=f"The index is kept in {PlanSearchIndex().path} (set FSDR_PLAN_INDEX to change it)")
+    search_index = PlanSearchIndex() if use_index else None
+
+    if export_mode == "Single plan":
+        export_single_plan(st.session_state['oci_profile'], cache, search_index)
+    elif export_mode == "Multiple plans":
+        export_multiple_plans(st.session_state['oci_profile'], cache, search_index)
+    else:
+        compare_plan_pairs(st.session_state['oci_profile'], cache)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+import streamlit as st
+from commonLib import *
+from planHistory import PlanHistory
+
+st.set_page_config(
+    page_title="FSDR Plans History",
+    page_icon="☁️"  # Cloud emoji to represent OCI
+)
+
+def show_version(history, plan_id, versions, digest):
+    """Preview a version, offer it for download and list what changed since the version before it"""
+    frame = history.version_frame(digest)
+    st.dataframe(frame.drop(columns=['dr_plan_id', 'dr_plan_name']), hide_index=True)
+    st.download_button("Download this version", data=history.read_version(digest),
+                       file_name=f"{plan_id}_{digest[:12]}.jsonl", mime="application/jsonl")
+
+    digests = [version['Digest'] for version in versions]
+    position = digests.index(digest)
+    if position + 1 < len(digests):
+        plan_drift = lazy_import("planDrift")
+        drift = plan_drift.compare_plans(history.version_frame(digests[position + 1]), frame,
+                                         include_regional=True, user_defined_only=False)
+        st.caption(f"{len(drift)} differences from the version before it")
+        if drift:
+            st.dataframe([{**row, 'Left': '' if row['Left'] is None else str(row['Left']),
+                           'Right': '' if row['Right'] is None else str(row['Right'])} for row in drift],
+                         hide_index=True)
+
+def restore_version(history, digest):
+    """Re-apply a version through the update path"""
+    if 'oci_profile' not in st.session_state:
+        st.error("Please select an OCI profile on the main page to restore a version.")
+        return
+    dry_run = st.checkbox("Only show whether the plan would change", value=True)
+    if not st.button("Re-apply this version"):
+        return
+    with metrics_run("restore_version") as run:
+        try:
+            plan_update = lazy_import("planUpdate")
+            region_map = load_region_map(REGION_FILE)
+            parsed_plans = history.parse_version(digest, region_map)
+            with st.spinner("Comparing with the plan as it is now..."):
+                results = plan_update.update_plans(st.session_state['oci_profile'], parsed_plans, region_map,
+                                                   dry_run=dry_run, tracker=get_work_request_tracker())
+            st.dataframe(results, hide_index=True)
+            if any(result['Work Request'] for result in results):
+                st.info("The update was accepted; follow its work request on the FSDR Plans Update page.")
+        except Exception as e:
+            st.error(f"An error occurred: {str(e)}")
+    with st.expander(f"Timing breakdown ({run.seconds:.2f} s)"):
+        st.dataframe(run.breakdown(), hide_index=True)
+
+def main():
+    st.title("FSDR Plans History")
+    history = PlanHistory()
+    plans = history.plans()
+    st.caption(f"{len(plans)} plans backed up in {history.directory}. "
+               "Run `python fsdrPlans.py backup --every 3600` to keep taking snapshots.")
+    if not plans:
+        return
+
+    plan_names = {plan['DR Plan OCID']: plan['Plan'] for plan in plans}
+    plan_id = st.selectbox("Plan", list(plan_names), format_func=lambda plan_id: plan_names[plan_id])
+    versions = history.versions(plan_id)
+    st.dataframe([{key: value for key, value in version.items() if key != 'Digest'} for version in versions],
+                 hide_index=True)
+    digest = st.selectbox("Version", [version['Digest'] for version in versions],
+                          format_func=lambda digest: next(f"{version['Version']} captured {version['Captured']}"
+                                                          for version in versions if version['Digest'] == digest))
+    if digest:
+        show_version(history, plan_id, versions, digest)
+        restore_version(history, digest)
+
+    with st.expander("Backup runs"):
+        st.dataframe(history.runs(), hide_index=True)
+    with st.expander("All backed up plans"):
+        st.dataframe(plans, hide_index=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import time
+
+import streamlit as st
+from commonLib import *
+from planCache import PlanSnapshotCache
+from planIndex import QUERY_FIELDS, PlanSearchIndex
+
+st.set_page_config(
+    page_title="FSDR Plans Search",
+    page_icon="☁️"  # Cloud emoji to represent OCI
+)
+
+def search_plans(search_index, indexed_plans):
+    query = st.text_input(
+        "Search steps", placeholder="failover.sh instance:ocid1.instance.oc1...",
+        help="Every word must match the start of a word in a step, group or plan. Quote phrases. "
+             f"Prefix a word with a field to search only there: {', '.join(f'{field}:' for field in QUERY_FIELDS)}")
+    plan_names = {plan['DR Plan OCID']: plan['Plan'] for plan in indexed_plans}
+    plan_ids = st.multiselect("Only in these plans", list(plan_names), format_func=lambda plan_id: plan_names[plan_id])
+    if not query:
+        return
+
+    start = time.perf_counter()
+    results = search_index.search(query, plan_ids=plan_ids)
+    elapsed = time.perf_counter() - start
+    st.caption(f"{len(results)} matching steps in {elapsed * 1e3:.1f} ms")
+    if results:
+        st.dataframe(results, hide_index=True)
+
+def refresh_index(profile, search_index):
+    """Fetch plans, through the snapshot cache, and reindex those whose steps changed"""
+    plan_ids_text = st.text_area("DR Plan OCIDs (one per line)")
+    protection_group_id = st.text_input("DR Protection Group OCID (indexes all of its plans)")
+    max_workers = st.number_input("Parallel requests", min_value=1, max_value=32, value=8)
+    if not st.button("Refresh index"):
+        return
+    try:
+        plan_export = lazy_import("planExport")
+        region_map = load_region_map(REGION_FILE)
+        plan_ids = [line.strip() for line in plan_ids_text.splitlines() if line.strip()]
+        if protection_group_id.strip():
+            plan_ids += plan_export.list_plan_ids(profile, protection_group_id.strip(), region_map)
+        plan_ids = list(dict.fromkeys(plan_ids))
+        if not plan_ids:
+            st.error("Enter at least one DR Plan OCID or a DR Protection Group OCID.")
+            return
+
+        with st.spinner(f"Fetching {len(plan_ids)} DR plans..."):
+            results = plan_export.fetch_plans(profile, plan_ids, region_map, max_workers=int(max_workers),
+                                              cache=PlanSnapshotCache())
+        indexed = search_index.index_snapshots([snapshot for _, snapshot, error in results if error is None])
+        failed = [{'DR Plan OCID': plan_id, 'Error': str(error)} for plan_id, _, error in results if error is not None]
+        st.dataframe(indexed, hide_index=True)
+        if failed:
+            st.error(f"{len(failed)} DR plans could not be fetched")
+            st.dataframe(failed, hide_index=True)
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+
+def main():
+    st.title("FSDR Plans Search")
+    search_index = PlanSearchIndex()
+    indexed_plans = search_index.plans()
+    st.caption(f"{len(indexed_plans)} plans indexed in {search_index.path}. "
+               "Plans are added on export, or refreshed below.")
+
+    search_plans(search_index, indexed_plans)
+
+    with st.expander("Refresh the index"):
+        if 'oci_profile' in st.session_state:
+            refresh_index(st.session_state['oci_profile'], search_index)
+        else:
+            st.error("Please select an OCI profile on the main page.")
+
+    with st.expander("Indexed plans"):
+        st.dataframe(indexed_plans, hide_index=True)
+        plan_names = {plan['DR Plan OCID']: plan['Plan'] for plan in indexed_plans}
+        plan_id = st.selectbox("Plan", list(plan_names), format_func=lambda plan_id: plan_names[plan_id])
+        if plan_id and st.button("Remove from the index"):
+            search_index.remove_plan(plan_id)
+            st.rerun()
+
+if __name__ == "__main__":
+    main()
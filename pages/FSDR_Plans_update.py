@@ -1,317 +1,243 @@
-import streamlit as st
-import oci
-import openpyxl
 import os
-from commonLib import *
+import streamlit as st
 from io import BytesIO
+from commonLib import *
+from planCache import ParseCache, upload_key
 
 st.set_page_config(
     page_title="FSDR Plans Update",
     page_icon="☁️"  # Cloud emoji to represent OCI
 )
 
-def get_merged_cell_value(sheet, row, col):
-    cell = sheet.cell(row=row, column=col)
-    for merged_cell_range in sheet.merged_cells.ranges:
-        if cell.coordinate in merged_cell_range:
-            merged_cell = sheet.cell(row=merged_cell_range.min_row, column=merged_cell_range.min_col)
-            return merged_cell.value
-    return cell.value
-
-def handle_empty_cell(value):
-    """Convert Excel empty cells to None"""
-    if value is None or str(value).strip().lower() in ['none', 'nan', '']:
-        return None
-    return str(value)
-
-def is_new_group(group_id):
-    """Check if this is a new group based on the ID"""
-    return not group_id or group_id.strip().lower() in ['none', 'nan', '']
-
-def new_plan(row, plan_groups_dict):
-    plan_group_display_name = handle_empty_cell(row[0])
-    id = None  # Will be auto-generated by OCI
-    step_display_name = handle_empty_cell(row[2])
-    step_error_mode = row[3]
-    s_id = None  # Will be auto-generated by OCI
-    step_is_enabled = row[5]
-    timeout = row[6]
-    step_type = row[8]
-    run_as_user = handle_empty_cell(row[9])
-    run_on_instance_id = handle_empty_cell(row[10])
-    function_id = handle_empty_cell(row[11])
-    function_region = handle_empty_cell(row[12])
-    request_body = handle_empty_cell(row[13])
-    bucket = handle_empty_cell(row[14])
-    namespace = handle_empty_cell(row[15])
-    bucket_object = handle_empty_cell(row[16])
-    instance_region = handle_empty_cell(row[17])
-    script_command = handle_empty_cell(row[18])
-
-    # Skip rows where both display name and step display name are empty
-    if not plan_group_display_name and not step_display_name:
-        return plan_groups_dict, None
-
-    if step_type in ["RUN_LOCAL_SCRIPT", "RUN_OBJECTSTORE_SCRIPT", "INVOKE_FUNCTION"]:
-        type = 'USER_DEFINED'
-    else:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of RUN_LOCAL_SCRIPT, RUN_OBJECTSTORE_SCRIPT, INVOKE_FUNCTION")
-
-    valid_step_types = [
-        'RUN_OBJECTSTORE_SCRIPT_PRECHECK',
-        'RUN_LOCAL_SCRIPT_PRECHECK',
-        'INVOKE_FUNCTION_PRECHECK',
-        'RUN_OBJECTSTORE_SCRIPT',
-        'RUN_LOCAL_SCRIPT',
-        'INVOKE_FUNCTION'
-    ]
-
-    if step_type not in valid_step_types:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of {valid_step_types}")
-
-    # Find existing plan group with the same display name
-    existing_group = None
-    for group in plan_groups_dict.values():
-        if group.display_name == plan_group_display_name:
-            existing_group = group
-            break
-
-    if existing_group:
-        plan_group_details = existing_group
-    else:
-        plan_group_details = oci.disaster_recovery.models.UpdateDrPlanGroupDetails(
-            display_name=plan_group_display_name,
-            id=id,
-            type=type,
-            steps=[]
-        )
-        plan_groups_dict[plan_group_display_name] = plan_group_details
-
-    if step_type == "RUN_LOCAL_SCRIPT":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateRunLocalScriptUserDefinedStepDetails(
-                step_type=step_type,
-                run_on_instance_id=run_on_instance_id,
-                run_as_user=run_as_user,
-                script_command=script_command
-            )
-        )
-    elif step_type == "RUN_OBJECTSTORE_SCRIPT":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateRunObjectStoreScriptUserDefinedStepDetails(
-                step_type=step_type,
-                run_on_instance_id=run_on_instance_id,
-                object_storage_script_location=oci.disaster_recovery.models.UpdateObjectStorageScriptLocationDetails(
-                    bucket=bucket,
-                    namespace=namespace,
-                    object=bucket_object
-                )
-            )
-        )
-    elif step_type == "INVOKE_FUNCTION":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateInvokeFunctionUserDefinedStepDetails(
-                step_type=step_type,
-                function_id=function_id,
-                request_body=request_body
-            )
-        )
-    else:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of RUN_LOCAL_SCRIPT, RUN_OBJECTSTORE_SCRIPT, INVOKE_FUNCTION")
-
-    # Add step to the plan group if it's not already there
-    if not any(step.display_name == step_display_name for step in plan_group_details.steps):
-        plan_group_details.steps.append(step_details)
-
-    return plan_groups_dict, plan_group_details
-
-def existing_plan(row, plan_groups_dict):
-    plan_group_display_name = handle_empty_cell(row[0])
-    id = handle_empty_cell(row[1])
-    step_display_name = handle_empty_cell(row[2])
-    step_error_mode = row[3]
-    s_id = handle_empty_cell(row[4])
-    step_is_enabled = row[5]
-    timeout = row[6]
-    step_type = row[8]
-    run_as_user = handle_empty_cell(row[9])
-    run_on_instance_id = handle_empty_cell(row[10])
-    function_id = handle_empty_cell(row[11])
-    function_region = handle_empty_cell(row[12])
-    request_body = handle_empty_cell(row[13])
-    bucket = handle_empty_cell(row[14])
-    namespace = handle_empty_cell(row[15])
-    bucket_object = handle_empty_cell(row[16])
-    instance_region = handle_empty_cell(row[17])
-    script_command = handle_empty_cell(row[18])
-
-    if step_type in ["RUN_LOCAL_SCRIPT", "RUN_OBJECTSTORE_SCRIPT", "INVOKE_FUNCTION"]:
-        type = 'USER_DEFINED'
-    else:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of RUN_LOCAL_SCRIPT, RUN_OBJECTSTORE_SCRIPT, INVOKE_FUNCTION")
-
-    valid_step_types = [
-        'RUN_OBJECTSTORE_SCRIPT_PRECHECK',
-        'RUN_LOCAL_SCRIPT_PRECHECK',
-        'INVOKE_FUNCTION_PRECHECK',
-        'RUN_OBJECTSTORE_SCRIPT',
-        'RUN_LOCAL_SCRIPT',
-        'INVOKE_FUNCTION'
-    ]
-
-    if step_type not in valid_step_types:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of {valid_step_types}")
-
-    if id in plan_groups_dict:
-        plan_group_details = plan_groups_dict[id]
-    else:
-        plan_group_details = oci.disaster_recovery.models.UpdateDrPlanGroupDetails(
-            display_name=plan_group_display_name,
-            id=id,
-            type=type,
-            steps=[]
-        )
-        plan_groups_dict[id] = plan_group_details
-
-    if step_type == "RUN_LOCAL_SCRIPT":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateRunLocalScriptUserDefinedStepDetails(
-                step_type=step_type,
-                run_on_instance_id=run_on_instance_id,
-                run_as_user=run_as_user,
-                script_command=script_command
-            )
-        )
-    elif step_type == "RUN_OBJECTSTORE_SCRIPT":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateRunObjectStoreScriptUserDefinedStepDetails(
-                step_type=step_type,
-                run_on_instance_id=run_on_instance_id,
-                object_storage_script_location=oci.disaster_recovery.models.UpdateObjectStorageScriptLocationDetails(
-                    bucket=bucket,
-                    namespace=namespace,
-                    object=bucket_object
-                )
-            )
-        )
-    elif step_type == "INVOKE_FUNCTION":
-        step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-            display_name=step_display_name,
-            error_mode=step_error_mode,
-            id=s_id,
-            timeout=timeout,
-            is_enabled=step_is_enabled,
-            user_defined_step=oci.disaster_recovery.models.UpdateInvokeFunctionUserDefinedStepDetails(
-                step_type=step_type,
-                function_id=function_id,
-                request_body=request_body
-            )
-        )
+def update_single_plan(profile):
+    # Input fields
+    ocid = st.text_input("DR Plan OCID")
+    sheet_name = st.text_input("Sheet Name", help="Not needed for Parquet, Arrow or JSON Lines files, "
+                                                  "whose rows are picked by the DR Plan OCID")
+    excel_file = st.file_uploader("Upload Excel or columnar file", type=["xlsx"] + list(COLUMNAR_FORMATS))
+    if excel_file is not None:
+        sheet_name = upload_label(excel_file, sheet_name)
+        if sheet_name and (ocid or not format_for_file(excel_file.name)):
+            preview_sheet(excel_file, sheet_name, ocid)
+
+    preview_changes = st.button("Preview Changes")
+    update_plan = st.button("Update Plan")
+    if not (preview_changes or update_plan):
+        return
+    with metrics_run("update_plan", plan_id=ocid) as run:
+        apply_sheet(profile, ocid, sheet_name, excel_file, update_plan)
+    show_timing_breakdown(run)
+
+PREVIEW_ROWS = 200
+
+def get_parse_cache():
+    """One cache of parsed uploads per browser session, so reruns, previews and retries never parse an upload twice"""
+    if 'parse_cache' not in st.session_state:
+        st.session_state['parse_cache'] = ParseCache()
+    return st.session_state['parse_cache']
+
+def upload_label(excel_file, sheet_name):
+    """The sheet to read from a workbook; a columnar file has no sheets, so it is named after the file"""
+    return excel_file.name if format_for_file(excel_file.name) else sheet_name
+
+def parse_uploaded_sheet(excel_file, sheet_name, region_map, ocid=None):
+    """Parse one sheet of a workbook, or the rows of one plan of a columnar file, reusing earlier parses of the same bytes"""
+    plan_update = lazy_import("planUpdate")
+    data = excel_file.getvalue()
+    file_format = format_for_file(excel_file.name)
+    if file_format:
+        key = ('plan', ocid)
+        parse = lambda: plan_update.parse_columnar_plan(BytesIO(data), ocid, region_map=region_map,
+                                                        file_format=file_format)
     else:
-        raise ValueError(f"Invalid step_type: {step_type}. Must be one of RUN_LOCAL_SCRIPT, RUN_OBJECTSTORE_SCRIPT, INVOKE_FUNCTION")
-
-    if step_details not in plan_group_details.steps:
-        plan_group_details.steps.append(step_details)
-
-    return plan_groups_dict, plan_group_details
-
-def pause_plan(row, plan_groups_dict):
-    plan_group_display_name = handle_empty_cell(row[0])
-    id = handle_empty_cell(row[1])
-    type = 'USER_DEFINED_PAUSE'
-
-    # Find existing plan group with the same display name
-    existing_group = None
-    if id:  # If ID exists, it's an existing group
-        if id in plan_groups_dict:
-            existing_group = plan_groups_dict[id]
-    else:  # For new groups, search by display name
-        for group in plan_groups_dict.values():
-            if group.display_name == plan_group_display_name:
-                existing_group = group
-                break
-
-    if existing_group:
-        plan_group_details = existing_group
+        key = ('sheet', sheet_name)
+        parse = lambda: plan_update.parse_sheet(BytesIO(data), sheet_name, region_map=region_map)
+    parsed, _ = get_parse_cache().get_or_parse(
+        # The region file is part of the key, as validation checks regions against it
+        upload_key(data, *key, os.path.getmtime(REGION_FILE)), parse,
+        lambda parsed: plan_update.estimated_size(parsed.plan_groups, parsed.rows))
+    return parsed
+
+def parse_uploaded_plans(excel_file, region_map):
+    """Parse every plan of an uploaded workbook or columnar file, or reuse the parse of the same bytes"""
+    plan_update = lazy_import("planUpdate")
+    data = excel_file.getvalue()
+    if format_for_file(excel_file.name):
+        parse = lambda: plan_update.parse_columnar_plans(BytesIO(data), region_map=region_map)
     else:
-        # For new pause plans, set id to None so OCI can auto-generate it
-        if not id:
-            id = None
-        
-        plan_group_details = oci.disaster_recovery.models.UpdateDrPlanGroupDetails(
-            display_name=plan_group_display_name,
-            id=id,
-            type=type,
-            is_pause_enabled=True
-        )
-        # Use display_name as key for new groups
-        key = id if id else plan_group_display_name
-        plan_groups_dict[key] = plan_group_details
-
-    return plan_groups_dict, plan_group_details
-
-def builtin_function(row, plan_groups_dict):
-    plan_group_display_name = handle_empty_cell(row[0])
-    id = handle_empty_cell(row[1])
-    step_display_name = handle_empty_cell(row[2])
-    step_error_mode = row[3]
-    s_id = row[4]
-    step_is_enabled = row[5]
-    timeout = row[6]
-    type = row[19]
-
-    valid_builtin_types = ['BUILT_IN', 'BUILT_IN_PRECHECK', 'USER_DEFINED', 'USER_DEFINED_PAUSE']
-    if type not in valid_builtin_types:
-        raise ValueError(f"Invalid value for `type`: {type}. Must be one of {valid_builtin_types}")
-
-    if id in plan_groups_dict:
-        plan_group_details = plan_groups_dict[id]
+        parse = lambda: plan_update.parse_workbook_plans(BytesIO(data), region_map=region_map)
+    parsed_plans, _ = get_parse_cache().get_or_parse(
+        upload_key(data, 'plans', os.path.getmtime(REGION_FILE)), parse,
+        lambda parsed_plans: sum(plan_update.estimated_size(plan_groups) for _, _, plan_groups, _ in parsed_plans))
+    return parsed_plans
+
+def preview_sheet(excel_file, sheet_name, ocid=None):
+    """Show the groups a sheet will send and its first rows, before anything is submitted"""
+    try:
+        plan_update = lazy_import("planUpdate")
+        parsed = parse_uploaded_sheet(excel_file, sheet_name, load_region_map(REGION_FILE), ocid)
+    except Exception as e:
+        st.error(f"Could not read sheet '{sheet_name}': {str(e)}")
+        return
+
+    if parsed.error:
+        st.error(f"Sheet '{sheet_name}' has {len(parsed.error.errors)} problems to fix before it can be sent")
+        st.dataframe(parsed.error.errors, hide_index=True)
     else:
-        plan_group_details = oci.disaster_recovery.models.UpdateDrPlanGroupDetails(
-            display_name=plan_group_display_name,
-            id=id,
-            type=type,
-            steps=[]
-        )
-        plan_groups_dict[id] = plan_group_details
-
-    step_details = oci.disaster_recovery.models.UpdateDrPlanStepDetails(
-        display_name=step_display_name,
-        error_mode=step_error_mode,
-        id=s_id,
-        timeout=timeout,
-        is_enabled=step_is_enabled
-    )
-
-    if step_details not in plan_group_details.steps:
-        plan_group_details.steps.append(step_details)
-
-    return plan_groups_dict, plan_group_details
+        with st.expander(f"Parsed {len(parsed.plan_groups)} groups from {len(parsed.rows)} rows"):
+            st.dataframe(plan_update.group_summary(parsed.plan_groups), hide_index=True)
+    with st.expander("Sheet preview"):
+        if len(parsed.rows) > PREVIEW_ROWS:
+            st.caption(f"First {PREVIEW_ROWS} of {len(parsed.rows)} rows")
+        st.dataframe(plan_update.preview_rows(parsed.rows, PREVIEW_ROWS), hide_index=True)
+
+def apply_sheet(profile, ocid, sheet_name, excel_file, update_plan):
+    """Compare one sheet with its plan, and send the update when update_plan is set"""
+    try:
+        # The engine pulls in oci and openpyxl, so load it only once it is needed
+        plan_update = lazy_import("planUpdate")
+
+        # Load region map
+        with phase("load_region_map"):
+            region_map = load_region_map(REGION_FILE)
+        region = get_region_from_ocid(ocid, region_map)
+
+        # Reuse the Disaster Recovery client for this profile/region
+        disaster_recovery_client = get_dr_client(profile, region)
+
+        # Read, validate and build the plan groups, unless this upload was parsed earlier in the session
+        sheet_name = upload_label(excel_file, sheet_name)
+        parsed = parse_uploaded_sheet(excel_file, sheet_name, region_map, ocid)
+        if parsed.error:
+            st.error(f"Sheet '{sheet_name}' was not sent: fix the {len(parsed.error.errors)} problems listed above first")
+            return
+        final_plan_groups = parsed.plan_groups
+
+        # Compare with the current plan and never send a no-op update
+        current_plan = plan_update.get_current_plan(disaster_recovery_client, ocid)
+        with phase("diff"):
+            changes = plan_update.diff_plan(current_plan, final_plan_groups)
+        if not changes:
+            st.info(f"DR Plan {ocid} already matches the sheet, no update is needed")
+            return
+        st.write(f"{len(changes)} changes compared to the current plan:")
+        st.dataframe(changes, hide_index=True)
+        if not update_plan:
+            return
+
+        # Update DR Plan and follow its work request in the background
+        _, work_request_id = plan_update.apply_plan_update(
+            disaster_recovery_client, ocid, final_plan_groups, wait_for_completion=False)
+        if work_request_id:
+            get_work_request_tracker().track(disaster_recovery_client, work_request_id, ocid, sheet_name)
+            st.success(f"Update to DR Plan {ocid} was accepted, its progress is shown below")
+        else:
+            st.success(f"Update to DR Plan {ocid} was accepted")
+
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+
+def show_timing_breakdown(run):
+    """Show where the time of the last preview or update went, phase by phase"""
+    with st.expander(f"Timing breakdown ({run.seconds:.2f} s)"):
+        st.dataframe(run.breakdown(), hide_index=True)
+        # Rate limiting, retries and open circuits of every region called so far in this process
+        st.dataframe(resilience_status(), hide_index=True)
+
+def show_validation_errors(sheet_name, error):
+    """Report every problem pre-flight validation found in a sheet"""
+    st.error(f"Sheet '{sheet_name}' was not sent: {len(error.errors)} problems must be fixed first")
+    st.dataframe(error.errors, hide_index=True)
+
+def update_multiple_plans(profile):
+    st.write(f"A workbook needs a '{MANIFEST_SHEET}' sheet with the sheet name in column A and the "
+             "DR Plan OCID in column B. Multi-plan exports include one. Parquet, Arrow and JSON Lines "
+             "exports need nothing extra, as every row carries its plan's OCID.")
+    excel_file = st.file_uploader("Upload Excel or columnar file", type=["xlsx"] + list(COLUMNAR_FORMATS))
+    max_workers = st.number_input("Parallel updates", min_value=1, max_value=32, value=4)
+    if excel_file is not None:
+        preview_plans(excel_file)
+
+    if not st.button("Update Plans"):
+        return
+    with metrics_run("update_plans") as run:
+        apply_workbook(profile, excel_file, max_workers)
+    show_timing_breakdown(run)
+
+def preview_plans(excel_file):
+    """Show every plan an upload holds, with its groups, steps and problems, before anything is submitted"""
+    try:
+        plan_update = lazy_import("planUpdate")
+        parsed_plans = parse_uploaded_plans(excel_file, load_region_map(REGION_FILE))
+    except Exception as e:
+        st.error(f"Could not read {excel_file.name}: {str(e)}")
+        return
+
+    def problems(error):
+        if isinstance(error, plan_update.PlanValidationError):
+            return f"{len(error.errors)} problems"
+        return str(error) if error else ""
+    summary = [{'Sheet': sheet_name, 'DR Plan OCID': plan_id, 'Groups': len(plan_groups or ()),
+                'Steps': sum(len(group.steps or ()) for group in plan_groups or ()), 'Problems': problems(error)}
+               for sheet_name, plan_id, plan_groups, error in parsed_plans]
+    with st.expander(f"Parsed {len(parsed_plans)} plans"):
+        st.dataframe(summary, hide_index=True)
+
+def apply_workbook(profile, excel_file, max_workers):
+    """Parse every plan in the uploaded workbook or columnar file, then send the updates of the plans that changed"""
+    try:
+        plan_update = lazy_import("planUpdate")
+        with phase("load_region_map"):
+            region_map = load_region_map(REGION_FILE)
+
+        # Parse every sheet, or every plan of a columnar file, before anything is sent; reruns reuse the parse
+        parsed_plans = parse_uploaded_plans(excel_file, region_map)
+        if not parsed_plans:
+            if format_for_file(excel_file.name):
+                st.error(f"{excel_file.name} holds no plans.")
+            else:
+                st.error(f"The '{MANIFEST_SHEET}' sheet does not list any plans.")
+            return
+
+        # Only the update calls run here; their work requests are followed in the background
+        with st.spinner(f"Sending updates for {len(parsed_plans)} DR plans..."):
+            results = plan_update.update_plans(profile, parsed_plans, region_map, max_workers=int(max_workers),
+                                               tracker=get_work_request_tracker())
+
+        succeeded = sum(result['Status'] in ('ACCEPTED', 'UNCHANGED') for result in results)
+        if succeeded == len(results):
+            st.success(f"Sent updates for {succeeded} DR plans, their progress is shown below")
+        else:
+            st.error(f"{len(results) - succeeded} of {len(results)} DR plan updates did not succeed")
+        st.dataframe(results, hide_index=True)
+        for parsed_sheet_name, _, _, error in parsed_plans:
+            if isinstance(error, plan_update.PlanValidationError):
+                show_validation_errors(parsed_sheet_name, error)
+
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+
+@st.fragment(run_every=2)
+def show_work_request_progress():
+    """Redraw work request progress every two seconds without rerunning the rest of the page"""
+    tracker = st.session_state.get('work_request_tracker')
+    if tracker is None:
+        return
+    progress = tracker.progress()
+    if not progress:
+        return
+
+    st.subheader("Work requests")
+    for entry in progress:
+        percent = min(max(entry['Percent Complete'], 0.0), 100.0)
+        st.progress(percent / 100, text=f"{entry['Plan']}: {entry['Status']} ({percent:.0f}%)")
+        if entry['Errors']:
+            st.error(f"{entry['Plan']}: {entry['Errors']}")
+    with st.expander("Work request details"):
+        st.dataframe(progress, hide_index=True)
+    if st.button("Clear finished work requests"):
+        tracker.clear_finished()
+        st.rerun(scope="fragment")
 
 def main():
     st.title("FSDR Plans Update")
@@ -320,65 +246,13 @@ def main():
         st.error("Please select an OCI profile on the main page.")
         return
 
-    # Input fields
-    ocid = st.text_input("DR Plan OCID")
-    sheet_name = st.text_input("Sheet Name")
-    excel_file = st.file_uploader("Upload Excel File", type="xlsx")
-
-    if st.button("Update Plan"):
-        try:
-            # Load region map
-            region_file = os.path.join(os.path.dirname(__file__), "region_file.json")
-            region_map = load_region_map(region_file)
-            region = get_region_from_ocid(ocid, region_map)
-
-            # Set up OCI config and signer
-            config = oci.config.from_file(profile_name=st.session_state['oci_profile'])
-            config['region'] = region
-            signer = oci.signer.Signer.from_config(config)
-
-            # Initialize Disaster Recovery client
-            disaster_recovery_client = oci.disaster_recovery.DisasterRecoveryClient(config=config, signer=signer)
-
-            # Load Excel file
-            workbook = openpyxl.load_workbook(BytesIO(excel_file.read()))
-            sheet = workbook[sheet_name]
-
-            # Process Excel data
-            plan_groups_dict = {}
-            ordered_plan_groups = []
-
-            for row in sheet.iter_rows(min_row=2, max_row=sheet.max_row):
-                row_values = [get_merged_cell_value(sheet, row[0].row, col) for col in range(1, sheet.max_column + 1)]
-                id_value = str(row_values[1])
-                type_value = str(row_values[19])
-
-                row_values = [None if val in ["None", None] else val for val in row_values]
-
-                if type_value == "USER_DEFINED":
-                    if id_value == "None":
-                        plan_groups_dict, plan_group_details = new_plan(row_values, plan_groups_dict)
-                    else:
-                        plan_groups_dict, plan_group_details = existing_plan(row_values, plan_groups_dict)
-                elif type_value == "USER_DEFINED_PAUSE":
-                    plan_groups_dict, plan_group_details = pause_plan(row_values, plan_groups_dict)
-                else:
-                    plan_groups_dict, plan_group_details = builtin_function(row_values, plan_groups_dict)
-
-                ordered_plan_groups.append(plan_group_details)
-
-            final_plan_groups = list(plan_groups_dict.values())
-
-            # Update DR Plan
-            update_dr_plan_details = oci.disaster_recovery.models.UpdateDrPlanDetails(plan_groups=final_plan_groups)
-            update_dr_plan_response = disaster_recovery_client.update_dr_plan(
-                update_dr_plan_details=update_dr_plan_details,
-                dr_plan_id=ocid
-            )
-            st.success(f"Update to DR Plan {ocid} is successful")
-
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
+    update_mode = st.radio("Update mode", ["Single plan", "Multiple plans"], horizontal=True)
+    if update_mode == "Single plan":
+        update_single_plan(st.session_state['oci_profile'])
+    else:
+        update_multiple_plans(st.session_state['oci_profile'])
+
+    show_work_request_progress()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+# Set FSDR_METRICS=1 to log every phase as JSON and keep Prometheus-style counters and histograms
+METRICS_ENABLED = False
+# Where the Prometheus text is written after every run, when set
+METRICS_FILE = None
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_current_run = ContextVar("fsdr_metrics_run", default=None)
+# Returned by phase() when nothing is listening, so a disabled phase costs one lookup
+_NO_PHASE = nullcontext()
+
+class PhaseRun:
+    """Phase timings of one export or update, for the timing breakdown"""
+
+    def __init__(self, name):
+        self.name = name
+        self.phases = []
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def record(self, phase_name, seconds):
+        # list.append is atomic, so worker threads can record into the same run
+        self.phases.append((phase_name, seconds))
+
+    def breakdown(self):
+        """One row per phase in first-seen order; phases run on worker threads can add up to more than the total"""
+        totals = {}
+        for phase_name, seconds in self.phases:
+            calls, total, longest = totals.get(phase_name, (0, 0.0, 0.0))
+            totals[phase_name] = (calls + 1, total + seconds, max(longest, seconds))
+        elapsed = self.seconds if self.seconds is not None else time.perf_counter() - self.started
+        return [{'Phase': phase_name, 'Calls': calls, 'Total (s)': round(total, 4), 'Max (s)': round(longest, 4),
+                 'Share': f"{total / elapsed:.0%}" if elapsed else None}
+                for phase_name, (calls, total, longest) in totals.items()]
+
+class _Phase:
+    __slots__ = ('name', 'run', 'fields', 'start')
+
+    def __init__(self, name, run, fields):
+        self.name = name
+        self.run = run
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        seconds = time.perf_counter() - self.start
+        if self.run is not None:
+            self.run.record(self.name, seconds)
+        if METRICS_ENABLED:
+            outcome = 'ok' if exc_type is None else 'error'
+            REGISTRY.observe('fsdr_phase', seconds, phase=self.name, outcome=outcome)
+            log_event('phase', phase=self.name, seconds=round(seconds, 6), outcome=outcome,
+                      run=self.run.name if self.run is not None else None, **self.fields)
+        return False
+
+def phase(name, **fields):
+    """Time a block as one phase of the current run; fields only go to the JSON log"""
+    run = _current_run.get()
+    if run is None and not METRICS_ENABLED:
+        return _NO_PHASE
+    return _Phase(name, run, fields)
+
+@contextmanager
+def metrics_run(name, **fields):
+    """Collect the phases timed inside the block, including those of threads started with propagate()"""
+    run = PhaseRun(name)
+    token = _current_run.set(run)
+    outcome = 'error'
+    try:
+        yield run
+        outcome = 'ok'
+    finally:
+        _current_run.reset(token)
+        run.seconds = time.perf_counter() - run.started
+        if METRICS_ENABLED:
+            REGISTRY.observe('fsdr_run', run.seconds, run=name, outcome=outcome)
+            log_event('run', run=name, seconds=round(run.seconds, 6), outcome=outcome,
+                      phases=run.breakdown(), **fields)
+            if METRICS_FILE:
+                write_prometheus(METRICS_FILE)
+
+def propagate(function):
+    """Wrap a function handed to a thread pool so its phases land in the caller's run"""
+    run = _current_run.get()
+    if run is None:
+        return function
+
+    def in_run(*args, **kwargs):
+        token = _current_run.set(run)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _current_run.reset(token)
+    return in_run
+
+def count(name, amount=1, **labels):
+    """Add to a counter, such as rows parsed; a no-op unless metrics are enabled"""
+    if METRICS_ENABLED:
+        REGISTRY.increment(name, amount, **labels)
+
+def observe(name, seconds, **labels):
+    """Add a timed call, such as one API request, to a duration histogram; a no-op unless metrics are enabled"""
+    if METRICS_ENABLED:
+        REGISTRY.observe(name, seconds, **labels)
+
+def log_event(event, **fields):
+    logger.info(json.dumps(dict(fields, event=event, time=time.time()), default=str))
+
+class MetricsRegistry:
+    """Counters and histograms kept in memory and rendered in the Prometheus text format"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        """Count one timed call and add it to the name's duration histogram"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += 1
+            histogram[2] += seconds
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(buckets), total, seconds))
+                                for key, (buckets, total, seconds) in self._histograms.items())
+        lines = []
+        for name in dict.fromkeys(name for (name, _), _ in counters):
+            lines.append(f"# TYPE {name}_total counter")
+            lines += [f"{name}_total{format_labels(labels)} {value}"
+                      for (counter_name, labels), value in counters if counter_name == name]
+        for name in dict.fromkeys(name for (name, _), _ in histograms):
+            lines.append(f"# TYPE {name}_duration_seconds histogram")
+            for (histogram_name, labels), (buckets, total, seconds) in histograms:
+                if histogram_name != name:
+                    continue
+                for bound, observed in zip(self.buckets, buckets):
+                    lines.append(f"{name}_duration_seconds_bucket{format_labels(labels + (('le', bound),))} {observed}")
+                lines.append(f"{name}_duration_seconds_bucket{format_labels(labels + (('le', '+Inf'),))} {total}")
+                lines.append(f"{name}_duration_seconds_count{format_labels(labels)} {total}")
+                lines.append(f"{name}_duration_seconds_sum{format_labels(labels)} {seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+REGISTRY = MetricsRegistry()
+
+def write_prometheus(path):
+    """Write the metrics atomically, for node_exporter's textfile collector or any scraper reading files"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        f.write(REGISTRY.render())
+    os.replace(temp_path, path)
+
+def enable_metrics(enabled=True, metrics_file=None, stream=None):
+    """Turn JSON phase logs and the registry on or off; JSON lines go to stderr unless logging is set up already"""
+    global METRICS_ENABLED, METRICS_FILE
+    METRICS_ENABLED = enabled
+    METRICS_FILE = metrics_file
+    if enabled and not logger.handlers:
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        # Keep the JSON lines out of the root logger's plain text format
+        logger.propagate = False
+
+if os.environ.get("FSDR_METRICS", "").lower() in ("1", "true", "yes", "on"):
+    enable_metrics(metrics_file=os.environ.get("FSDR_METRICS_FILE") or None)
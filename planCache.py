@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict, namedtuple
+
+from apiResilience import failure_kind
+from perfMetrics import count, phase
+
+DEFAULT_CACHE_DIR = os.environ.get("FSDR_PLAN_CACHE_DIR", os.path.expanduser("~/.fsdr_plans/cache"))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+# Bump when the flattened export layout changes so old snapshots are refetched
+SNAPSHOT_FORMAT_VERSION = 2
+# Parsed uploads one browser session may keep in memory
+DEFAULT_PARSE_CACHE_BYTES = 128 * 1024 * 1024
+
+PlanSnapshot = namedtuple('PlanSnapshot', ['plan_id', 'display_name', 'dataframe', 'metadata', 'source'])
+
+class PlanSnapshotCache:
+    """On-disk cache of flattened plan exports keyed by DR plan OCID"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def path(self, plan_id):
+        return os.path.join(self.directory, f"{plan_id}.json")
+
+    def load(self, plan_id):
+        """Return (metadata, DataFrame) for a plan, or None when missing, expired or unreadable"""
+        import pandas as pd
+
+        path = self.path(plan_id)
+        try:
+            with open(path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        metadata = snapshot.get('metadata', {})
+        expired = time.time() - metadata.get('cached_at', 0) > self.max_age_seconds
+        if expired or metadata.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            self.remove(plan_id)
+            return None
+        dataframe = pd.DataFrame.from_records(snapshot['rows'], columns=snapshot['columns'])
+        # JSON nulls come back as None; missing cells are NaN everywhere else
+        dataframe = dataframe.mask(dataframe.isna(), float('nan'))
+        # Restore the dtypes the fetched plan was flattened with, so cached and fresh frames compare equal
+        return metadata, dataframe.astype({column: dtype for column, dtype in zip(snapshot['columns'], snapshot['dtypes'])
+                                           if dtype != 'object'})
+
+    def store(self, plan_id, metadata, dataframe):
+        """Write a snapshot atomically, then evict down to the size limit"""
+        os.makedirs(self.directory, exist_ok=True)
+        metadata = dict(metadata, cached_at=time.time(), format_version=SNAPSHOT_FORMAT_VERSION)
+        snapshot = {
+            'metadata': metadata,
+            'columns': list(dataframe.columns),
+            'dtypes': [str(dtype) for dtype in dataframe.dtypes],
+            'rows': dataframe.astype(object).where(dataframe.notna(), None).values.tolist(),
+        }
+        path = self.path(plan_id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(temp_path, path)
+        self.evict()
+        return metadata
+
+    def remove(self, plan_id):
+        try:
+            os.remove(self.path(plan_id))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop expired snapshots, then the least recently written ones until under max_bytes"""
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                remove_file(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            remove_file(path)
+            total -= size
+
+def remove_file(path):
+    """Remove a file another thread may have evicted already"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def plan_metadata(plan, etag=None):
+    return {
+        'plan_id': plan.id,
+        'display_name': plan.display_name,
+        'dr_protection_group_id': plan.dr_protection_group_id,
+        'time_updated': plan.time_updated.isoformat() if plan.time_updated else None,
+        'etag': etag,
+    }
+
+def is_unchanged(disaster_recovery_client, metadata):
+    """Check the cached time_updated against the plan summary, which is far cheaper than get_dr_plan"""
+    if not metadata.get('dr_protection_group_id') or not metadata.get('time_updated'):
+        return False
+    summaries = disaster_recovery_client.list_dr_plans(
+        dr_protection_group_id=metadata['dr_protection_group_id'],
+        dr_plan_id=metadata['plan_id']
+    ).data.items
+    return any(
+        summary.id == metadata['plan_id'] and summary.time_updated
+        and summary.time_updated.isoformat() == metadata['time_updated']
+        for summary in summaries
+    )
+
+def get_plan_snapshot(disaster_recovery_client, plan_id, flatten, cache=None):
+    """Return a PlanSnapshot, served from the cache when the plan has not changed since it was stored.
+
+    source is 'cache' when the cached copy is current, 'fresh' when the plan was fetched,
+    and 'stale' when the freshness check was throttled or hit a server or connection error
+    and the cached copy was served anyway. Any other failure, such as a deleted plan, a
+    rejected key or an open circuit, is raised.
+    """
+    with phase("cache_load", plan_id=plan_id):
+        cached = cache.load(plan_id) if cache else None
+    if cached:
+        metadata, dataframe = cached
+        try:
+            with phase("freshness_check", plan_id=plan_id):
+                unchanged = is_unchanged(disaster_recovery_client, metadata)
+            if unchanged:
+                return PlanSnapshot(plan_id, metadata['display_name'], dataframe, metadata, 'cache')
+        except Exception as e:
+            if failure_kind(e) is None:
+                raise
+            return PlanSnapshot(plan_id, metadata['display_name'], dataframe, metadata, 'stale')
+
+    with phase("get_dr_plan", plan_id=plan_id):
+        response = disaster_recovery_client.get_dr_plan(dr_plan_id=plan_id)
+    plan = response.data
+    with phase("flatten", plan_id=plan_id):
+        dataframe = flatten(plan)
+    metadata = plan_metadata(plan, response.headers.get('etag'))
+    if cache:
+        with phase("cache_store", plan_id=plan_id):
+            metadata = cache.store(plan_id, metadata, dataframe)
+    return PlanSnapshot(plan_id, plan.display_name, dataframe, metadata, 'fresh')
+
+def upload_key(data, *parts):
+    """Key of a parsed upload: the SHA-256 of its bytes plus everything else the parse depended on"""
+    return (hashlib.sha256(data).hexdigest(),) + parts
+
+class ParseCache:
+    """In-memory LRU of parsed uploads, evicting the least recently used ones past max_bytes
+
+    Sizes are estimates handed in by the caller, since measuring nested SDK models
+    exactly would cost about as much as parsing them again.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PARSE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+
+    def get_or_parse(self, key, parse, size):
+        """Return (value, hit): the cached value for key, or parse() stored with its size(value)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            count("fsdr_parse_cache", outcome='hit')
+            return entry[0], True
+        count("fsdr_parse_cache", outcome='miss')
+        value = parse()
+        value_bytes = size(value)
+        if value_bytes <= self.max_bytes:
+            self._entries[key] = (value, value_bytes)
+            self.total_bytes += value_bytes
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+        return value, False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
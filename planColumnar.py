@@ -0,0 +1,82 @@
+import json
+
+import pandas as pd
+
+from commonLib import COLUMNAR_FORMATS, available_formats
+from planColumns import EXPORT_COLUMNS
+from planValidation import SHEET_COLUMNS
+
+PLAN_ID_COLUMN = 'dr_plan_id'
+PLAN_NAME_COLUMN = 'dr_plan_name'
+COLUMNAR_COLUMNS = [PLAN_ID_COLUMN, PLAN_NAME_COLUMN] + EXPORT_COLUMNS
+# Exact dtypes for the non-text columns; every other column is text
+COLUMN_TYPES = {'steps.timeout': 'Int64', 'steps.is_enabled': 'boolean', 'is_pause_enabled': 'boolean'}
+PARQUET_MAGIC = b'PAR1'
+ARROW_MAGIC = b'ARROW1'
+
+def sniff_format(source):
+    """Tell Parquet, Arrow IPC and JSON Lines apart by their first bytes"""
+    head = source.read(len(ARROW_MAGIC))
+    source.seek(0)
+    if head.startswith(PARQUET_MAGIC):
+        return 'parquet'
+    if head.startswith(ARROW_MAGIC):
+        return 'arrow'
+    return 'jsonl'
+
+def typed_frame(frame):
+    """Give every column its exact dtype: nullable text, Int64 timeouts and boolean flags"""
+    frame = frame.reindex(columns=COLUMNAR_COLUMNS)
+    return frame.astype({column: COLUMN_TYPES.get(column, 'string') for column in COLUMNAR_COLUMNS})
+
+def snapshots_to_frame(snapshots):
+    """Stack plan snapshots into one frame, each row tagged with its plan's OCID and name"""
+    frames = [snapshot.dataframe.assign(**{PLAN_ID_COLUMN: snapshot.plan_id, PLAN_NAME_COLUMN: snapshot.display_name})
+              for snapshot in snapshots]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNAR_COLUMNS)
+    return typed_frame(frame)
+
+def write_columnar(output, frame, file_format):
+    if file_format not in available_formats():
+        raise ValueError(f"Writing {file_format} needs pyarrow; install it or use one of {available_formats()}")
+    if file_format == 'parquet':
+        frame.to_parquet(output, index=False)
+    elif file_format == 'arrow':
+        frame.to_feather(output)
+    elif file_format == 'jsonl':
+        records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+        output.write(''.join(json.dumps(record) + '\n' for record in records).encode('utf-8'))
+    else:
+        raise ValueError(f"Unknown columnar format {file_format!r}, expected one of {list(COLUMNAR_FORMATS)}")
+
+def write_plans_columnar(output, snapshots, file_format):
+    """Write every plan snapshot to one columnar file, returning a manifest row per plan"""
+    write_columnar(output, snapshots_to_frame(snapshots), file_format)
+    return [{'DR Plan OCID': snapshot.plan_id, 'Plan': snapshot.display_name, 'Rows': len(snapshot.dataframe),
+             'Source': snapshot.source} for snapshot in snapshots]
+
+def read_columnar(source, file_format=None):
+    """Read a columnar plan file back into a frame with the exact dtypes it was written with"""
+    file_format = file_format or sniff_format(source)
+    if file_format == 'parquet':
+        frame = pd.read_parquet(source)
+    elif file_format == 'arrow':
+        frame = pd.read_feather(source)
+    elif file_format == 'jsonl':
+        lines = source.read().decode('utf-8').splitlines()
+        frame = pd.DataFrame.from_records([json.loads(line) for line in lines if line.strip()])
+    else:
+        raise ValueError(f"Unknown columnar format {file_format!r}, expected one of {list(COLUMNAR_FORMATS)}")
+    missing = [column for column in (PLAN_ID_COLUMN,) + tuple(SHEET_COLUMNS) if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Not a plan export: missing columns {missing}")
+    return typed_frame(frame)
+
+def iter_plan_rows(frame):
+    """Yield (plan name, plan OCID, rows) per plan in file order, with rows laid out like sheet rows"""
+    for plan_id, plan_frame in frame.groupby(PLAN_ID_COLUMN, sort=False, dropna=False):
+        values = plan_frame[SHEET_COLUMNS].astype(object)
+        rows = values.where(values.notna(), None).values.tolist()
+        plan_id = None if pd.isna(plan_id) else plan_id
+        name = plan_frame[PLAN_NAME_COLUMN].iloc[0]
+        yield (plan_id if pd.isna(name) else name), plan_id, rows
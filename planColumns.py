@@ -0,0 +1,17 @@
+# The columns of an exported plan sheet and the values some of them allow. They live apart from
+# planExport so that validation and the columnar formats can use them without loading the SDK.
+EXPORT_COLUMNS = [
+    'display_name', 'id', 'steps.display_name', 'steps.error_mode', 'steps.id', 'steps.is_enabled',
+    'steps.timeout', 'steps.type', 'steps.user_defined_step.step_type',
+    'steps.user_defined_step.run_as_user', 'steps.user_defined_step.run_on_instance_id',
+    'steps.user_defined_step.function_id', 'steps.user_defined_step.function_region', 'steps.user_defined_step.request_body',
+    'steps.user_defined_step.object_storage_script_location.bucket', 'steps.user_defined_step.object_storage_script_location.namespace', 'steps.user_defined_step.object_storage_script_location.object',
+    'steps.user_defined_step.run_on_instance_region', 'steps.user_defined_step.script_command', 'type', 'is_pause_enabled'
+]
+USER_DEFINED_STEP_TYPES = ['RUN_LOCAL_SCRIPT', 'RUN_OBJECTSTORE_SCRIPT', 'INVOKE_FUNCTION']
+ERROR_MODES = ['STOP_ON_ERROR', 'CONTINUE_ON_ERROR']
+# (region column, OCID column) pairs where a blank region can be read off the step's OCID
+STEP_REGION_COLUMNS = [
+    ('steps.user_defined_step.run_on_instance_region', 'steps.user_defined_step.run_on_instance_id'),
+    ('steps.user_defined_step.function_region', 'steps.user_defined_step.function_id'),
+]
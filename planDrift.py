@@ -0,0 +1,213 @@
+import json
+
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from perfMetrics import phase
+from planExport import HEADER_BORDER, HEADER_FILL_PURPLE, HEADER_FONT, column_widths, fetch_plans
+from planUpdate import normalize_value
+
+# Fields that should match between a plan and its counterpart in the other region
+STEP_DRIFT_FIELDS = [
+    'steps.error_mode', 'steps.is_enabled', 'steps.timeout', 'steps.type', 'steps.user_defined_step.step_type',
+    'steps.user_defined_step.run_as_user', 'steps.user_defined_step.request_body',
+    'steps.user_defined_step.object_storage_script_location.bucket',
+    'steps.user_defined_step.object_storage_script_location.namespace',
+    'steps.user_defined_step.object_storage_script_location.object', 'steps.user_defined_step.script_command',
+]
+# Fields that name resources of the plan's own region, so they differ between regions by design
+REGIONAL_DRIFT_FIELDS = [
+    'steps.user_defined_step.run_on_instance_id', 'steps.user_defined_step.run_on_instance_region',
+    'steps.user_defined_step.function_id', 'steps.user_defined_step.function_region',
+]
+GROUP_DRIFT_FIELDS = ['type', 'is_pause_enabled']
+# What a step does, for recognising a step renamed on one side
+STEP_CONTENT_FIELDS = [
+    'steps.user_defined_step.step_type', 'steps.user_defined_step.script_command',
+    'steps.user_defined_step.object_storage_script_location.object', 'steps.user_defined_step.request_body',
+]
+USER_DEFINED_GROUP_TYPES = ('USER_DEFINED', 'USER_DEFINED_PAUSE')
+DRIFT_COLUMNS = ['Change', 'Group', 'Step', 'Field', 'Left', 'Right']
+
+def name_key(name):
+    return str(name).strip().casefold() if name is not None else ''
+
+def plan_layout(dataframe, fields, user_defined_only=True):
+    """Group a flattened plan's rows by group name in plan order: {group key: (name, group fields, steps)}
+
+    Each step is (name, {field: normalized value}), read in one pass over the rows.
+    """
+    columns = ['display_name', 'steps.display_name'] + GROUP_DRIFT_FIELDS + fields
+    values = dataframe.reindex(columns=columns).to_numpy(dtype=object).tolist()
+    groups = {}
+    for row in values:
+        # NaN is the only value not equal to itself, and stands for an empty cell
+        row = [None if value != value else normalize_value(value) for value in row]
+        group_name, step_name = row[0], row[1]
+        group_fields = dict(zip(GROUP_DRIFT_FIELDS, row[2:2 + len(GROUP_DRIFT_FIELDS)]))
+        if user_defined_only and group_fields['type'] not in USER_DEFINED_GROUP_TYPES:
+            continue
+        group = groups.get(name_key(group_name))
+        if group is None:
+            group = groups[name_key(group_name)] = (group_name, group_fields, [])
+        elif group_fields['is_pause_enabled'] is not None:
+            group[1]['is_pause_enabled'] = group_fields['is_pause_enabled']
+        if step_name is not None:
+            group[2].append((step_name, dict(zip(fields, row[2 + len(GROUP_DRIFT_FIELDS):]))))
+    return groups
+
+def keyed_steps(steps):
+    """Key steps by name and occurrence, so two steps of the same name pair up in order"""
+    keyed = {}
+    occurrences = {}
+    for step in steps:
+        key = name_key(step[0])
+        occurrences[key] = occurrences.get(key, 0) + 1
+        keyed[(key, occurrences[key])] = step
+    return keyed
+
+def order_differs(left, right, key=lambda step: name_key(step[0])):
+    """Whether the items both sides have come in a different order on each side"""
+    left_keys = [key(item) for item in left]
+    right_keys = [key(item) for item in right]
+    shared = set(left_keys) & set(right_keys)
+    return [item for item in left_keys if item in shared] != [item for item in right_keys if item in shared]
+
+def content_key(step_fields):
+    content = tuple(step_fields.get(field) for field in STEP_CONTENT_FIELDS)
+    # Only steps that run something recognisable can be told apart by what they run
+    return content if any(content[1:]) else None
+
+def compare_plans(left, right, include_regional=False, user_defined_only=True):
+    """Drift between two flattened plans, aligning groups by name and steps by name, then by what they run
+
+    Runs in time linear in the number of rows: every alignment is a dict lookup.
+    """
+    fields = STEP_DRIFT_FIELDS + (REGIONAL_DRIFT_FIELDS if include_regional else [])
+    left_groups = plan_layout(left, fields, user_defined_only)
+    right_groups = plan_layout(right, fields, user_defined_only)
+    drift = []
+
+    def record(change, group, step=None, field=None, left_value=None, right_value=None):
+        drift.append(dict(zip(DRIFT_COLUMNS, (change, group, step, field, left_value, right_value))))
+
+    def compare_fields(group_name, step_name, left_fields, right_fields):
+        for field, left_value in left_fields.items():
+            if left_value != right_fields[field]:
+                record('differs', group_name, step_name, field, left_value, right_fields[field])
+
+    for key, (group_name, left_fields, left_steps) in left_groups.items():
+        if key not in right_groups:
+            record('only in left', group_name, left_value=f"{len(left_steps)} steps")
+            continue
+        _, right_fields, right_steps = right_groups[key]
+        compare_fields(group_name, None, left_fields, right_fields)
+
+        left_keyed = keyed_steps(left_steps)
+        right_keyed = keyed_steps(right_steps)
+        left_only = []
+        for step_key, (step_name, step_fields) in left_keyed.items():
+            right_step = right_keyed.pop(step_key, None)
+            if right_step is None:
+                left_only.append((step_name, step_fields))
+            else:
+                compare_fields(group_name, step_name, step_fields, right_step[1])
+
+        # Steps left over on both sides pair up when they run the same thing under another name
+        right_by_content = {}
+        for step_key, (_, step_fields) in right_keyed.items():
+            right_by_content.setdefault(content_key(step_fields), []).append(step_key)
+        right_by_content.pop(None, None)
+        for step_name, step_fields in left_only:
+            candidates = right_by_content.get(content_key(step_fields))
+            if not candidates:
+                record('only in left', group_name, step_name)
+                continue
+            right_name, right_step_fields = right_keyed.pop(candidates.pop(0))
+            record('renamed', group_name, step_name, 'steps.display_name', step_name, right_name)
+            compare_fields(group_name, step_name, step_fields, right_step_fields)
+        for right_name, _ in right_keyed.values():
+            record('only in right', group_name, right_name)
+
+        if order_differs(left_steps, right_steps):
+            record('reordered', group_name, field='steps')
+
+    for key, (group_name, _, right_steps) in right_groups.items():
+        if key not in left_groups:
+            record('only in right', group_name, right_value=f"{len(right_steps)} steps")
+
+    if order_differs(list(left_groups), list(right_groups), key=lambda key: key):
+        record('reordered', None, field='plan_groups')
+    return drift
+
+def compare_plan_pairs(profile, pairs, region_map, max_workers=8, cache=None, include_regional=False,
+                       user_defined_only=True):
+    """Fetch every plan of the (left OCID, right OCID) pairs concurrently, each once, and compare each pair
+
+    Returns (left snapshot, right snapshot, drift) per pair that could be fetched, and (plan OCID, error) per plan
+    that could not. A snapshot whose source is 'stale' is a cached copy that could not be checked for changes,
+    which drift_summary and stale_plan_ids report.
+    """
+    plan_ids = list(dict.fromkeys(plan_id for pair in pairs for plan_id in pair))
+    results = fetch_plans(profile, plan_ids, region_map, max_workers=max_workers, cache=cache)
+    snapshots = {plan_id: snapshot for plan_id, snapshot, error in results if error is None}
+    failed = [(plan_id, error) for plan_id, _, error in results if error is not None]
+    compared = []
+    with phase("compare_plans", pairs=len(pairs)):
+        for left_id, right_id in pairs:
+            if left_id in snapshots and right_id in snapshots:
+                left, right = snapshots[left_id], snapshots[right_id]
+                compared.append((left, right, compare_plans(left.dataframe, right.dataframe, include_regional,
+                                                            user_defined_only)))
+    return compared, failed
+
+def stale_plan_ids(compared):
+    """OCIDs of the compared plans served from a cached snapshot that could not be checked for changes"""
+    return list(dict.fromkeys(snapshot.plan_id for left, right, _ in compared for snapshot in (left, right)
+                              if snapshot.source == 'stale'))
+
+def drift_summary(compared):
+    """One row per compared pair, counting each kind of drift and warning of sides that may be out of date"""
+    summary = []
+    for left, right, drift in compared:
+        counts = {}
+        for row in drift:
+            counts[row['Change']] = counts.get(row['Change'], 0) + 1
+        stale = [side for side, snapshot in (('left', left), ('right', right)) if snapshot.source == 'stale']
+        summary.append({'Left Plan': left.display_name, 'Left Plan OCID': left.plan_id,
+                        'Right Plan': right.display_name, 'Right Plan OCID': right.plan_id,
+                        'Status': 'drifted' if drift else 'in sync', 'Differences': len(drift),
+                        **{change.capitalize(): counts.get(change, 0) for change in
+                           ('only in left', 'only in right', 'differs', 'renamed', 'reordered')},
+                        'Warning': f"The {' and '.join(stale)} plan{'s' if len(stale) > 1 else ''} came from the "
+                                   "cache without a check for changes and may be out of date" if stale else ''})
+    return summary
+
+def drift_rows(compared):
+    """Every drift row of every pair, tagged with the pair's plan names"""
+    return [{'Left Plan': left.display_name, 'Right Plan': right.display_name, **row}
+            for left, right, drift in compared for row in drift]
+
+def write_drift_workbook(output, compared):
+    """Write a Summary sheet with a row per pair and a Drift sheet with every difference"""
+    with phase("write_workbook"), pd.ExcelWriter(output, engine='openpyxl') as writer:
+        sheets = {'Summary': pd.DataFrame(drift_summary(compared)),
+                  'Drift': pd.DataFrame(drift_rows(compared), columns=['Left Plan', 'Right Plan'] + DRIFT_COLUMNS)}
+        for sheet_name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=sheet_name, index=False)
+            worksheet = writer.sheets[sheet_name]
+            for cell in worksheet[1]:
+                cell.fill = HEADER_FILL_PURPLE
+                cell.font = HEADER_FONT
+                cell.border = HEADER_BORDER
+            for col_index, width in enumerate(column_widths(frame), start=1):
+                worksheet.column_dimensions[get_column_letter(col_index)].width = width
+            worksheet.freeze_panes = 'A2'
+
+def drift_json(compared):
+    """The drift report as JSON: one object per pair with its plans, where each came from, and differences"""
+    return json.dumps([{'left': {'plan_id': left.plan_id, 'display_name': left.display_name,
+                                 'source': left.source},
+                        'right': {'plan_id': right.plan_id, 'display_name': right.display_name,
+                                  'source': right.source},
+                        'drift': drift} for left, right, drift in compared], indent=2, default=str)
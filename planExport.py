@@ -0,0 +1,331 @@
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import copy
+from functools import partial
+from io import BytesIO
+
+import numpy as np
+import oci
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment, PatternFill, Font, Border, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from commonLib import MANIFEST_SHEET, TEMPLATE_FILE, get_dr_client, get_region_from_ocid
+from perfMetrics import phase, propagate
+from planCache import get_plan_snapshot
+from planColumns import ERROR_MODES, EXPORT_COLUMNS, STEP_REGION_COLUMNS, USER_DEFINED_STEP_TYPES
+from regionLookup import UNKNOWN_REGION, resolve_plan_regions
+
+INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+# Dropdowns of the columns with a fixed set of values, the same lists pre-flight validation accepts
+EXPORT_DROPDOWNS = {'steps.error_mode': ERROR_MODES, 'steps.user_defined_step.step_type': USER_DEFINED_STEP_TYPES}
+# Cells a row has no value for are NaN, as json_normalize/concat used to produce
+EMPTY_USER_DEFINED_STEP = (float('nan'),) * 11
+EMPTY_STEP = (float('nan'),) * 6
+
+def flatten_user_defined_step(user_defined_step):
+    """Return the user-defined step columns of one step as a tuple"""
+    if not user_defined_step:
+        return EMPTY_USER_DEFINED_STEP
+    script_location = getattr(user_defined_step, 'object_storage_script_location', None)
+    return (
+        user_defined_step.step_type,
+        getattr(user_defined_step, 'run_as_user', None),
+        getattr(user_defined_step, 'run_on_instance_id', None),
+        getattr(user_defined_step, 'function_id', None),
+        getattr(user_defined_step, 'function_region', None),
+        getattr(user_defined_step, 'request_body', None),
+        getattr(script_location, 'bucket', None) if script_location else None,
+        getattr(script_location, 'namespace', None) if script_location else None,
+        getattr(script_location, 'object', None) if script_location else None,
+        getattr(user_defined_step, 'run_on_instance_region', None),
+        getattr(user_defined_step, 'script_command', None),
+    )
+
+def plan_to_dataframe(plan, region_map=None):
+    """Flatten a DrPlan into the export's row layout in a single pass
+
+    With a region map, blank step regions are filled in from the OCIDs the steps run on.
+    """
+    rows = []
+    for pg in plan.plan_groups:
+        group = (pg.display_name, pg.id)
+        is_built_in = pg.type == 'BUILT_IN'
+        for step in pg.steps or ():
+            # Built-in groups never export user-defined step columns
+            user_defined_step = EMPTY_USER_DEFINED_STEP if is_built_in else flatten_user_defined_step(step.user_defined_step)
+            rows.append(group + (
+                step.display_name, step.error_mode, step.id, step.is_enabled, step.timeout, step.type
+            ) + user_defined_step + (pg.type, float('nan')))
+        if pg.type == 'USER_DEFINED_PAUSE':
+            rows.append(group + EMPTY_STEP + EMPTY_USER_DEFINED_STEP + (pg.type, pg.is_pause_enabled))
+    combined_data = pd.DataFrame.from_records(rows, columns=EXPORT_COLUMNS)
+    if region_map is not None:
+        fill_step_regions(combined_data, plan, region_map)
+    return combined_data
+
+def fill_step_regions(combined_data, plan, region_map):
+    """Fill blank run_on_instance_region/function_region cells without any API call"""
+    regions = None
+    for region_column, ocid_column in STEP_REGION_COLUMNS:
+        blank = combined_data[region_column].isna() & combined_data[ocid_column].notna()
+        if not blank.any():
+            continue
+        if regions is None:
+            regions = resolve_plan_regions(plan, region_map)
+        filled = combined_data.loc[blank, ocid_column].map(regions)
+        combined_data[region_column] = combined_data[region_column].mask(blank, filled.where(filled != UNKNOWN_REGION))
+
+MERGED_COLUMNS = ['display_name', 'id']
+HIGHLIGHTED_HEADER_COLUMNS = ['A', 'B', 'T']
+HEADER_FILL_BLUE = PatternFill(start_color="346EC9", end_color="346EC9", fill_type="solid")
+HEADER_FILL_PURPLE = PatternFill(start_color="858491", end_color="858491", fill_type="solid")
+HEADER_FONT = Font(color="FFFFFF", bold=True)
+HEADER_BORDER = Border(*(Side(style='thin'),) * 4)
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+MERGED_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+MANIFEST_COLUMNS = ('Sheet Name', 'DR Plan OCID', 'Plan', 'Source')
+MANIFEST_HEADER_FONT = Font(bold=True)
+
+def merge_runs(values):
+    """Return (start, end) positions of runs of equal consecutive values longer than one row"""
+    if len(values) < 2:
+        return []
+    # factorize keeps missing values as their own code, so empty cells merge like equal ones
+    codes = pd.factorize(values, use_na_sentinel=False)[0]
+    boundaries = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(codes)])) - 1
+    return [(start, end) for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+
+def column_widths(combined_data):
+    """Width per column: the longest header or text value plus padding"""
+    widths = []
+    for column in combined_data.columns:
+        values = combined_data[column]
+        if pd.api.types.is_string_dtype(values.dtype) and values.dtype != object:
+            lengths = values.str.len()
+        else:
+            # Only text cells count towards the width, as numbers and booleans never did
+            lengths = values.map(lambda value: len(value) if isinstance(value, str) else 0)
+        longest = lengths.max() if len(lengths) else 0
+        widths.append(max(len(str(column)), 0 if pd.isna(longest) else int(longest)) + 2)
+    return widths
+
+ExportTemplate = namedtuple('ExportTemplate', ['path', 'data', 'sheet_name', 'columns'])
+
+_templates = {}
+_templates_lock = threading.Lock()
+
+def template_sheet_name(book):
+    """The sheet whose first row starts with the export columns"""
+    for worksheet in book.worksheets:
+        header = [cell.value for cell in worksheet[1] if cell.value is not None]
+        if header and header == EXPORT_COLUMNS[:len(header)]:
+            return worksheet.title, header
+    return None, None
+
+def load_template(path=TEMPLATE_FILE):
+    """Read the export template once per process, or again after it changes; None when there is no template"""
+    if not path or not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    with _templates_lock:
+        cached = _templates.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with phase("load_template"):
+            with open(path, 'rb') as f:
+                data = f.read()
+            sheet_name, columns = template_sheet_name(openpyxl.load_workbook(BytesIO(data)))
+        if sheet_name is None:
+            raise ValueError(f"No sheet of {path} has the export columns in its first row")
+        template = ExportTemplate(path, data, sheet_name, columns)
+        _templates[path] = (mtime, template)
+        return template
+
+@contextmanager
+def export_workbook(output, template=None, sheet_names=()):
+    """Yield a workbook to add plan sheets to and the template sheet to start them from, then save it to output
+
+    The workbook is a clone of the template, parsed from the bytes read once per process, as openpyxl
+    workbooks cannot be copied. The template sheet is dropped before saving. The template's other sheets,
+    such as its Readme, are kept ahead of the plan sheets, except one named like a sheet in sheet_names,
+    which the caller is about to add.
+    """
+    if template is None:
+        book = openpyxl.Workbook()
+        book.remove(book.active)
+        template_sheet = None
+    else:
+        with phase("clone_template"):
+            book = openpyxl.load_workbook(BytesIO(template.data))
+        template_sheet = book[template.sheet_name]
+        reserved = {name.lower() for name in sheet_names}
+        for worksheet in book.worksheets:
+            if worksheet.title.lower() not in reserved:
+                continue
+            if worksheet is template_sheet:
+                # Still needed to copy from, so only renamed out of the way
+                worksheet.title = f"{worksheet.title} template"
+            else:
+                book.remove(worksheet)
+    yield book, template_sheet
+    if template_sheet is not None:
+        book.remove(template_sheet)
+        book.active = 0
+    with phase("save_workbook"):
+        book.save(output)
+
+def add_dropdowns(worksheet, template_sheet, columns, rows):
+    """Extend the template's data validations over the data rows and add the export dropdowns it lacks
+
+    One validation per column covers every row, so no cell is touched.
+    """
+    if not rows:
+        return
+    covered = set()
+    for validation in (template_sheet.data_validations.dataValidation if template_sheet is not None else ()):
+        extended = copy(validation)
+        ranges = []
+        for cell_range in validation.sqref.ranges:
+            for col_index in range(cell_range.min_col, cell_range.max_col + 1):
+                covered.add(col_index)
+                ranges.append(f"{get_column_letter(col_index)}2:{get_column_letter(col_index)}{rows + 1}")
+        extended.sqref = ' '.join(ranges)
+        worksheet.add_data_validation(extended)
+    for column, values in EXPORT_DROPDOWNS.items():
+        if column not in columns or columns.get_loc(column) + 1 in covered:
+            continue
+        letter = get_column_letter(columns.get_loc(column) + 1)
+        validation = DataValidation(type="list", formula1=f'"{",".join(values)}"', allow_blank=True,
+                                    showErrorMessage=True, errorTitle=column,
+                                    error=f"{column.rsplit('.', 1)[-1]} must be one of {', '.join(values)}")
+        validation.add(f"{letter}2:{letter}{rows + 1}")
+        worksheet.add_data_validation(validation)
+
+def write_plan_sheet(book, combined_data, sheet_name, template_sheet=None):
+    """Write one plan's rows to a sheet, a copy of template_sheet when given, else styled here in bulk"""
+    if template_sheet is not None:
+        # The copy brings the header row with its styles and the column widths; only the data is written
+        with phase("copy_template", sheet=sheet_name):
+            worksheet = book.copy_worksheet(template_sheet)
+            worksheet.title = sheet_name
+            header_cells = [cell for cell in worksheet[1] if cell.value is not None]
+            # Columns the template does not have take the style of its last header
+            last_header = header_cells[-1]
+            for col_index, column in enumerate(combined_data.columns[len(header_cells):], start=len(header_cells) + 1):
+                cell = worksheet.cell(row=1, column=col_index, value=column)
+                cell.font, cell.fill, cell.border = copy(last_header.font), copy(last_header.fill), copy(last_header.border)
+                cell.alignment, cell.number_format = copy(last_header.alignment), last_header.number_format
+                worksheet.column_dimensions[get_column_letter(col_index)].width = len(str(column)) + 2
+    else:
+        worksheet = book.create_sheet(title=sheet_name)
+
+    # Rows go in as {column: value} dicts so empty cells are never created
+    with phase("write_rows", sheet=sheet_name):
+        if template_sheet is None:
+            worksheet.append(list(combined_data.columns))
+        values = combined_data.astype(object).where(combined_data.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            worksheet.append({col_index: value for col_index, value in enumerate(row, start=1) if value is not None})
+
+    # Merge runs of the same plan group in columns A/B
+    with phase("merge_cells", sheet=sheet_name):
+        for column in MERGED_COLUMNS:
+            if column not in combined_data.columns:
+                continue
+            col_index = combined_data.columns.get_loc(column) + 1
+            for start, end in merge_runs(combined_data[column]):
+                worksheet.merge_cells(start_row=start + 2, start_column=col_index, end_row=end + 2, end_column=col_index)
+                worksheet.cell(row=start + 2, column=col_index).alignment = MERGED_ALIGNMENT
+
+    add_dropdowns(worksheet, template_sheet, combined_data.columns, len(combined_data))
+    if template_sheet is not None:
+        return
+
+    with phase("style_sheet", sheet=sheet_name):
+        for cell in worksheet[1]:
+            cell.fill = HEADER_FILL_BLUE if cell.column_letter in HIGHLIGHTED_HEADER_COLUMNS else HEADER_FILL_PURPLE
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+
+        for col_index, width in enumerate(column_widths(combined_data), start=1):
+            worksheet.column_dimensions[get_column_letter(col_index)].width = width
+
+def get_export_client(profile, ocid, region_map):
+    """Return the Disaster Recovery client for the region an OCID lives in"""
+    region = get_region_from_ocid(ocid, region_map)
+    return get_dr_client(profile, region)
+
+def list_plan_ids(profile, protection_group_id, region_map):
+    """Return the OCIDs of every DR plan in a DR protection group"""
+    disaster_recovery_client = get_export_client(profile, protection_group_id, region_map)
+    with phase("list_dr_plans", protection_group_id=protection_group_id):
+        response = oci.pagination.list_call_get_all_results(
+            disaster_recovery_client.list_dr_plans,
+            dr_protection_group_id=protection_group_id
+        )
+    return [plan.id for plan in response.data]
+
+def fetch_plans(profile, plan_ids, region_map, max_workers=8, cache=None):
+    """Fetch DR plan snapshots concurrently, returning (plan_id, snapshot, error) in input order"""
+    flatten = partial(plan_to_dataframe, region_map=region_map)
+
+    def fetch(plan_id):
+        try:
+            disaster_recovery_client = get_export_client(profile, plan_id, region_map)
+            return plan_id, get_plan_snapshot(disaster_recovery_client, plan_id, flatten, cache), None
+        except Exception as e:
+            return plan_id, None, e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(plan_ids)))) as executor:
+        return list(executor.map(propagate(fetch), plan_ids))
+
+def unique_sheet_name(name, used_names):
+    """Make a valid, unique Excel sheet name (31 chars, no []:*?/\\)"""
+    base = INVALID_SHEET_CHARS.sub('_', name or 'plan').strip("'")[:31] or 'plan'
+    sheet_name = base
+    counter = 2
+    while sheet_name.lower() in used_names:
+        suffix = f" ({counter})"
+        sheet_name = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used_names.add(sheet_name.lower())
+    return sheet_name
+
+def write_single_plan_workbook(output, combined_data, sheet_name, template_path=TEMPLATE_FILE):
+    """Write one plan to a workbook with a single sheet; with no template_path the sheet is styled from scratch"""
+    with phase("write_workbook"), export_workbook(output, load_template(template_path),
+                                                  [sheet_name]) as (book, template_sheet):
+        write_plan_sheet(book, combined_data, sheet_name, template_sheet)
+
+def write_plans_workbook(output, snapshots, template_path=TEMPLATE_FILE):
+    """Write one sheet per plan snapshot plus the manifest sheet, returning the manifest rows"""
+    exported = []
+    with phase("write_workbook"), export_workbook(output, load_template(template_path),
+                                                  [MANIFEST_SHEET]) as (book, template_sheet):
+        # Plan sheets are named around the template's sheets, which are still in the workbook while they are added
+        used_names = {MANIFEST_SHEET.lower()} | {name.lower() for name in book.sheetnames}
+        for snapshot in snapshots:
+            sheet_name = unique_sheet_name(snapshot.display_name, used_names)
+            write_plan_sheet(book, snapshot.dataframe, sheet_name, template_sheet)
+            exported.append({'Sheet Name': sheet_name, 'DR Plan OCID': snapshot.plan_id,
+                             'Plan': snapshot.display_name, 'Source': snapshot.source})
+
+        # The manifest lets the update side map each sheet back to its plan
+        manifest = book.create_sheet(title=MANIFEST_SHEET)
+        manifest.append(list(MANIFEST_COLUMNS))
+        for cell in manifest[1]:
+            cell.font = MANIFEST_HEADER_FONT
+        for row in exported:
+            manifest.append([row[column] for column in MANIFEST_COLUMNS])
+    return exported
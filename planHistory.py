@@ -0,0 +1,230 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import closing
+from io import BytesIO
+
+from commonLib import lazy_import, load_region_map
+from perfMetrics import count, metrics_run, phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DIR = os.environ.get("FSDR_PLAN_HISTORY_DIR", os.path.expanduser("~/.fsdr_plans/history"))
+
+# What one profile backs up: single plans and every plan of some protection groups
+BackupTarget = namedtuple('BackupTarget', ['profile', 'plan_ids', 'protection_group_ids'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    plan_id TEXT PRIMARY KEY, display_name TEXT, profile TEXT, last_checked REAL, last_changed REAL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version_id INTEGER PRIMARY KEY, plan_id TEXT NOT NULL, display_name TEXT, digest TEXT NOT NULL,
+    captured_at REAL, time_updated TEXT, rows INTEGER
+);
+CREATE INDEX IF NOT EXISTS versions_plan_id ON versions (plan_id, captured_at);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY, started_at REAL, seconds REAL, plans INTEGER, new_versions INTEGER, failed INTEGER
+);
+"""
+
+def format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp)) if timestamp else None
+
+def snapshot_content(snapshot):
+    """A plan snapshot as JSON Lines, the export format the update path reads back; same plan, same bytes"""
+    output = BytesIO()
+    lazy_import("planColumnar").write_plans_columnar(output, [snapshot], 'jsonl')
+    return output.getvalue()
+
+class PlanHistory:
+    """Versioned plan snapshots: content-addressed gzip objects on disk and a SQLite catalog of versions
+
+    A version is only added when a plan's content differs from its latest version, and content seen
+    before, such as after a rollback, is stored once.
+    """
+
+    def __init__(self, directory=DEFAULT_HISTORY_DIR):
+        self.directory = os.path.expanduser(directory)
+        self.catalog_path = os.path.join(self.directory, 'catalog.sqlite3')
+        self._schema_ready = False
+
+    def connect(self):
+        if self._schema_ready:
+            return sqlite3.connect(self.catalog_path)
+        os.makedirs(self.directory, exist_ok=True)
+        connection = sqlite3.connect(self.catalog_path)
+        connection.executescript(SCHEMA)
+        self._schema_ready = True
+        return connection
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], f"{digest}.jsonl.gz")
+
+    def store_object(self, digest, content):
+        """Write content under its digest unless it is there already; returns whether it was written"""
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # mtime=0 keeps the compressed bytes of equal content equal too
+        with open(temp_path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as compressed:
+            compressed.write(content)
+        os.replace(temp_path, path)
+        return True
+
+    def record(self, snapshot, profile=None):
+        """Add a version for a plan snapshot if its content changed; returns one row saying what happened"""
+        with phase("record_version", plan_id=snapshot.plan_id):
+            content = snapshot_content(snapshot)
+            digest = hashlib.sha256(content).hexdigest()
+            now = time.time()
+            with closing(self.connect()) as connection, connection:
+                latest = connection.execute(
+                    "SELECT digest FROM versions WHERE plan_id = ? ORDER BY captured_at DESC, version_id DESC LIMIT 1",
+                    (snapshot.plan_id,)).fetchone()
+                changed = latest is None or latest[0] != digest
+                if changed:
+                    stored = self.store_object(digest, content)
+                    connection.execute(
+                        "INSERT INTO versions (plan_id, display_name, digest, captured_at, time_updated, rows) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (snapshot.plan_id, snapshot.display_name, digest, now,
+                         (snapshot.metadata or {}).get('time_updated'), len(snapshot.dataframe)))
+                connection.execute(
+                    "INSERT INTO plans (plan_id, display_name, profile, last_checked, last_changed) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (plan_id) DO UPDATE SET display_name = excluded.display_name, "
+                    "profile = excluded.profile, last_checked = excluded.last_checked, "
+                    "last_changed = COALESCE(excluded.last_changed, plans.last_changed)",
+                    (snapshot.plan_id, snapshot.display_name, profile, now, now if changed else None))
+        outcome = 'unchanged' if not changed else 'new version' if stored else 'new version (content seen before)'
+        count("fsdr_history_versions", outcome=outcome)
+        return {'DR Plan OCID': snapshot.plan_id, 'Plan': snapshot.display_name, 'History': outcome,
+                'Version': digest[:12]}
+
+    def record_run(self, started_at, results, failed):
+        with closing(self.connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO runs (started_at, seconds, plans, new_versions, failed) VALUES (?, ?, ?, ?, ?)",
+                (started_at, time.time() - started_at, len(results),
+                 sum(1 for row in results if row['History'] != 'unchanged'), len(failed)))
+
+    def plans(self):
+        """Every plan with history, by name, with its number of versions"""
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT plans.plan_id, plans.display_name, plans.profile, COUNT(versions.version_id), "
+                "plans.last_changed, plans.last_checked FROM plans LEFT JOIN versions USING (plan_id) "
+                "GROUP BY plans.plan_id ORDER BY plans.display_name").fetchall()
+        return [{'DR Plan OCID': plan_id, 'Plan': display_name, 'Profile': profile, 'Versions': versions,
+                 'Last changed': format_time(last_changed), 'Last checked': format_time(last_checked)}
+                for plan_id, display_name, profile, versions, last_changed, last_checked in rows]
+
+    def versions(self, plan_id):
+        """A plan's versions, newest first"""
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT digest, captured_at, display_name, time_updated, rows FROM versions WHERE plan_id = ? "
+                "ORDER BY captured_at DESC, version_id DESC", (plan_id,)).fetchall()
+        return [{'Version': digest[:12], 'Captured': format_time(captured_at), 'Plan': display_name,
+                 'Plan updated': time_updated, 'Rows': rows, 'Digest': digest}
+                for digest, captured_at, display_name, time_updated, rows in rows]
+
+    def runs(self, limit=20):
+        """The latest backup runs, newest first"""
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT started_at, seconds, plans, new_versions, failed FROM runs ORDER BY started_at DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [{'Started': format_time(started_at), 'Seconds': round(seconds, 1), 'Plans': plans,
+                 'New versions': new_versions, 'Failed': failed}
+                for started_at, seconds, plans, new_versions, failed in rows]
+
+    def find_version(self, plan_id, version):
+        """The full digest of a plan's version, given its digest or a prefix of it such as the 12 characters shown"""
+        with closing(self.connect()) as connection:
+            digests = [row[0] for row in connection.execute(
+                "SELECT DISTINCT digest FROM versions WHERE plan_id = ? AND digest LIKE ?",
+                (plan_id, f"{version}%")).fetchall()]
+        if len(digests) != 1:
+            raise ValueError(f"{'No' if not digests else 'More than one'} version of {plan_id} starts with '{version}'")
+        return digests[0]
+
+    def read_version(self, digest):
+        """A version's content: a JSON Lines export of the plan"""
+        with open(self.object_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+
+    def version_frame(self, digest):
+        """A version as a flattened plan in the export layout, with every empty cell as None"""
+        frame = lazy_import("planColumnar").read_columnar(BytesIO(self.read_version(digest)), 'jsonl')
+        return frame.astype(object).where(frame.notna(), None)
+
+    def parse_version(self, digest, region_map=None):
+        """A version parsed the way the update reads an export: [(plan name, plan OCID, plan groups, error)]"""
+        return lazy_import("planUpdate").parse_columnar_plans(BytesIO(self.read_version(digest)), region_map, 'jsonl')
+
+def load_backup_targets(path):
+    """Read backup targets from a JSON list of {"profile", "plan_ids", "protection_group_ids"} objects"""
+    with open(path) as f:
+        entries = json.load(f)
+    return [BackupTarget(entry.get('profile', 'DEFAULT'), list(entry.get('plan_ids', [])),
+                         list(entry.get('protection_group_ids', []))) for entry in entries]
+
+def back_up(targets, history, region_map, max_workers=8, cache=None):
+    """Snapshot every plan of every target into the history, returning (result rows, failed rows)
+
+    Each profile's plans are fetched with at most max_workers requests at a time. A plan whose cached
+    snapshot could not be checked for changes is reported as failed rather than recorded as checked.
+    """
+    plan_export = lazy_import("planExport")
+    started_at = time.time()
+    results, failed = [], []
+    for target in targets:
+        try:
+            plan_ids = list(target.plan_ids)
+            for protection_group_id in target.protection_group_ids:
+                plan_ids += plan_export.list_plan_ids(target.profile, protection_group_id, region_map)
+            fetched = plan_export.fetch_plans(target.profile, list(dict.fromkeys(plan_ids)), region_map,
+                                              max_workers=max_workers, cache=cache)
+        except Exception as e:
+            failed.append({'Profile': target.profile, 'DR Plan OCID': None, 'Error': str(e)})
+            continue
+        for plan_id, snapshot, error in fetched:
+            if error is not None:
+                failed.append({'Profile': target.profile, 'DR Plan OCID': plan_id, 'Error': str(error)})
+                continue
+            if snapshot.source == 'stale':
+                failed.append({'Profile': target.profile, 'DR Plan OCID': plan_id,
+                               'Error': "Could not check the plan for changes; only its cached snapshot was available"})
+                continue
+            results.append(dict(history.record(snapshot, target.profile), Profile=target.profile))
+    history.record_run(started_at, results, failed)
+    return results, failed
+
+def run_backups(targets, history, interval_seconds, region_file, max_workers=8, cache=None, stop=None, runs=None):
+    """Back up the targets every interval_seconds until stop is set, or runs backups have been taken
+
+    A failing run is logged and the next one still happens on schedule.
+    """
+    stop = stop or threading.Event()
+    completed = 0
+    while not stop.is_set() and (runs is None or completed < runs):
+        started = time.monotonic()
+        try:
+            with metrics_run("backup"):
+                results, failed = back_up(targets, history, load_region_map(region_file), max_workers, cache)
+            changed = sum(1 for row in results if row['History'] != 'unchanged')
+            logger.info("Backed up %d plans: %d new versions, %d failed", len(results), changed, len(failed))
+        except Exception:
+            logger.exception("Backup run failed")
+        completed += 1
+        if runs is None or completed < runs:
+            stop.wait(max(0.0, interval_seconds - (time.monotonic() - started)))
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+from perfMetrics import phase
+
+DEFAULT_INDEX_PATH = os.environ.get("FSDR_PLAN_INDEX", os.path.expanduser("~/.fsdr_plans/index.sqlite3"))
+# Bump when the indexed columns change so every plan is reindexed
+INDEX_FORMAT_VERSION = 1
+
+# (index column, export column) for every flattened export column worth searching
+INDEX_COLUMNS = [
+    ('group_name', 'display_name'),
+    ('group_id', 'id'),
+    ('group_type', 'type'),
+    ('step_name', 'steps.display_name'),
+    ('step_id', 'steps.id'),
+    ('step_type', 'steps.type'),
+    ('user_defined_type', 'steps.user_defined_step.step_type'),
+    ('run_as_user', 'steps.user_defined_step.run_as_user'),
+    ('instance_id', 'steps.user_defined_step.run_on_instance_id'),
+    ('instance_region', 'steps.user_defined_step.run_on_instance_region'),
+    ('function_id', 'steps.user_defined_step.function_id'),
+    ('function_region', 'steps.user_defined_step.function_region'),
+    ('request_body', 'steps.user_defined_step.request_body'),
+    ('bucket', 'steps.user_defined_step.object_storage_script_location.bucket'),
+    ('namespace', 'steps.user_defined_step.object_storage_script_location.namespace'),
+    ('object', 'steps.user_defined_step.object_storage_script_location.object'),
+    ('script_command', 'steps.user_defined_step.script_command'),
+]
+INDEX_COLUMN_NAMES = [column for column, _ in INDEX_COLUMNS]
+# Short field names accepted in queries, such as "script:/opt/dr/failover.sh" or "function:ocid1.fnfunc..."
+QUERY_FIELDS = {
+    'plan': ['plan_name'], 'group': ['group_name', 'group_id'], 'step': ['step_name', 'step_id'],
+    'type': ['group_type', 'step_type', 'user_defined_type'], 'user': ['run_as_user'],
+    'instance': ['instance_id'], 'function': ['function_id'], 'region': ['instance_region', 'function_region'],
+    'bucket': ['bucket'], 'namespace': ['namespace'], 'object': ['object'], 'script': ['script_command'],
+    'body': ['request_body'],
+}
+QUERY_TERM = re.compile(r'(?:(\w+):)?(?:"([^"]*)"|(\S+))')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS plans (
+    plan_id TEXT PRIMARY KEY, display_name TEXT, time_updated TEXT, fingerprint TEXT,
+    steps INTEGER, indexed_at REAL, format_version INTEGER
+);
+CREATE TABLE IF NOT EXISTS steps (
+    rowid INTEGER PRIMARY KEY, plan_id TEXT NOT NULL, plan_name TEXT, {', '.join(f'{name} TEXT' for name in INDEX_COLUMN_NAMES)}
+);
+CREATE INDEX IF NOT EXISTS steps_plan_id ON steps (plan_id);
+-- External content table: the text lives once, in steps, and the triggers keep steps_fts in step with it
+CREATE VIRTUAL TABLE IF NOT EXISTS steps_fts USING fts5 (
+    plan_name, {', '.join(INDEX_COLUMN_NAMES)}, content='steps', content_rowid='rowid',
+    tokenize="unicode61 remove_diacritics 2"
+);
+CREATE TRIGGER IF NOT EXISTS steps_insert AFTER INSERT ON steps BEGIN
+    INSERT INTO steps_fts (rowid, plan_name, {', '.join(INDEX_COLUMN_NAMES)})
+    VALUES (new.rowid, new.plan_name, {', '.join(f'new.{name}' for name in INDEX_COLUMN_NAMES)});
+END;
+CREATE TRIGGER IF NOT EXISTS steps_delete AFTER DELETE ON steps BEGIN
+    INSERT INTO steps_fts (steps_fts, rowid, plan_name, {', '.join(INDEX_COLUMN_NAMES)})
+    VALUES ('delete', old.rowid, old.plan_name, {', '.join(f'old.{name}' for name in INDEX_COLUMN_NAMES)});
+END;
+"""
+
+def index_rows(dataframe):
+    """The searchable cells of a flattened plan, one tuple per row, with every empty cell as None"""
+    columns = [export_column for _, export_column in INDEX_COLUMNS]
+    # NaN is the only value not equal to itself
+    return [tuple(None if value is None or value != value else str(value) for value in row)
+            for row in dataframe.reindex(columns=columns).to_numpy(dtype=object).tolist()]
+
+def fingerprint(display_name, rows):
+    """Digest of everything indexed for a plan, so an unchanged plan is never rewritten"""
+    digest = hashlib.sha1(json.dumps([INDEX_FORMAT_VERSION, display_name, rows]).encode('utf-8'))
+    return digest.hexdigest()
+
+def fts_query(text):
+    """Turn what a user types into an FTS5 query: every term must match, as a prefix, in any column or the named one
+
+    'failover.sh instance:ocid1.instance.oc1.iad.abc' finds steps whose text has both,
+    the second in the instance column.
+    """
+    terms = []
+    for field, quoted, bare in QUERY_TERM.findall(text or ''):
+        value = (quoted if quoted else bare).replace('"', '')
+        columns = QUERY_FIELDS.get(field.lower()) if field else None
+        if field and columns is None:
+            # Not a field we know, such as the scheme of a URL: search for it as typed
+            value = f"{field}:{value}"
+        if not re.search(r'\w', value):
+            continue
+        phrase = f'"{value}"*'
+        terms.append(f"{{{' '.join(columns)}}} : {phrase}" if columns else phrase)
+    return ' AND '.join(terms)
+
+class PlanSearchIndex:
+    """SQLite full-text index of the flattened step records of many plans, refreshed one plan at a time"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = os.path.expanduser(path)
+        self._schema_ready = False
+
+    def connect(self):
+        if self._schema_ready:
+            return sqlite3.connect(self.path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.executescript(SCHEMA)
+        self._schema_ready = True
+        return connection
+
+    def index_snapshot(self, snapshot):
+        """Index one PlanSnapshot, replacing what was indexed for the plan before.
+
+        Returns 'unchanged' when the plan has the same time_updated, or the same indexed text, as
+        last time, else 'indexed'.
+        """
+        time_updated = (snapshot.metadata or {}).get('time_updated')
+        with phase("index_plan", plan_id=snapshot.plan_id), closing(self.connect()) as connection, connection:
+            stored = connection.execute(
+                "SELECT time_updated, fingerprint FROM plans WHERE plan_id = ? AND format_version = ?",
+                (snapshot.plan_id, INDEX_FORMAT_VERSION)).fetchone()
+            # OCI bumps time_updated on every change, so an equal one spares flattening the rows again
+            if stored and time_updated and stored[0] == time_updated:
+                return 'unchanged'
+            rows = index_rows(snapshot.dataframe)
+            digest = fingerprint(snapshot.display_name, rows)
+            if stored and stored[1] == digest:
+                return 'unchanged'
+            connection.execute("DELETE FROM steps WHERE plan_id = ?", (snapshot.plan_id,))
+            connection.executemany(
+                f"INSERT INTO steps (plan_id, plan_name, {', '.join(INDEX_COLUMN_NAMES)}) "
+                f"VALUES ({', '.join('?' * (len(INDEX_COLUMN_NAMES) + 2))})",
+                [(snapshot.plan_id, snapshot.display_name) + row for row in rows])
+            connection.execute(
+                "INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (snapshot.plan_id, snapshot.display_name, time_updated, digest, len(rows), time.time(),
+                 INDEX_FORMAT_VERSION))
+        return 'indexed'
+
+    def index_snapshots(self, snapshots):
+        """Index many plans, returning one row per plan saying whether it had to be rewritten"""
+        return [{'DR Plan OCID': snapshot.plan_id, 'Plan': snapshot.display_name,
+                 'Index': self.index_snapshot(snapshot)} for snapshot in snapshots]
+
+    def remove_plan(self, plan_id):
+        with closing(self.connect()) as connection, connection:
+            connection.execute("DELETE FROM steps WHERE plan_id = ?", (plan_id,))
+            connection.execute("DELETE FROM plans WHERE plan_id = ?", (plan_id,))
+
+    def plans(self):
+        """The indexed plans, by name"""
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                "SELECT plan_id, display_name, steps, time_updated, indexed_at FROM plans ORDER BY display_name").fetchall()
+        return [{'DR Plan OCID': plan_id, 'Plan': display_name, 'Rows': steps, 'Plan updated': time_updated,
+                 'Indexed': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(indexed_at))}
+                for plan_id, display_name, steps, time_updated, indexed_at in rows]
+
+    def search(self, text, plan_ids=None, limit=200):
+        """Steps matching every term of text, best matches first, optionally within some plans"""
+        query = fts_query(text)
+        if not query:
+            return []
+        sql = (f"SELECT steps.plan_name, steps.plan_id, {', '.join(f'steps.{name}' for name in INDEX_COLUMN_NAMES)} "
+               "FROM steps_fts JOIN steps ON steps.rowid = steps_fts.rowid WHERE steps_fts MATCH ?")
+        parameters = [query]
+        if plan_ids:
+            sql += f" AND steps.plan_id IN ({', '.join('?' * len(plan_ids))})"
+            parameters += list(plan_ids)
+        sql += " ORDER BY bm25(steps_fts) LIMIT ?"
+        parameters.append(limit)
+        with phase("search_index"), closing(self.connect()) as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        return [dict(zip(['plan_name', 'plan_id'] + INDEX_COLUMN_NAMES, row)) for row in rows]
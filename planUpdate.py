@@ -0,0 +1,650 @@
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import oci
+import openpyxl
+from openpyxl.utils import range_boundaries
+
+from commonLib import MANIFEST_SHEET, get_dr_client, get_region_from_ocid
+from perfMetrics import count, phase, propagate
+from planColumnar import PLAN_ID_COLUMN, iter_plan_rows, read_columnar
+from planValidation import SHEET_COLUMNS, PlanValidationError, validate_plan_rows
+
+WORK_REQUEST_TERMINAL_STATES = ('SUCCEEDED', 'FAILED', 'CANCELED')
+GROUP_DIFF_FIELDS = ('display_name', 'type', 'is_pause_enabled')
+STEP_DIFF_FIELDS = ('display_name', 'error_mode', 'is_enabled', 'timeout')
+SCRIPT_LOCATION_DIFF_FIELDS = ('bucket', 'namespace', 'object')
+MERGE_CELL_PATTERN = re.compile(rb'<(?:\w+:)?mergeCell\s+ref="([A-Z]+[0-9]+:[A-Z]+[0-9]+)"')
+# Rough memory held per sheet row, and per group or step model, by a parsed upload (measured with tracemalloc)
+ROW_BYTES = 1000
+MODEL_BYTES = 1200
+
+def sheet_source_opener(sheet):
+    """The function that opens a read-only sheet's raw XML, or None when this openpyxl does not offer one
+
+    Read-only sheets do not load their merged cells, so the XML is scanned for them instead.
+    ReadOnlyWorksheet._get_source() is private to openpyxl; this was written against openpyxl 3.1.
+    """
+    return getattr(sheet, '_get_source', None)
+
+def open_workbook(excel_file):
+    """Open an upload read-only for streaming, or fully when its sheets' XML cannot be scanned for merged cells"""
+    workbook = openpyxl.load_workbook(excel_file, read_only=True)
+    if all(sheet_source_opener(sheet) for sheet in workbook.worksheets):
+        return workbook
+    workbook.close()
+    if hasattr(excel_file, 'seek'):
+        excel_file.seek(0)
+    return openpyxl.load_workbook(excel_file)
+
+def read_merged_ranges(sheet, chunk_size=1 << 20):
+    """Scan a read-only sheet's XML for merged ranges without building any cells
+
+    A fully loaded sheet already knows its merged ranges.
+    """
+    if hasattr(sheet, 'merged_cells'):
+        return [merged_cell_range.bounds for merged_cell_range in sheet.merged_cells.ranges]
+    merged_ranges = []
+    tail = b''
+    with sheet_source_opener(sheet)() as source:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            data = tail + chunk
+            last_end = 0
+            for match in MERGE_CELL_PATTERN.finditer(data):
+                merged_ranges.append(range_boundaries(match.group(1).decode()))
+                last_end = match.end()
+            # Carry a short tail so a tag split across chunks is still matched
+            tail = data[max(last_end, len(data) - 256):]
+    return merged_ranges
+
+def iter_sheet_rows_streaming(sheet, min_row=2):
+    """Yield plain row value lists from a sheet, forward-filling merged ranges"""
+    anchor_cols_by_row = {}
+    merged_by_row = {}
+    for min_col, range_min_row, max_col, range_max_row in read_merged_ranges(sheet):
+        anchor = (range_min_row, min_col)
+        anchor_cols_by_row.setdefault(range_min_row, []).append(min_col)
+        for row in range(range_min_row, range_max_row + 1):
+            for col in range(min_col, max_col + 1):
+                if (row, col) != anchor:
+                    merged_by_row.setdefault(row, []).append((col, anchor))
+
+    if sheet.max_column is None:
+        sheet.calculate_dimension(force=True)
+
+    anchor_values = {}
+    rows = sheet.iter_rows(min_row=1, max_row=sheet.max_row, max_col=sheet.max_column, values_only=True)
+    for row_index, row in enumerate(rows, start=1):
+        for col in anchor_cols_by_row.get(row_index, ()):
+            anchor_values[(row_index, col)] = row[col - 1] if col <= len(row) else None
+        if row_index < min_row:
+            continue
+        row_values = list(row)
+        for col, anchor in merged_by_row.get(row_index, ()):
+            if col <= len(row_values):
+                row_values[col - 1] = anchor_values.get(anchor)
+        yield row_values
+
+def load_sheet_rows(excel_file, sheet_name):
+    """Stream the plan rows of an uploaded workbook using openpyxl's read-only mode"""
+    workbook = open_workbook(excel_file)
+    try:
+        yield from iter_sheet_rows_streaming(workbook[sheet_name])
+    finally:
+        workbook.close()
+
+def handle_empty_cell(value):
+    """Convert Excel empty cells to None"""
+    if value is None or str(value).strip().lower() in ['none', 'nan', '']:
+        return None
+    return str(value)
+
+def is_new_group(group_id):
+    """Check if this is a new group based on the ID"""
+    return not group_id or group_id.strip().lower() in ['none', 'nan', '']
+
+# User-defined step types, each with its update model and the sheet column of every field it takes;
+# a tuple of columns stands for the Object Storage script location model
+USER_DEFINED_STEP_MODELS = {
+    'RUN_LOCAL_SCRIPT': (oci.disaster_recovery.models.UpdateRunLocalScriptUserDefinedStepDetails,
+                         (('run_on_instance_id', 10), ('run_as_user', 9), ('script_command', 18))),
+    'RUN_OBJECTSTORE_SCRIPT': (oci.disaster_recovery.models.UpdateRunObjectStoreScriptUserDefinedStepDetails,
+                               (('run_on_instance_id', 10), ('object_storage_script_location', (14, 15, 16)))),
+    'INVOKE_FUNCTION': (oci.disaster_recovery.models.UpdateInvokeFunctionUserDefinedStepDetails,
+                        (('function_id', 11), ('request_body', 13))),
+}
+BUILT_IN_GROUP_TYPES = ['BUILT_IN', 'BUILT_IN_PRECHECK', 'USER_DEFINED', 'USER_DEFINED_PAUSE']
+
+# A step as plain values; two steps are equal exactly when their SDK models would be
+StepRecord = namedtuple('StepRecord', ['display_name', 'error_mode', 'id', 'timeout', 'is_enabled', 'user_defined_step'])
+
+class GroupRecord:
+    """A plan group under construction, with indexes of its step names and steps"""
+    __slots__ = ('display_name', 'id', 'type', 'is_pause_enabled', 'steps', 'step_names', 'step_set')
+
+    def __init__(self, display_name, id, type, is_pause_enabled=None, steps=None):
+        self.display_name = display_name
+        self.id = id
+        self.type = type
+        self.is_pause_enabled = is_pause_enabled
+        self.steps = steps
+        self.step_names = {step.display_name for step in steps or ()}
+        self.step_set = set(steps or ())
+
+    def add_step(self, step):
+        self.steps.append(step)
+        self.step_names.add(step.display_name)
+        self.step_set.add(step)
+
+def user_defined_step_record(step_type, row):
+    """Read a user-defined step's fields off a row as (step_type, value, ...), looking the step type up once"""
+    step_model = USER_DEFINED_STEP_MODELS.get(step_type)
+    if step_model is None:
+        raise ValueError(f"Invalid step_type: {step_type}. Must be one of RUN_LOCAL_SCRIPT, RUN_OBJECTSTORE_SCRIPT, INVOKE_FUNCTION")
+    values = [step_type]
+    for _, column in step_model[1]:
+        if isinstance(column, tuple):
+            values.append(tuple(handle_empty_cell(row[index]) for index in column))
+        else:
+            values.append(handle_empty_cell(row[column]))
+    return tuple(values)
+
+def user_defined_step_model(record):
+    model, fields = USER_DEFINED_STEP_MODELS[record[0]]
+    kwargs = {'step_type': record[0]}
+    for (field, column), value in zip(fields, record[1:]):
+        if isinstance(column, tuple):
+            bucket, namespace, bucket_object = value
+            value = oci.disaster_recovery.models.UpdateObjectStorageScriptLocationDetails(
+                bucket=bucket, namespace=namespace, object=bucket_object)
+        kwargs[field] = value
+    return model(**kwargs)
+
+def step_model(step):
+    return oci.disaster_recovery.models.UpdateDrPlanStepDetails(
+        display_name=step.display_name,
+        error_mode=step.error_mode,
+        id=step.id,
+        timeout=step.timeout,
+        is_enabled=step.is_enabled,
+        user_defined_step=user_defined_step_model(step.user_defined_step) if step.user_defined_step else None
+    )
+
+def group_model(group):
+    return oci.disaster_recovery.models.UpdateDrPlanGroupDetails(
+        display_name=group.display_name,
+        id=group.id,
+        type=group.type,
+        is_pause_enabled=group.is_pause_enabled,
+        steps=None if group.steps is None else [step_model(step) for step in group.steps]
+    )
+
+class PlanBuilder:
+    """Collect sheet rows as plain group and step records; SDK models are only built by groups()"""
+
+    def __init__(self):
+        self.plan_groups = {}
+        self._groups_by_name = {}
+
+    def _add_group(self, key, group):
+        replaced = self.plan_groups.get(key)
+        self.plan_groups[key] = group
+        if replaced is not None and self._groups_by_name.get(replaced.display_name) is replaced:
+            # Keep "first group with this name" semantics when a key is reused
+            del self._groups_by_name[replaced.display_name]
+            for other in self.plan_groups.values():
+                self._groups_by_name.setdefault(other.display_name, other)
+        self._groups_by_name.setdefault(group.display_name, group)
+
+    def new_plan(self, row):
+        plan_group_display_name = handle_empty_cell(row[0])
+        step_display_name = handle_empty_cell(row[2])
+
+        # Skip rows where both display name and step display name are empty
+        if not plan_group_display_name and not step_display_name:
+            return None
+
+        user_defined_step = user_defined_step_record(row[8], row)
+        # New groups and steps get their ids from OCI
+        step = StepRecord(step_display_name, row[3], None, row[6], row[5], user_defined_step)
+
+        # Find existing plan group with the same display name
+        group = self._groups_by_name.get(plan_group_display_name)
+        if group is None:
+            group = GroupRecord(plan_group_display_name, None, 'USER_DEFINED', steps=[])
+            self._add_group(plan_group_display_name, group)
+
+        # Add step to the plan group if it's not already there
+        if step_display_name not in group.step_names:
+            group.add_step(step)
+        return group
+
+    def existing_plan(self, row):
+        id = handle_empty_cell(row[1])
+        user_defined_step = user_defined_step_record(row[8], row)
+        step = StepRecord(handle_empty_cell(row[2]), row[3], handle_empty_cell(row[4]), row[6], row[5], user_defined_step)
+
+        group = self.plan_groups.get(id)
+        if group is None:
+            group = GroupRecord(handle_empty_cell(row[0]), id, 'USER_DEFINED', steps=[])
+            self._add_group(id, group)
+
+        if step not in group.step_set:
+            group.add_step(step)
+        return group
+
+    def pause_plan(self, row):
+        plan_group_display_name = handle_empty_cell(row[0])
+        id = handle_empty_cell(row[1])
+
+        # An id means an existing group; new groups are found by display name
+        if id:
+            group = self.plan_groups.get(id)
+        else:
+            group = self._groups_by_name.get(plan_group_display_name)
+
+        if group is None:
+            # New pause groups have no steps and get their id from OCI
+            group = GroupRecord(plan_group_display_name, id or None, 'USER_DEFINED_PAUSE', is_pause_enabled=True)
+            self._add_group(id if id else plan_group_display_name, group)
+        return group
+
+    def builtin_function(self, row):
+        id = handle_empty_cell(row[1])
+        type = row[19]
+        if type not in BUILT_IN_GROUP_TYPES:
+            raise ValueError(f"Invalid value for `type`: {type}. Must be one of {BUILT_IN_GROUP_TYPES}")
+        step = StepRecord(handle_empty_cell(row[2]), row[3], row[4], row[6], row[5], None)
+
+        group = self.plan_groups.get(id)
+        if group is None:
+            group = GroupRecord(handle_empty_cell(row[0]), id, type, steps=[])
+            self._add_group(id, group)
+
+        if step not in group.step_set:
+            group.add_step(step)
+        return group
+
+    def add_row(self, row_values):
+        """Dispatch one sheet row to the matching builder"""
+        id_value = str(row_values[1])
+        type_value = str(row_values[19])
+
+        row_values = [None if val in ["None", None] else val for val in row_values]
+
+        if type_value == "USER_DEFINED":
+            if id_value == "None":
+                return self.new_plan(row_values)
+            return self.existing_plan(row_values)
+        elif type_value == "USER_DEFINED_PAUSE":
+            return self.pause_plan(row_values)
+        return self.builtin_function(row_values)
+
+    def groups(self):
+        """Build the UpdateDrPlanGroupDetails payload, creating each SDK model exactly once"""
+        return [group_model(group) for group in self.plan_groups.values()]
+
+def parse_plan_groups(rows, validate=True, region_map=None):
+    """Build the plan groups for a sheet's rows, in order
+
+    Unless validate is False, every row is checked first and a PlanValidationError
+    listing all problems is raised before any group is built.
+    """
+    if validate:
+        with phase("read_sheet"):
+            rows = list(rows)
+        count("fsdr_sheet_rows", len(rows))
+        with phase("validate", rows=len(rows)):
+            errors = validate_plan_rows(rows, region_map=region_map)
+        if errors:
+            raise PlanValidationError(errors)
+    with phase("build_models"):
+        builder = PlanBuilder()
+        for row_values in rows:
+            builder.add_row(row_values)
+        return builder.groups()
+
+# One sheet read and parsed: its rows for a preview, and the plan groups or the PlanValidationError
+ParsedSheet = namedtuple('ParsedSheet', ['rows', 'plan_groups', 'error'])
+
+def parse_sheet(excel_file, sheet_name, region_map=None):
+    """Read and parse one sheet, keeping its rows and returning a validation failure instead of raising it"""
+    rows = list(load_sheet_rows(excel_file, sheet_name))
+    try:
+        return ParsedSheet(rows, parse_plan_groups(rows, region_map=region_map), None)
+    except PlanValidationError as e:
+        return ParsedSheet(rows, None, e)
+
+def parse_columnar_plan(source, plan_id, region_map=None, file_format=None):
+    """Read and parse one plan of a columnar export like parse_sheet reads one sheet, by its DR plan OCID"""
+    with phase("read_columnar"):
+        frame = read_columnar(source, file_format)
+    for _, row_plan_id, rows in iter_plan_rows(frame):
+        if row_plan_id == plan_id:
+            try:
+                return ParsedSheet(rows, parse_plan_groups(rows, region_map=region_map), None)
+            except PlanValidationError as e:
+                return ParsedSheet(rows, None, e)
+    raise ValueError(f"The file has no rows of DR Plan {plan_id}")
+
+def estimated_size(plan_groups, rows=()):
+    """Rough bytes held by parsed plan groups and their sheet rows, for bounding caches of parsed uploads"""
+    models = sum(1 + len(group.steps or ()) for group in plan_groups or ())
+    return models * MODEL_BYTES + len(rows) * ROW_BYTES
+
+def group_summary(plan_groups):
+    """One row per parsed group, for showing what an upload will send"""
+    return [{'Group': group.display_name, 'Group OCID': group.id or '(new)', 'Type': group.type,
+             'Steps': len(group.steps or ())} for group in plan_groups]
+
+def preview_rows(rows, limit=200):
+    """The first rows of a sheet keyed by column name, for a preview grid"""
+    return [dict(zip(SHEET_COLUMNS, row)) for row in rows[:limit]]
+
+def normalize_value(value):
+    """Bring sheet and API values to one comparable form"""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return int(value) if float(value).is_integer() else value
+    text = str(value).strip()
+    if text.lower() in ['none', 'nan', '']:
+        return None
+    if text.lower() in ['true', 'false']:
+        return text.lower() == 'true'
+    return text
+
+def step_fields(step, new_step):
+    """Comparable fields of a step, limited to what the update payload carries"""
+    fields = {name: normalize_value(getattr(step, name, None)) for name in STEP_DIFF_FIELDS}
+    new_user_defined_step = getattr(new_step, 'user_defined_step', None)
+    if new_user_defined_step is None:
+        return fields
+    user_defined_step = getattr(step, 'user_defined_step', None)
+    for name in new_user_defined_step.swagger_types:
+        if name == 'object_storage_script_location':
+            location = getattr(user_defined_step, name, None)
+            for location_name in SCRIPT_LOCATION_DIFF_FIELDS:
+                fields[f'{name}.{location_name}'] = normalize_value(getattr(location, location_name, None))
+        else:
+            fields[name] = normalize_value(getattr(user_defined_step, name, None))
+    return fields
+
+def diff_plan(current_plan, plan_groups):
+    """Compare the current DrPlan with parsed plan groups, keyed by group and step id"""
+    changes = []
+
+    def record(change, group, step=None, field=None, current=None, new=None):
+        changes.append({
+            'Change': change,
+            'Group': group.display_name,
+            'Step': step.display_name if step is not None else None,
+            'Field': field,
+            'Current': current,
+            'New': new,
+        })
+
+    current_groups = {group.id: group for group in current_plan.plan_groups}
+    current_steps = {
+        step.id: (group.id, step) for group in current_plan.plan_groups for step in group.steps or []
+    }
+    seen_group_ids = set()
+    seen_step_ids = set()
+
+    for new_group in plan_groups:
+        current_group = current_groups.get(new_group.id) if new_group.id else None
+        if current_group is None:
+            record('added', new_group)
+            for new_step in new_group.steps or []:
+                record('added', new_group, new_step)
+            continue
+        seen_group_ids.add(new_group.id)
+
+        for field in GROUP_DIFF_FIELDS:
+            current_value = normalize_value(getattr(current_group, field))
+            new_value = normalize_value(getattr(new_group, field))
+            # Only pause groups carry is_pause_enabled in the update payload
+            if field == 'is_pause_enabled' and new_value is None:
+                continue
+            if current_value != new_value:
+                record('modified', new_group, field=field, current=current_value, new=new_value)
+
+        kept_step_ids = []
+        for new_step in new_group.steps or []:
+            current_entry = current_steps.get(new_step.id) if new_step.id else None
+            if current_entry is None:
+                record('added', new_group, new_step)
+                continue
+            current_group_id, current_step = current_entry
+            seen_step_ids.add(new_step.id)
+            if current_group_id != new_group.id:
+                record('moved', new_group, new_step, field='group',
+                       current=current_groups[current_group_id].display_name, new=new_group.display_name)
+            else:
+                kept_step_ids.append(new_step.id)
+            current_fields = step_fields(current_step, new_step)
+            for field, new_value in step_fields(new_step, new_step).items():
+                if current_fields[field] != new_value:
+                    record('modified', new_group, new_step, field=field, current=current_fields[field], new=new_value)
+
+        kept = set(kept_step_ids)
+        current_order = [step.id for step in current_group.steps or [] if step.id in kept]
+        if current_order != kept_step_ids:
+            record('reordered', new_group, field='steps')
+
+    for group in current_plan.plan_groups:
+        if group.id not in seen_group_ids:
+            record('removed', group)
+            continue
+        for step in group.steps or []:
+            if step.id not in seen_step_ids:
+                record('removed', group, step)
+
+    new_order = [group.id for group in plan_groups if group.id in seen_group_ids]
+    current_order = [group.id for group in current_plan.plan_groups if group.id in seen_group_ids]
+    if current_order != new_order:
+        changes.append({'Change': 'reordered', 'Group': None, 'Step': None, 'Field': 'plan_groups',
+                        'Current': None, 'New': None})
+    return changes
+
+def read_manifest(workbook, manifest_sheet=MANIFEST_SHEET):
+    """Map sheet names to DR plan OCIDs using the workbook's manifest sheet"""
+    if manifest_sheet not in workbook.sheetnames:
+        raise ValueError(f"Workbook has no '{manifest_sheet}' sheet mapping sheet names to DR Plan OCIDs")
+    manifest = {}
+    for row in workbook[manifest_sheet].iter_rows(min_row=2, max_col=2, values_only=True):
+        sheet_name = handle_empty_cell(row[0]) if row else None
+        plan_id = handle_empty_cell(row[1]) if len(row) > 1 else None
+        if sheet_name and plan_id:
+            manifest[sheet_name.strip()] = plan_id.strip()
+    return manifest
+
+def parse_workbook_plans(excel_file, manifest_sheet=MANIFEST_SHEET, region_map=None):
+    """Parse every sheet named in the manifest, returning (sheet_name, plan_id, plan_groups, error)"""
+    with phase("open_workbook"):
+        workbook = open_workbook(excel_file)
+    try:
+        parsed = []
+        for sheet_name, plan_id in read_manifest(workbook, manifest_sheet).items():
+            try:
+                plan_groups = parse_plan_groups(iter_sheet_rows_streaming(workbook[sheet_name]), region_map=region_map)
+                parsed.append((sheet_name, plan_id, plan_groups, None))
+            except Exception as e:
+                parsed.append((sheet_name, plan_id, None, e))
+        return parsed
+    finally:
+        workbook.close()
+
+def parse_columnar_plans(source, region_map=None, file_format=None):
+    """Parse every plan in a Parquet, Arrow or JSON Lines export, returning (plan_name, plan_id, plan_groups, error)
+
+    Values arrive with their exact types and there are no merged cells to fill.
+    """
+    with phase("read_columnar"):
+        frame = read_columnar(source, file_format)
+    parsed = []
+    for plan_name, plan_id, rows in iter_plan_rows(frame):
+        try:
+            if plan_id is None:
+                raise ValueError(f"{len(rows)} rows have no {PLAN_ID_COLUMN}")
+            parsed.append((plan_name, plan_id, parse_plan_groups(rows, region_map=region_map), None))
+        except Exception as e:
+            parsed.append((plan_name, plan_id, None, e))
+    return parsed
+
+def apply_plan_update(disaster_recovery_client, plan_id, plan_groups, wait_for_completion=True, max_wait_seconds=1800):
+    """Send one plan update and optionally wait for its work request, returning (status, work_request_id)"""
+    update_dr_plan_details = oci.disaster_recovery.models.UpdateDrPlanDetails(plan_groups=plan_groups)
+    with phase("update_dr_plan", plan_id=plan_id):
+        update_dr_plan_response = disaster_recovery_client.update_dr_plan(
+            update_dr_plan_details=update_dr_plan_details,
+            dr_plan_id=plan_id
+        )
+    work_request_id = update_dr_plan_response.headers.get('opc-work-request-id')
+    if not wait_for_completion or not work_request_id:
+        return "ACCEPTED", work_request_id
+
+    with phase("wait_for_work_request", plan_id=plan_id, work_request_id=work_request_id):
+        status = wait_for_work_request(disaster_recovery_client, work_request_id, max_wait_seconds)
+    return status, work_request_id
+
+def wait_for_work_request(disaster_recovery_client, work_request_id, max_wait_seconds=1800, max_interval_seconds=30,
+                          on_progress=None, initial_interval_seconds=1):
+    """Poll a work request with exponential backoff until it reaches a terminal state
+
+    on_progress, when given, is called with the WorkRequest after every poll.
+    """
+    deadline = time.monotonic() + max_wait_seconds
+    interval = initial_interval_seconds
+    while True:
+        work_request = disaster_recovery_client.get_work_request(work_request_id).data
+        if on_progress:
+            on_progress(work_request)
+        status = work_request.status
+        if status in WORK_REQUEST_TERMINAL_STATES:
+            return status
+        if time.monotonic() + interval > deadline:
+            raise TimeoutError(f"Work request {work_request_id} still {status} after {max_wait_seconds} seconds")
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval_seconds)
+
+def get_work_request_errors(disaster_recovery_client, work_request_id):
+    """Return the error messages a work request reported"""
+    response = disaster_recovery_client.list_work_request_errors(work_request_id)
+    return [error.message for error in response.data.items]
+
+class WorkRequestTracker:
+    """Follow work requests on background threads and keep their latest progress for the UI to read
+
+    track() returns at once, so the caller never blocks on polling and many
+    work requests can be followed at the same time.
+    """
+
+    def __init__(self, max_workers=8, max_wait_seconds=1800, max_interval_seconds=30, initial_interval_seconds=1):
+        self.max_wait_seconds = max_wait_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.initial_interval_seconds = initial_interval_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="work-request")
+        self._lock = threading.Lock()
+        self._progress = {}
+        self._finished = set()
+
+    def track(self, disaster_recovery_client, work_request_id, plan_id, label=None):
+        """Start following a work request; one that is already followed is left alone"""
+        with self._lock:
+            if work_request_id in self._progress:
+                return
+            self._progress[work_request_id] = {
+                'Plan': label or plan_id, 'DR Plan OCID': plan_id, 'Work Request': work_request_id,
+                'Status': 'ACCEPTED', 'Percent Complete': 0.0, 'Errors': None,
+            }
+        self._executor.submit(self._follow, disaster_recovery_client, work_request_id)
+
+    def _update(self, work_request_id, fields, finished=False):
+        with self._lock:
+            self._progress[work_request_id].update(fields)
+            if finished:
+                self._finished.add(work_request_id)
+
+    def _follow(self, disaster_recovery_client, work_request_id):
+        def on_progress(work_request):
+            self._update(work_request_id, {'Status': work_request.status,
+                                           'Percent Complete': work_request.percent_complete or 0.0})
+
+        try:
+            status = wait_for_work_request(
+                disaster_recovery_client, work_request_id, self.max_wait_seconds, self.max_interval_seconds,
+                on_progress=on_progress, initial_interval_seconds=self.initial_interval_seconds)
+            errors = None
+            if status != 'SUCCEEDED':
+                errors = '; '.join(get_work_request_errors(disaster_recovery_client, work_request_id)) or None
+            self._update(work_request_id, {'Errors': errors}, finished=True)
+        except Exception as e:
+            self._update(work_request_id, {'Errors': str(e)}, finished=True)
+
+    def progress(self):
+        """Latest progress of every tracked work request, in the order they were tracked"""
+        with self._lock:
+            return [dict(entry) for entry in self._progress.values()]
+
+    def active(self):
+        with self._lock:
+            return len(self._finished) < len(self._progress)
+
+    def clear_finished(self):
+        with self._lock:
+            for work_request_id in self._finished:
+                del self._progress[work_request_id]
+            self._finished.clear()
+
+def get_current_plan(disaster_recovery_client, plan_id):
+    """Fetch the plan as it is now; the client retries reads on any transient error, but updates only when throttled"""
+    with phase("get_dr_plan", plan_id=plan_id):
+        return disaster_recovery_client.get_dr_plan(dr_plan_id=plan_id).data
+
+def update_plans(profile, parsed_plans, region_map, max_workers=4, wait_for_completion=True, dry_run=False,
+                 tracker=None):
+    """Apply parsed plans concurrently, skipping unchanged ones, and return one result row per plan
+
+    With dry_run the plans are only compared, and changed ones are reported as WOULD_UPDATE.
+    With a WorkRequestTracker the work requests are handed to it instead of being waited for.
+    """
+    def update(parsed_plan):
+        sheet_name, plan_id, plan_groups, error = parsed_plan
+        result = {'Sheet': sheet_name, 'DR Plan OCID': plan_id, 'Status': None, 'Changes': None,
+                  'Work Request': None, 'Error': None}
+        if error is not None:
+            result.update({'Status': 'PARSE_FAILED', 'Error': str(error)})
+            return result
+        try:
+            disaster_recovery_client = get_dr_client(profile, get_region_from_ocid(plan_id, region_map))
+            current_plan = get_current_plan(disaster_recovery_client, plan_id)
+            with phase("diff", plan_id=plan_id):
+                changes = diff_plan(current_plan, plan_groups)
+            result['Changes'] = len(changes)
+            if not changes:
+                result['Status'] = 'UNCHANGED'
+                return result
+            if dry_run:
+                result['Status'] = 'WOULD_UPDATE'
+                return result
+            status, work_request_id = apply_plan_update(
+                disaster_recovery_client, plan_id, plan_groups,
+                wait_for_completion=wait_for_completion and tracker is None)
+            result.update({'Status': status, 'Work Request': work_request_id})
+            if tracker is not None and work_request_id:
+                tracker.track(disaster_recovery_client, work_request_id, plan_id, sheet_name)
+        except Exception as e:
+            result.update({'Status': 'FAILED', 'Error': str(e)})
+        return result
+
+    if not parsed_plans:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(parsed_plans)))) as executor:
+        return list(executor.map(propagate(update), parsed_plans))
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from planColumns import ERROR_MODES, EXPORT_COLUMNS, STEP_REGION_COLUMNS, USER_DEFINED_STEP_TYPES
+from regionLookup import OCID_REGION_PATTERN, UNKNOWN_REGION, resolve_regions
+
+# The update sheet is the export layout without the trailing is_pause_enabled column
+SHEET_COLUMNS = EXPORT_COLUMNS[:20]
+EMPTY_CELL_TEXT = ['', 'none', 'nan']
+GROUP_TYPES = ['BUILT_IN', 'BUILT_IN_PRECHECK', 'USER_DEFINED', 'USER_DEFINED_PAUSE']
+BOOLEAN_TEXT = ['true', 'false']
+# OCIDs laid out the way get_region_from_ocid reads them
+OCID_FORMAT = r'ocid1\.[a-z0-9]+\.' + OCID_REGION_PATTERN.pattern + r'\S+'
+# Plan group and step ids such as sgid1.group..<id> and sgid1.step..<id> have no realm or region segment
+RESOURCE_ID_FORMAT = r'[a-z]+1\.[a-z0-9]+\.\S+'
+
+# Fields each user-defined step type cannot do without
+REQUIRED_BY_STEP_TYPE = {
+    'RUN_LOCAL_SCRIPT': ['steps.user_defined_step.run_on_instance_id', 'steps.user_defined_step.script_command'],
+    'RUN_OBJECTSTORE_SCRIPT': [
+        'steps.user_defined_step.run_on_instance_id',
+        'steps.user_defined_step.object_storage_script_location.bucket',
+        'steps.user_defined_step.object_storage_script_location.namespace',
+        'steps.user_defined_step.object_storage_script_location.object',
+    ],
+    'INVOKE_FUNCTION': ['steps.user_defined_step.function_id'],
+}
+OCID_FIELDS = ['steps.user_defined_step.run_on_instance_id', 'steps.user_defined_step.function_id']
+RESOURCE_ID_FIELDS = ['id', 'steps.id']
+CHECKED_FIELDS = [field for field in SHEET_COLUMNS if field not in (
+    'steps.type', 'steps.user_defined_step.run_as_user', 'steps.user_defined_step.request_body')]
+
+class PlanValidationError(ValueError):
+    """Every problem found in a sheet, raised before any plan group is built or sent"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        first = errors[0]
+        super().__init__(
+            f"{len(errors)} problems found in the sheet; the first is in row {first['Row']}, "
+            f"column {first['Column']} ({first['Field']}): {first['Error']}")
+
+def validate_plan_rows(rows, first_row=2, region_map=None):
+    """Check every sheet row with column-wide rules and return all problems as report records
+
+    Each record has the sheet Row and Column, the Field name, the offending Value and the Error.
+    With a region map, instance and function regions are also checked against their OCIDs.
+    """
+    # object dtype skips per-column type inference, which would cost more than the rules themselves
+    frame = pd.DataFrame(rows, dtype=object)
+    frame = frame.reindex(columns=range(len(SHEET_COLUMNS)))
+    frame.columns = SHEET_COLUMNS
+    if frame.empty:
+        return []
+
+    text = {}
+    missing = {}
+    for field in CHECKED_FIELDS:
+        values = frame[field]
+        text[field] = values.astype(str).str.strip()
+        missing[field] = values.isna().to_numpy() | text[field].str.lower().isin(EMPTY_CELL_TEXT).to_numpy()
+
+    # Rows are routed exactly as PlanBuilder.add_row routes them
+    row_type = frame['type'].astype(str)
+    user_defined = (row_type == 'USER_DEFINED').to_numpy()
+    pause = (row_type == 'USER_DEFINED_PAUSE').to_numpy()
+    built_in = ~user_defined & ~pause
+    # new_plan skips rows of new groups that have neither a group nor a step name
+    skipped = user_defined & missing['id'] & missing['display_name'] & missing['steps.display_name']
+    user_defined = user_defined & ~skipped
+    has_step = (user_defined | built_in) & ~missing['steps.display_name']
+    step_type = text['steps.user_defined_step.step_type']
+
+    rules = [
+        ('type', built_in & ~row_type.isin(GROUP_TYPES).to_numpy(), f"type must be one of {GROUP_TYPES}"),
+        ('display_name', ~skipped & missing['display_name'], "plan group display name is required"),
+        ('steps.display_name', user_defined & missing['steps.display_name'], "step display name is required"),
+        ('steps.user_defined_step.step_type', user_defined & ~step_type.isin(USER_DEFINED_STEP_TYPES).to_numpy(),
+         f"step_type must be one of {USER_DEFINED_STEP_TYPES}"),
+        ('steps.error_mode', has_step & ~missing['steps.error_mode'] & ~text['steps.error_mode'].isin(ERROR_MODES).to_numpy(),
+         f"error_mode must be one of {ERROR_MODES}"),
+        ('steps.timeout', has_step & ~missing['steps.timeout'] & ~is_whole_number(frame['steps.timeout']),
+         "timeout must be a whole number of seconds"),
+        # str() of a boolean cell is 'True' or 'False', so one text rule covers booleans and text alike
+        ('steps.is_enabled', has_step & ~missing['steps.is_enabled']
+         & ~text['steps.is_enabled'].str.lower().isin(BOOLEAN_TEXT).to_numpy(), "is_enabled must be TRUE or FALSE"),
+    ]
+    for type_name, fields in REQUIRED_BY_STEP_TYPE.items():
+        of_type = user_defined & (step_type == type_name).to_numpy()
+        for field in fields:
+            rules.append((field, of_type & missing[field], f"{field.rsplit('.', 1)[-1]} is required for {type_name} steps"))
+    for field in RESOURCE_ID_FIELDS:
+        rules.append((field, ~skipped & ~missing[field] & ~text[field].str.fullmatch(RESOURCE_ID_FORMAT).to_numpy(),
+                      "not a valid plan group or step id"))
+    for field in OCID_FIELDS:
+        rules.append((field, user_defined & ~missing[field] & ~text[field].str.fullmatch(OCID_FORMAT).to_numpy(),
+                      "not a valid OCID"))
+
+    if region_map is not None:
+        for region_field, ocid_field in STEP_REGION_COLUMNS:
+            rules.append(region_mismatch_rule(region_field, ocid_field, user_defined, missing, text, region_map))
+
+    errors = []
+    for field, failed, message in rules:
+        column = get_column_letter(SHEET_COLUMNS.index(field) + 1)
+        values = frame[field].to_numpy()
+        for index in np.flatnonzero(failed).tolist():
+            value = values[index]
+            errors.append({'Row': index + first_row, 'Column': column, 'Field': field,
+                           'Value': None if pd.isna(value) else value,
+                           'Error': message[index] if isinstance(message, np.ndarray) else message})
+    errors.sort(key=lambda error: (error['Row'], SHEET_COLUMNS.index(error['Field'])))
+    return errors
+
+def region_mismatch_rule(region_field, ocid_field, user_defined, missing, text, region_map):
+    """Flag regions that disagree with the region in the OCID next to them
+
+    Rows are grouped by the region they state, and a plain substring test on the OCID
+    clears the ones that agree. Only the rest are resolved one by one, for the message.
+    """
+    checked = np.flatnonzero(user_defined & ~missing[region_field] & ~missing[ocid_field])
+    ocids = text[ocid_field].iloc[checked]
+    stated = text[region_field].iloc[checked].to_numpy()
+    keys_by_region = {}
+    for key, region in region_map.items():
+        keys_by_region.setdefault(region, []).append(key)
+
+    agrees = np.zeros(len(checked), dtype=bool)
+    for region in set(stated.tolist()):
+        rows = stated == region
+        for key in keys_by_region.get(region, [region]):
+            agrees[rows] |= ocids[rows].str.contains(f"oc1.{key}.", regex=False).to_numpy()
+
+    failed = np.zeros(len(user_defined), dtype=bool)
+    messages = np.empty(len(user_defined), dtype=object)
+    suspects = checked[~agrees]
+    derived = resolve_regions(text[ocid_field].iloc[suspects].tolist(), region_map)
+    for index, derived_region, stated_region in zip(suspects.tolist(), derived, stated[~agrees].tolist()):
+        if derived_region != UNKNOWN_REGION and derived_region != stated_region:
+            failed[index] = True
+            messages[index] = f"{ocid_field.rsplit('.', 1)[-1]} is in {derived_region}"
+    return region_field, failed, messages
+
+def is_whole_number(values):
+    numbers = pd.to_numeric(values, errors='coerce')
+    return (numbers.notna() & (numbers % 1 == 0) & (numbers >= 0)).to_numpy()
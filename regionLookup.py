@@ -0,0 +1,78 @@
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+# The region map that ships with the tool, next to the pages
+REGION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages", "region_file.json")
+OCID_REGION_PATTERN = re.compile(r'oc1\.([^.]*)\.')
+UNKNOWN_REGION = 'unknown-region'
+
+_region_maps = {}
+_region_maps_lock = threading.Lock()
+
+def load_region_map(region_file=REGION_FILE):
+    """Return the region map in a JSON file, read once and reread only when the file changes
+
+    Region names also map to themselves, since newer OCIDs carry the full region name.
+    The map is shared between callers, so it must not be modified.
+    """
+    path = os.path.abspath(region_file)
+    mtime = os.path.getmtime(path)
+    with _region_maps_lock:
+        cached = _region_maps.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r') as f:
+            region_map = json.load(f)
+        region_map.update({name: name for name in list(region_map.values())})
+        _region_maps[path] = (mtime, region_map)
+        return region_map
+
+@lru_cache(maxsize=65536)
+def region_key(ocid):
+    """The region part of an OCID, such as 'phx' or 'eu-frankfurt-1', or None"""
+    match = OCID_REGION_PATTERN.search(ocid) if isinstance(ocid, str) else None
+    return match.group(1) if match else None
+
+@lru_cache(maxsize=None)
+def sdk_region(key):
+    """Look a region key up in the OCI SDK's own region list, for keys the region file lacks"""
+    import oci
+    if key in oci.regions.REGIONS:
+        return key
+    return oci.regions.REGIONS_SHORT_NAMES.get(key)
+
+def resolve_region_key(key, region_map):
+    if not key:
+        return UNKNOWN_REGION
+    return region_map.get(key) or sdk_region(key) or UNKNOWN_REGION
+
+def get_region_from_ocid(ocid, region_map):
+    return resolve_region_key(region_key(ocid), region_map)
+
+def resolve_regions(ocids, region_map):
+    """Resolve many OCIDs at once, looking each distinct region key up only once"""
+    keys = [region_key(ocid) for ocid in ocids]
+    regions = {key: resolve_region_key(key, region_map) for key in set(keys)}
+    return [regions[key] for key in keys]
+
+def plan_ocids(plan):
+    """Every OCID a DrPlan refers to: the plan, its groups and steps, and the instances and functions steps run on"""
+    ocids = [plan.id]
+    for group in plan.plan_groups or ():
+        ocids.append(group.id)
+        for step in group.steps or ():
+            ocids.append(step.id)
+            user_defined_step = step.user_defined_step
+            for name in ('run_on_instance_id', 'function_id'):
+                ocid = getattr(user_defined_step, name, None)
+                if ocid:
+                    ocids.append(ocid)
+    return ocids
+
+def resolve_plan_regions(plan, region_map):
+    """Map every OCID in a plan to its region without any API call"""
+    ocids = list(dict.fromkeys(ocid for ocid in plan_ocids(plan) if ocid))
+    return dict(zip(ocids, resolve_regions(ocids, region_map)))
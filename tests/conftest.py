@@ -0,0 +1,6 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The engines live at the repository root and the synthetic plans in benchmarks/
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, 'benchmarks')]
@@ -0,0 +1,59 @@
+"""get_dr_client shares clients per profile, region and config file, and rebuilds them when that file changes."""
+import os
+
+import oci
+import pytest
+
+import commonLib
+
+@pytest.fixture
+def built(monkeypatch, tmp_path):
+    """Record every client get_dr_client builds, and the config file each was read from"""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.delenv('OCI_CONFIG_FILE', raising=False)
+    monkeypatch.setattr(commonLib, '_dr_clients', {})
+    clients = []
+
+    def from_file(file_location, profile_name):
+        return {'file': file_location, 'profile': profile_name}
+
+    class Client:
+        def __init__(self, config, **kwargs):
+            self.config = config
+            clients.append(self)
+
+    monkeypatch.setattr(oci.config, 'from_file', from_file)
+    monkeypatch.setattr(oci.signer.Signer, 'from_config', staticmethod(lambda config: None))
+    monkeypatch.setattr(oci.disaster_recovery, 'DisasterRecoveryClient', Client)
+    return clients
+
+def write_config(path, mtime):
+    path.write_text("[DEFAULT]\n")
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_config_file_from_environment_is_used_and_watched(built, tmp_path, monkeypatch):
+    config_file = write_config(tmp_path / 'oci_config', 1000)
+    monkeypatch.setenv('OCI_CONFIG_FILE', config_file)
+    first = commonLib.get_dr_client('DEFAULT', 'us-phoenix-1')
+    assert first.config['file'] == config_file
+    assert commonLib.get_dr_client('DEFAULT', 'us-phoenix-1') is first
+    write_config(tmp_path / 'oci_config', 2000)
+    assert commonLib.get_dr_client('DEFAULT', 'us-phoenix-1') is not first
+    assert len(built) == 2
+
+def test_default_config_file_comes_first(built, tmp_path, monkeypatch):
+    (tmp_path / '.oci').mkdir()
+    default_file = write_config(tmp_path / '.oci' / 'config', 1000)
+    monkeypatch.setenv('OCI_CONFIG_FILE', write_config(tmp_path / 'other', 1000))
+    assert commonLib.get_dr_client('DEFAULT', 'us-phoenix-1').config['file'] == default_file
+
+def test_each_config_file_gets_its_own_client(built, tmp_path):
+    first_file = write_config(tmp_path / 'first', 1000)
+    second_file = write_config(tmp_path / 'second', 1000)
+    first = commonLib.get_dr_client('DEFAULT', 'us-phoenix-1', config_file=first_file)
+    second = commonLib.get_dr_client('DEFAULT', 'us-phoenix-1', config_file=second_file)
+    assert (first.config['file'], second.config['file']) == (first_file, second_file)
+    write_config(tmp_path / 'second', 2000)
+    assert commonLib.get_dr_client('DEFAULT', 'us-phoenix-1', config_file=first_file) is first
+    assert commonLib.get_dr_client('DEFAULT', 'us-phoenix-1', config_file=second_file) is not second
@@ -0,0 +1,13 @@
+"""The pages, the CLI and the light modules must not load a heavy module at start-up."""
+import subprocess
+import sys
+
+import pytest
+
+from bench_import_time import HEAVY_MODULES, REPO_ROOT, TARGETS
+
+@pytest.mark.parametrize('name, code', [(name, code) for name, code, heavy_allowed in TARGETS if not heavy_allowed])
+def test_heavy_modules_are_deferred(name, code):
+    check = f"{code}; import sys; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', check], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.split() == [], f"{name} imports {result.stdout.strip()} at load time"
@@ -0,0 +1,150 @@
+"""PlanSnapshotCache and get_plan_snapshot against a stub Disaster Recovery client."""
+import datetime
+import os
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import planExport
+from apiResilience import CircuitOpenError
+from planCache import PlanSnapshotCache, get_plan_snapshot
+from plan_generator import make_plans
+
+class StubClient:
+    """Serves get_dr_plan and list_dr_plans from plan models and counts the calls"""
+
+    def __init__(self, plans):
+        self.plans = {plan.id: plan for plan in plans}
+        self.calls = Counter()
+
+    def get_dr_plan(self, dr_plan_id):
+        self.calls['get_dr_plan'] += 1
+        return SimpleNamespace(data=self.plans[dr_plan_id], headers={'etag': 'etag'})
+
+    def list_dr_plans(self, dr_protection_group_id, dr_plan_id=None):
+        self.calls['list_dr_plans'] += 1
+        summaries = [SimpleNamespace(id=plan.id, time_updated=plan.time_updated) for plan in self.plans.values()
+                     if plan.dr_protection_group_id == dr_protection_group_id and dr_plan_id in (None, plan.id)]
+        return SimpleNamespace(data=SimpleNamespace(items=summaries))
+
+@pytest.fixture
+def plans():
+    return make_plans(3, 4, 3)
+
+@pytest.fixture
+def client(plans):
+    return StubClient(plans)
+
+def snapshot(client, cache, plan_id):
+    return get_plan_snapshot(client, plan_id, planExport.plan_to_dataframe, cache)
+
+def test_first_fetch_is_fresh_and_stored(tmp_path, client, plans):
+    cache = PlanSnapshotCache(str(tmp_path))
+    fetched = snapshot(client, cache, plans[0].id)
+    assert fetched.source == 'fresh'
+    assert os.path.exists(cache.path(plans[0].id))
+    assert client.calls['get_dr_plan'] == 1
+
+def test_unchanged_plan_is_served_from_cache(tmp_path, client, plans):
+    cache = PlanSnapshotCache(str(tmp_path))
+    fresh = snapshot(client, cache, plans[0].id)
+    cached = snapshot(client, cache, plans[0].id)
+    assert cached.source == 'cache'
+    assert client.calls['get_dr_plan'] == 1
+    assert cached.dataframe.dtypes.to_dict() == fresh.dataframe.dtypes.to_dict()
+    assert cached.dataframe.equals(fresh.dataframe)
+
+def test_cached_frame_keeps_float_columns(tmp_path):
+    # Without pause groups is_pause_enabled is all NaN, so the fresh frame holds it as float64
+    plan = make_plans(1, 3, 2)[0]
+    client = StubClient([plan])
+    cache = PlanSnapshotCache(str(tmp_path))
+    fresh = snapshot(client, cache, plan.id)
+    cached = snapshot(client, cache, plan.id)
+    assert cached.source == 'cache'
+    assert fresh.dataframe['is_pause_enabled'].dtype == 'float64'
+    assert cached.dataframe.equals(fresh.dataframe)
+
+def test_changed_plan_is_fetched_again(tmp_path, client, plans):
+    cache = PlanSnapshotCache(str(tmp_path))
+    snapshot(client, cache, plans[0].id)
+    plans[0].time_updated += datetime.timedelta(minutes=5)
+    plans[0].plan_groups[0].steps[0].timeout += 60
+    refreshed = snapshot(client, cache, plans[0].id)
+    assert refreshed.source == 'fresh'
+    assert client.calls['get_dr_plan'] == 2
+    assert refreshed.dataframe['steps.timeout'].iloc[0] == plans[0].plan_groups[0].steps[0].timeout
+    assert snapshot(client, cache, plans[0].id).source == 'cache'
+
+class StatusError(Exception):
+    """An error with an HTTP status, like oci.exceptions.ServiceError"""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+def fail_freshness_checks(client, error):
+    client.list_dr_plans = lambda *args, **kwargs: (_ for _ in ()).throw(error)
+
+@pytest.mark.parametrize('error', [StatusError(429), StatusError(503), requests.exceptions.ConnectionError("offline")])
+def test_transient_freshness_check_failure_serves_the_cached_copy(tmp_path, client, plans, error):
+    cache = PlanSnapshotCache(str(tmp_path))
+    snapshot(client, cache, plans[0].id)
+    fail_freshness_checks(client, error)
+    assert snapshot(client, cache, plans[0].id).source == 'stale'
+
+@pytest.mark.parametrize('error', [StatusError(404), StatusError(401), CircuitOpenError('us-phoenix-1', 30)])
+def test_other_freshness_check_failures_are_raised(tmp_path, client, plans, error):
+    cache = PlanSnapshotCache(str(tmp_path))
+    snapshot(client, cache, plans[0].id)
+    fail_freshness_checks(client, error)
+    with pytest.raises(type(error)):
+        snapshot(client, cache, plans[0].id)
+
+def test_expired_snapshot_is_dropped(tmp_path, client, plans):
+    cache = PlanSnapshotCache(str(tmp_path), max_age_seconds=60)
+    snapshot(client, cache, plans[0].id)
+    past = time.time() - 120
+    os.utime(cache.path(plans[0].id), (past, past))
+    cache.evict()
+    assert not os.path.exists(cache.path(plans[0].id))
+    assert cache.load(plans[0].id) is None
+    assert snapshot(client, cache, plans[0].id).source == 'fresh'
+
+def test_expired_metadata_is_not_served(tmp_path, client, plans, monkeypatch):
+    cache = PlanSnapshotCache(str(tmp_path), max_age_seconds=60)
+    snapshot(client, cache, plans[0].id)
+    later = time.time() + 120
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert cache.load(plans[0].id) is None
+    assert not os.path.exists(cache.path(plans[0].id))
+
+def test_oldest_snapshots_are_evicted_past_max_bytes(tmp_path, client, plans):
+    cache = PlanSnapshotCache(str(tmp_path))
+    for index, plan in enumerate(plans):
+        snapshot(client, cache, plan.id)
+        written = time.time() - 100 + index
+        os.utime(cache.path(plan.id), (written, written))
+    sizes = [os.path.getsize(cache.path(plan.id)) for plan in plans]
+    cache.max_bytes = sum(sizes[1:])
+    cache.evict()
+    assert [os.path.exists(cache.path(plan.id)) for plan in plans] == [False, True, True]
+
+def test_eviction_tolerates_files_removed_by_another_thread(tmp_path, client, plans, monkeypatch):
+    cache = PlanSnapshotCache(str(tmp_path))
+    for plan in plans:
+        snapshot(client, cache, plan.id)
+    remove = os.remove
+
+    def remove_twice(path):
+        # Another thread evicts the same file first
+        remove(path)
+        remove(path)
+
+    monkeypatch.setattr(os, 'remove', remove_twice)
+    cache.max_bytes = 0
+    cache.evict()
+    assert os.listdir(str(tmp_path)) == []
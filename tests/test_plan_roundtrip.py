@@ -0,0 +1,55 @@
+"""Export synthetic plans with real-shaped ids and parse them back as the update does."""
+from io import BytesIO
+
+import pytest
+
+import planExport
+import planUpdate
+from planCache import PlanSnapshot
+from plan_generator import make_plans, make_workbook
+
+FORMATS = ['jsonl', 'parquet', 'arrow']
+
+def test_generated_ids_have_the_service_shape():
+    plan = make_plans(1, 4, 3)[0]
+    assert plan.plan_groups[0].id.startswith('sgid1.group..')
+    assert plan.plan_groups[0].steps[0].id.startswith('sgid1.step..')
+
+def test_workbook_round_trip_parses_without_errors():
+    plans = make_plans(2, 8, 5)
+    parsed = planUpdate.parse_workbook_plans(make_workbook(plans))
+    assert [(plan_id, error) for _, plan_id, _, error in parsed] == [(plan.id, None) for plan in plans]
+    for (_, _, plan_groups, _), plan in zip(parsed, plans):
+        assert [group.id for group in plan_groups] == [group.id for group in plan.plan_groups]
+
+@pytest.mark.parametrize('file_format', FORMATS)
+def test_columnar_round_trip_parses_without_errors(file_format):
+    planColumnar = pytest.importorskip("planColumnar")
+    plans = make_plans(2, 8, 5)
+    snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                 for plan in plans]
+    output = BytesIO()
+    planColumnar.write_plans_columnar(output, snapshots, file_format)
+    output.seek(0)
+    parsed = planUpdate.parse_columnar_plans(output, file_format=file_format)
+    assert [(plan_id, error) for _, plan_id, _, error in parsed] == [(plan.id, None) for plan in plans]
+
+def test_invalid_step_id_is_still_reported():
+    from planValidation import validate_plan_rows
+    rows = planExport.plan_to_dataframe(make_plans(1, 1, 1)[0]).astype(object).values.tolist()
+    rows[0][4] = 'sgid1.step.. broken'
+    assert [error['Field'] for error in validate_plan_rows(rows)] == ['steps.id']
+
+def test_one_plan_of_a_columnar_export_parses_like_a_sheet():
+    planColumnar = pytest.importorskip("planColumnar")
+    plans = make_plans(3, 4, 3)
+    snapshots = [PlanSnapshot(plan.id, plan.display_name, planExport.plan_to_dataframe(plan), {}, 'fresh')
+                 for plan in plans]
+    output = BytesIO()
+    planColumnar.write_plans_columnar(output, snapshots, 'jsonl')
+    parsed = planUpdate.parse_columnar_plan(BytesIO(output.getvalue()), plans[1].id, file_format='jsonl')
+    assert parsed.error is None
+    assert len(parsed.rows) == len(snapshots[1].dataframe)
+    assert [group.id for group in parsed.plan_groups] == [group.id for group in plans[1].plan_groups]
+    with pytest.raises(ValueError):
+        planUpdate.parse_columnar_plan(BytesIO(output.getvalue()), 'ocid1.drplan.oc1.phx.other', file_format='jsonl')
@@ -0,0 +1,101 @@
+"""PlanBuilder: how sheet rows become plan groups and steps, and the payload it assembles."""
+import json
+import os
+
+import oci
+import pytest
+
+from planUpdate import PlanBuilder
+from planValidation import SHEET_COLUMNS
+from plan_generator import make_sheet_rows
+
+# Sheet rows and the payload the model-per-row builder made for them, before PlanBuilder kept plain records
+GOLDEN_PAYLOADS = os.path.join(os.path.dirname(__file__), 'golden', 'plan_update_payloads.json')
+
+def row(group, group_id=None, step=None, step_id=None, type='USER_DEFINED', step_type='RUN_LOCAL_SCRIPT', **fields):
+    """A sheet row in the update layout; fields are given by column name with dots as double underscores"""
+    values = dict.fromkeys(SHEET_COLUMNS)
+    values.update({'display_name': group, 'id': group_id, 'steps.display_name': step, 'steps.id': step_id,
+                   'type': type, 'steps.error_mode': 'STOP_ON_ERROR', 'steps.is_enabled': True,
+                   'steps.timeout': 600})
+    if type == 'USER_DEFINED':
+        values.update({'steps.type': 'USER_DEFINED', 'steps.user_defined_step.step_type': step_type,
+                       'steps.user_defined_step.run_on_instance_id': 'ocid1.instance.oc1.phx.i1',
+                       'steps.user_defined_step.script_command': f"/opt/dr/{step}.sh"})
+    values.update({name.replace('__', '.'): value for name, value in fields.items()})
+    return [values[column] for column in SHEET_COLUMNS]
+
+def build(rows):
+    builder = PlanBuilder()
+    for sheet_row in rows:
+        builder.add_row(sheet_row)
+    return builder.groups()
+
+def test_new_groups_are_found_by_display_name():
+    groups = build([row('Stop apps', step='stop-a'), row('Start db', step='start'), row('Stop apps', step='stop-b')])
+    assert [(group.display_name, group.id) for group in groups] == [('Stop apps', None), ('Start db', None)]
+    assert [step.display_name for step in groups[0].steps] == ['stop-a', 'stop-b']
+    assert all(step.id is None for step in groups[0].steps)
+
+def test_new_steps_with_a_name_already_in_the_group_are_dropped():
+    groups = build([row('Stop apps', step='stop'), row('Stop apps', step='stop', steps__timeout=900)])
+    assert [(step.display_name, step.timeout) for step in groups[0].steps] == [('stop', 600)]
+
+def test_rows_without_group_or_step_name_are_skipped():
+    assert build([row(None), row('Stop apps', step='stop')])[0].display_name == 'Stop apps'
+
+def test_existing_groups_are_found_by_id_and_identical_steps_dropped():
+    rows = [row('Stop apps', 'sgid1.group..g0', 'stop-a', 'sgid1.step..s0'),
+            row('Stop apps', 'sgid1.group..g0', 'stop-b', 'sgid1.step..s1'),
+            row('Stop apps', 'sgid1.group..g0', 'stop-a', 'sgid1.step..s0'),
+            row('Stop apps', 'sgid1.group..g0', 'stop-a', 'sgid1.step..s0', steps__timeout=900)]
+    groups = build(rows)
+    assert len(groups) == 1 and groups[0].id == 'sgid1.group..g0'
+    assert [(step.id, step.timeout) for step in groups[0].steps] == [
+        ('sgid1.step..s0', 600), ('sgid1.step..s1', 600), ('sgid1.step..s0', 900)]
+
+def test_user_defined_step_models_follow_the_step_type():
+    groups = build([
+        row('G', 'sgid1.group..g0', 'local', 'sgid1.step..s0'),
+        row('G', 'sgid1.group..g0', 'object', 'sgid1.step..s1', step_type='RUN_OBJECTSTORE_SCRIPT',
+            steps__user_defined_step__object_storage_script_location__bucket='b',
+            steps__user_defined_step__object_storage_script_location__namespace='n',
+            steps__user_defined_step__object_storage_script_location__object='o.sh'),
+        row('G', 'sgid1.group..g0', 'function', 'sgid1.step..s2', step_type='INVOKE_FUNCTION',
+            steps__user_defined_step__function_id='ocid1.fnfunc.oc1.phx.f1',
+            steps__user_defined_step__request_body='{}'),
+    ])
+    local, object_storage, function = (step.user_defined_step for step in groups[0].steps)
+    assert (local.step_type, local.script_command) == ('RUN_LOCAL_SCRIPT', '/opt/dr/local.sh')
+    location = object_storage.object_storage_script_location
+    assert (location.bucket, location.namespace, location.object) == ('b', 'n', 'o.sh')
+    assert (function.function_id, function.request_body) == ('ocid1.fnfunc.oc1.phx.f1', '{}')
+
+def test_pause_groups():
+    groups = build([row('Wait', 'sgid1.group..p0', type='USER_DEFINED_PAUSE'),
+                    row('Wait', 'sgid1.group..p0', type='USER_DEFINED_PAUSE'),
+                    row('Check', type='USER_DEFINED_PAUSE')])
+    assert [(group.display_name, group.id, group.is_pause_enabled, group.steps) for group in groups] == [
+        ('Wait', 'sgid1.group..p0', True, None), ('Check', None, True, None)]
+
+def test_built_in_steps_keep_their_group_type():
+    groups = build([row('Start', 'sgid1.group..b0', 'start-1', 'sgid1.step..b0', type='BUILT_IN',
+                        steps__type='COMPUTE_INSTANCE_START'),
+                    row('Start', 'sgid1.group..b0', 'start-1', 'sgid1.step..b0', type='BUILT_IN',
+                        steps__type='COMPUTE_INSTANCE_START')])
+    assert groups[0].type == 'BUILT_IN'
+    assert [(step.id, step.user_defined_step) for step in groups[0].steps] == [('sgid1.step..b0', None)]
+
+def test_exported_plan_with_new_groups():
+    rows = make_sheet_rows(8, 5, new_groups=2)
+    groups = build(rows)
+    assert [group.display_name for group in groups if group.id is None] == ['New Group 0', 'New Group 2']
+    assert len(groups) == 10
+    assert sum(len(group.steps or []) for group in groups) == sum(1 for sheet_row in rows if sheet_row[2])
+
+with open(GOLDEN_PAYLOADS) as f:
+    GOLDEN = json.load(f)
+
+@pytest.mark.parametrize('sheet', sorted(GOLDEN))
+def test_payload_matches_golden(sheet):
+    assert oci.util.to_dict(build(GOLDEN[sheet]['rows'])) == GOLDEN[sheet]['payload']
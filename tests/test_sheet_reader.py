@@ -0,0 +1,41 @@
+"""Reading update sheets: merged group columns are forward-filled, streamed or fully loaded."""
+from io import BytesIO
+
+import openpyxl
+import pytest
+
+import planUpdate
+from commonLib import MANIFEST_SHEET
+from plan_generator import make_plans, make_workbook
+
+@pytest.fixture
+def workbook_bytes():
+    return make_workbook(make_plans(1, 8, 4)).getvalue()
+
+def expected_rows(workbook_bytes):
+    book = openpyxl.load_workbook(BytesIO(workbook_bytes))
+    # The export keeps the template's own sheets, so find the plan's sheet through the manifest
+    sheet_name = book[MANIFEST_SHEET]['A2'].value
+    sheet = book[sheet_name]
+    anchors = {}
+    for merged_cell_range in sheet.merged_cells.ranges:
+        value = sheet.cell(merged_cell_range.min_row, merged_cell_range.min_col).value
+        for row, col in ((row, col) for row in range(merged_cell_range.min_row, merged_cell_range.max_row + 1)
+                         for col in range(merged_cell_range.min_col, merged_cell_range.max_col + 1)):
+            anchors[(row, col)] = value
+    return sheet_name, [[anchors.get((row_index, col), value) for col, value in enumerate(row, start=1)]
+                                for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2)]
+
+def test_streaming_rows_fill_merged_cells(workbook_bytes):
+    sheet_name, rows = expected_rows(workbook_bytes)
+    streamed = list(planUpdate.load_sheet_rows(BytesIO(workbook_bytes), sheet_name))
+    assert streamed == rows
+    assert all(row[0] is not None and row[1] is not None for row in streamed)
+
+def test_full_load_when_read_only_sheets_cannot_be_scanned(workbook_bytes, monkeypatch):
+    sheet_name, rows = expected_rows(workbook_bytes)
+    # As with an openpyxl whose read-only sheets no longer expose their XML
+    monkeypatch.setattr(planUpdate, 'sheet_source_opener', lambda sheet: None)
+    workbook = planUpdate.open_workbook(BytesIO(workbook_bytes))
+    assert not getattr(workbook, 'read_only', False)
+    assert list(planUpdate.iter_sheet_rows_streaming(workbook[sheet_name])) == rows